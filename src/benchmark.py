@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+from dealer.Card import Card
+from dealer.Deck import Deck
+from dealer.Game import Game
+from dealer.Logging import Logging
+from dealer.Utils import table_rngs
+from players.Enum import ACTION_DIM, GAMEMODE, SUITS
+from players.PPO import PPO, RolloutBuffer
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game import ShelemGame
+from rlcard_env.game_state import GameState2, CARD_STATE, NUMBER_OF_PARAMS
+
+SEED = 1234
+DEFAULT_HISTORY = "benchmark_history.json"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+
+class Measurement:
+    """
+    operations timed by a benchmark, a decision, a round or an update depending on the benchmark
+    """
+
+    def __init__(self, operations: int, seconds: float):
+        self.operations = operations
+        self.seconds = seconds
+
+    @property
+    def per_sec(self) -> float:
+        return self.operations / self.seconds if self.seconds else float("inf")
+
+    @property
+    def us_per_op(self) -> float:
+        return 1e6 * self.seconds / self.operations
+
+    def to_dict(self) -> Dict:
+        return {"operations": self.operations, "per_sec": self.per_sec, "us_per_op": self.us_per_op}
+
+
+def timed(function: Callable[[], None], operations: int) -> Measurement:
+    t0 = time.perf_counter()
+    function()
+    return Measurement(operations, time.perf_counter() - t0)
+
+
+def bench_build_cards(scale: int) -> Dict[str, Measurement]:
+    n = 200 * scale
+    return {"build_cards": timed(lambda: [Deck.build_cards() for _ in range(n)], n)}
+
+
+def bench_deal(scale: int) -> Dict[str, Measurement]:
+    n = 2000 * scale
+    rng, _ = table_rngs(SEED)
+    deck = Deck()
+    return {"deal": timed(lambda: [deck.deal(rng) for _ in range(n)], n)}
+
+
+def bench_card_compare(scale: int) -> Dict[str, Measurement]:
+    n = 20000 * scale
+    cards = Deck.build_cards()
+    rng = np.random.default_rng(SEED)
+    pairs = [(cards[a], cards[b]) for a, b in rng.integers(len(cards), size=(n, 2))]
+
+    def run():
+        for first, second in pairs:
+            Card.compare(first, second, GAMEMODE.NORMAL, SUITS.HEARTS, SUITS.SPADES)
+    return {"card_compare": timed(run, n)}
+
+
+class TimedRuleBasedPlayer(RuleBasedPlayer):
+    """
+    RuleBasedPlayer which accumulates the time of play_a_card per position in the trick
+    """
+
+    def __init__(self, player_id, team_mate_player_id, timings: List[List[float]]):
+        super().__init__(player_id, team_mate_player_id)
+        self.timings = timings
+
+    def play_a_card(self, current_hand: List, current_suit: SUITS) -> Card:
+        position = sum(card is not None for card in current_hand)
+        t0 = time.perf_counter()
+        card = super().play_a_card(current_hand, current_suit)
+        self.timings[position].append(time.perf_counter() - t0)
+        return card
+
+
+def bench_rule_based_turns(scale: int) -> Dict[str, Measurement]:
+    rounds = 20 * scale
+    timings = [[] for _ in range(4)]
+    game = Game([TimedRuleBasedPlayer(i, (i + 2) % 4, timings) for i in range(4)], SEED)
+    for _ in range(rounds):
+        game.play_a_round()
+    return {"rule_based_turn{}".format(position): Measurement(len(t), sum(t)) for position, t in enumerate(timings)}
+
+
+def bench_game_round(scale: int) -> Dict[str, Measurement]:
+    rounds = 20 * scale
+    game = Game([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)], SEED)
+    return {"game_round": timed(lambda: [game.play_a_round() for _ in range(rounds)], rounds)}
+
+
+def bench_shelem_step(scale: int) -> Dict[str, Measurement]:
+    rounds = 10 * scale
+    game = ShelemGame(game_end=0, seed=SEED)
+    rng = np.random.default_rng(SEED)
+    steps = 0
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            game.reset()
+            while not game.is_over():
+                legal = game.get_legal_actions()
+                game.step(legal[rng.integers(len(legal))])
+                steps += 1
+    return {"shelem_step": Measurement(steps, time.perf_counter() - t0)}
+
+
+def bench_observation_encoding(scale: int) -> Dict[str, Measurement]:
+    n = 2000 * scale
+    observation = GameState2()
+    hands = np.random.default_rng(SEED).permuted(np.tile(np.arange(52), (n, 1)), axis=1)[:, :12].tolist()
+
+    def run():
+        for hand in hands:
+            observation.reset_state()
+            observation.set_states(hand, CARD_STATE.MY_HAND)
+            for card in hand[:4]:
+                observation.set_state(card, CARD_STATE.PLAYED)
+    return {"observation_encoding": timed(run, n)}
+
+
+def bench_ppo_update(scale: int) -> Dict[str, Measurement]:
+    torch.manual_seed(SEED)
+    updates = max(1, scale // 2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ppo = PPO(NUMBER_OF_PARAMS, ACTION_DIM, 64, 0.002, (0.9, 0.999), 0.99, 4, 0.2)
+    memory = RolloutBuffer(NUMBER_OF_PARAMS, ACTION_DIM)
+    rng = np.random.default_rng(SEED)
+    valid_actions = np.ones(ACTION_DIM, dtype=bool)
+    for i in range(2048):
+        ppo.policy_old.act(rng.random(NUMBER_OF_PARAMS, dtype=np.float32), memory, valid_actions)
+        memory.add_reward(float(rng.normal()), i % 12 == 11)
+    return {"ppo_update": timed(lambda: [ppo.update(memory) for _ in range(updates)], updates)}
+
+
+BENCHMARKS = OrderedDict([
+    ("build_cards", bench_build_cards),
+    ("deal", bench_deal),
+    ("card_compare", bench_card_compare),
+    ("rule_based_turns", bench_rule_based_turns),
+    ("game_round", bench_game_round),
+    ("shelem_step", bench_shelem_step),
+    ("observation_encoding", bench_observation_encoding),
+    ("ppo_update", bench_ppo_update),
+])
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def run_benchmark(name: str, scale: int) -> Dict[str, Dict]:
+    """
+    runs one benchmark in a process of its own, see run_benchmarks, so that the peak RSS of the process is the peak
+    of this benchmark and not of the ones run before it: ru_maxrss never goes down
+    """
+    Logging.verbose = 0
+    results = OrderedDict((key, measurement.to_dict()) for key, measurement in BENCHMARKS[name](scale).items())
+    peak = peak_rss_mb()
+    for result in results.values():
+        result["peak_rss_mb"] = peak
+    return results
+
+
+def run_benchmarks(names: List[str] = None, scale: int = 10) -> Dict:
+    """
+    runs every benchmark in a fresh spawned process, the peak_rss_mb of the run is the highest of them
+    """
+    results = OrderedDict()
+    for name in names or BENCHMARKS:
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            results.update(executor.submit(run_benchmark, name, scale).result())
+    return {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+            "machine": platform.node(), "scale": scale, "results": results,
+            "peak_rss_mb": max((result["peak_rss_mb"] for result in results.values()), default=peak_rss_mb())}
+
+
+def find_regressions(run: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    :param threshold: allowed relative slowdown of the time per operation, 0.1 flags anything 10% slower
+    :return: a description of every benchmark of run slower than in baseline
+    """
+    regressions = []
+    for key, result in run["results"].items():
+        if key not in baseline["results"]:
+            continue
+        before = baseline["results"][key]["us_per_op"]
+        after = result["us_per_op"]
+        if after > before * (1 + threshold):
+            regressions.append("{}: {:.2f} us/op -> {:.2f} us/op ({:+.0%})".format(key, before, after,
+                                                                                  after / before - 1))
+    return regressions
+
+
+def append_history(path: str, run: Dict):
+    history = []
+    if os.path.exists(path):
+        with open(path) as f:
+            history = json.load(f)
+    history.append(run)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="micro benchmarks of the game engine")
+    parser.add_argument("benchmarks", nargs="*", help="any of {}, all of them by default".format(
+        ", ".join(BENCHMARKS)))
+    parser.add_argument("--scale", type=int, default=10, help="multiplies the work of every benchmark")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+
+    current = run_benchmarks(args.benchmarks, args.scale)
+    for key, result in current["results"].items():
+        print("{:24s} {:12.1f}/sec {:10.2f} us/op {:8.1f} MB".format(
+            key, result["per_sec"], result["us_per_op"], result["peak_rss_mb"]))
+    append_history(args.history, current)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=1)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            found = find_regressions(current, json.load(f), args.threshold)
+        for regression in found:
+            print("REGRESSION " + regression)
+        sys.exit(1 if found else 0)
@@ -1,28 +1,77 @@
 from unicards import unicard
 
-from players.Enum import VALUES, SUITS, GAMEMODE, NORMAL_RANKS
+from players.Enum import VALUES, SUITS, GAMEMODE, NORMAL_RANKS, DECK_SIZE, NUM_SUITS
+
+HOKM_DIFFERENCE = 15
+SUIT_DIFFERENCE = 14
+
+# card ids follow Deck.build_cards: rank index = id // 4 (Two .. Ace) and suit = id % 4 + 1
+CARD_VALUES = tuple(list(VALUES)[card_id // NUM_SUITS] for card_id in range(DECK_SIZE))
+CARD_SUITS = tuple(SUITS(card_id % NUM_SUITS + 1) for card_id in range(DECK_SIZE))
+
+# RANK_TABLE[game_mode][card_id] == card.value.value.get_value(game_mode)
+RANK_TABLE = [None] * (len(GAMEMODE) + 1)
+for _mode in GAMEMODE:
+    RANK_TABLE[_mode] = tuple(value.value.get_value(_mode) for value in CARD_VALUES)
+RANK_TABLE = tuple(RANK_TABLE)
+
+
+def compare_ids(first_id: int, second_id: int, game_mode: GAMEMODE, hokm_suit: SUITS, current_suit: SUITS) -> int:
+    """
+    Card.compare on card ids
+    """
+    first_suit = CARD_SUITS[first_id]
+    second_suit = CARD_SUITS[second_id]
+    if first_suit == second_suit:
+        ranks = RANK_TABLE[game_mode]
+        return ranks[first_id] - ranks[second_id]
+    if game_mode == GAMEMODE.NORMAL:
+        if hokm_suit == SUITS.NOSUIT:
+            raise ValueError("In normal game mode you cannot have Hokm == NOSUIT")
+        if first_suit == hokm_suit:
+            return HOKM_DIFFERENCE
+        elif second_suit == hokm_suit:
+            return -HOKM_DIFFERENCE
+    if first_suit == current_suit:
+        return SUIT_DIFFERENCE
+    if second_suit == current_suit:
+        return -SUIT_DIFFERENCE
+    return 0
 
 
 class Card:
+    """
+    Immutable card, the 52 cards of the game are the singletons of CARDS built once at import. Two cards are equal
+    when they have the same id, which is also their hash
+    """
+    __slots__ = ("id", "suit", "value", "rank", "repr", "name", "_repr")
+
     def __init__(self, id: int, value: VALUES, suit: SUITS):
         """
         :param value: one of the key/values in Utils.VALUES
         :param suit: one of the key/values in Utils.SUITS
         """
-        self.id = id
-        self.suit = suit
-        self.value = value
-        self.repr = unicard(self.card_abbrev(value, suit))
-        if self.value == 0:
-            self.name = "Joker"
+        if value == 0:
+            name = "Joker"
         else:
-            self.name = "%sof %s" % (value.value.name.title(), suit.name.title())
+            name = "%sof %s" % (value.value.name.title(), suit.name.title())
+        for slot, slot_value in (("id", id), ("suit", suit), ("value", value), ("rank", id // NUM_SUITS),
+                                 ("repr", unicard(self.card_abbrev(value, suit))), ("name", name),
+                                 ("_repr", "({}-{})".format(id, name))):
+            object.__setattr__(self, slot, slot_value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Card is immutable")
+
+    def __reduce__(self):
+        # unpickled and copied cards are the registry singletons
+        return card_of, (self.id,)
 
     def __eq__(self, other):
-        return isinstance(other, Card) and self.value == other.value and self.suit == other.suit
+        return isinstance(other, Card) and self.id == other.id
 
     def __ne__(self, other):
-        return not isinstance(other, Card) or self.value != other.value or self.suit != other.suit
+        return not isinstance(other, Card) or self.id != other.id
 
     def __ge__(self, other):
         return self.id >= other.id
@@ -37,10 +86,10 @@ class Card:
         return self.id < other.id
 
     def __hash__(self):
-        return hash((self.value, self.suit))
+        return self.id
 
     def __repr__(self):
-        return "({}-{})".format(self.id, self.name)
+        return self._repr
 
     def __str__(self):
         return self.name
@@ -57,27 +106,11 @@ class Card:
                     > 1 , < -1: same suit value difference is returned
                     0: none is bigger than the other
         """
-        hokm_difference = 15
-        suit_difference = 14
-        if isinstance(first, Card) and isinstance(second, Card):
-            my_value = first.value.value.get_value(game_mode)
-            second_value = second.value.value.get_value(game_mode)
-            if first.suit == second.suit:
-                return my_value - second_value
-            if game_mode == GAMEMODE.NORMAL:
-                if hokm_suit == SUITS.NOSUIT:
-                    raise ValueError("In normal game mode you cannot have Hokm == NOSUIT")
-                if first.suit == hokm_suit:
-                    return hokm_difference
-                elif second.suit == hokm_suit:
-                    return -hokm_difference
-            if first.suit == current_suit:
-                return suit_difference
-            if second.suit == current_suit:
-                return -suit_difference
-            return 0
-        else:
+        try:
+            first_id, second_id = first.id, second.id
+        except AttributeError:
             raise ValueError("invalid value for cards")
+        return compare_ids(first_id, second_id, game_mode, hokm_suit, current_suit)
 
     @staticmethod
     def card_abbrev(value, suit):
@@ -94,3 +127,11 @@ class Card:
         values = {v: k for k, v in NORMAL_RANKS.items()}
         value = value // 4
         return "{} of {}".format(values[value+1], suit.name)
+
+
+# the card registry: CARDS[card_id] is the only Card of each id
+CARDS = tuple(Card(card_id, CARD_VALUES[card_id], CARD_SUITS[card_id]) for card_id in range(DECK_SIZE))
+
+
+def card_of(card_id: int) -> Card:
+    return CARDS[card_id]
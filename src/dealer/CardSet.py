@@ -0,0 +1,125 @@
+from typing import Iterable, Iterator, List
+
+from players.Enum import SUITS, DECK_SIZE, NUM_SUITS
+
+# Bit i of a card set stands for the card with id i, so the 52-bit layout mirrors Deck.build_cards:
+# 0,1,2,3 -> 2s, 4,5,6,7 -> 3s ... 48,49,50,51 -> As (suit = id % 4 + 1)
+FULL_MASK = (1 << DECK_SIZE) - 1
+
+SUIT_MASKS = [0] * (len(SUITS) + 1)
+for _suit in SUITS:
+    if _suit == SUITS.NOSUIT:
+        continue
+    for _rank in range(DECK_SIZE // NUM_SUITS):
+        SUIT_MASKS[_suit] |= 1 << (_rank * NUM_SUITS + _suit - 1)
+SUIT_MASKS = tuple(SUIT_MASKS)
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+# _BYTE_IDS[position][byte] lists the card ids of the bits of byte number position of a mask
+_BYTE_IDS = tuple(tuple(tuple(position * 8 + bit for bit in range(8) if (byte >> bit) & 1) for byte in range(256))
+                  for position in range((DECK_SIZE + 7) // 8))
+
+
+def ids_of(mask: int) -> List[int]:
+    """
+    :return: the card ids of a mask in ascending order
+    """
+    card_ids = []
+    position = 0
+    while mask:
+        card_ids.extend(_BYTE_IDS[position][mask & 0xFF])
+        mask >>= 8
+        position += 1
+    return card_ids
+
+
+def iter_ids(mask: int) -> Iterator[int]:
+    return iter(ids_of(mask))
+
+
+def mask_of(card_ids: Iterable[int]) -> int:
+    mask = 0
+    for card_id in card_ids:
+        mask |= 1 << card_id
+    return mask
+
+
+def lowest_id(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+def highest_id(mask: int) -> int:
+    return mask.bit_length() - 1
+
+
+def suit_of(card_id: int) -> SUITS:
+    return SUITS(card_id % NUM_SUITS + 1)
+
+
+class CardSet:
+    """
+    A set of cards stored as a 52-bit integer, bit i being the card with id i
+    """
+    __slots__ = ("mask",)
+
+    def __init__(self, mask: int = 0):
+        self.mask = mask
+
+    @classmethod
+    def from_ids(cls, card_ids: Iterable[int]):
+        return cls(mask_of(card_ids))
+
+    def add(self, card_id: int):
+        self.mask |= 1 << card_id
+
+    def remove(self, card_id: int):
+        bit = 1 << card_id
+        if not self.mask & bit:
+            raise KeyError(card_id)
+        self.mask ^= bit
+
+    def suit_mask(self, suit: SUITS) -> int:
+        return self.mask & SUIT_MASKS[suit]
+
+    def has_suit(self, suit: SUITS) -> bool:
+        return self.mask & SUIT_MASKS[suit] != 0
+
+    def count(self, suit: SUITS) -> int:
+        return popcount(self.mask & SUIT_MASKS[suit])
+
+    def legal_mask(self, suit: SUITS) -> int:
+        """
+        :return: the cards that may be played when suit has been led (all cards if I'm out of that suit)
+        """
+        return self.mask & SUIT_MASKS[suit] or self.mask
+
+    def __contains__(self, card_id: int) -> bool:
+        return (self.mask >> card_id) & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter_ids(self.mask)
+
+    def __len__(self) -> int:
+        return popcount(self.mask)
+
+    def __eq__(self, other):
+        return isinstance(other, CardSet) and self.mask == other.mask
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __or__(self, other):
+        return CardSet(self.mask | other.mask)
+
+    def __and__(self, other):
+        return CardSet(self.mask & other.mask)
+
+    def __sub__(self, other):
+        return CardSet(self.mask & ~other.mask)
+
+    def __repr__(self):
+        return "CardSet({:#015x})".format(self.mask)
@@ -0,0 +1,89 @@
+import argparse
+from typing import Union, Tuple
+
+import numpy as np
+
+from dealer.CardSet import mask_of
+from dealer.Utils import seed_sequence
+from players.Enum import DECK_SIZE
+
+# a deal is the 52 card ids in dealing order, see Deck.deal: [0:12], [12:24], [24:36] and [40:52] are the four
+# hands and [36:40] the middle deck
+DEAL_DTYPE = np.uint8
+HAND_SLICES = (slice(0, 12), slice(12, 24), slice(24, 36), slice(40, 52))
+MIDDLE_SLICE = slice(36, 40)
+
+
+def generate_deals(path: str, num_deals: int, seed=None, chunk_size: int = 1 << 16):
+    """
+    writes num_deals random permutations of the deck to a .npy file chunk by chunk, so that millions of deals
+    never have to fit in memory, the same seed always gives the same corpus
+    """
+    rng = np.random.default_rng(seed_sequence(seed))
+    deals = np.lib.format.open_memmap(path, mode="w+", dtype=DEAL_DTYPE, shape=(num_deals, DECK_SIZE))
+    base = np.tile(np.arange(DECK_SIZE, dtype=DEAL_DTYPE), (min(chunk_size, num_deals), 1))
+    for start in range(0, num_deals, chunk_size):
+        end = min(start + chunk_size, num_deals)
+        deals[start:end] = rng.permuted(base[:end - start], axis=1)
+    deals.flush()
+    del deals
+
+
+class DealCorpus:
+    """
+    Read-only corpus of pre-generated deals. The file is memory mapped so a deal is a view on the page cache and
+    several processes share the same pages. Games consume the deals in order through next_deal, two games reading
+    the same corpus from the same position play the same deals, which is what duplicate evaluation needs
+    """
+
+    def __init__(self, deals: Union[str, np.ndarray], start: int = 0):
+        """
+        :param deals: the path of a file written by generate_deals or an array of shape (n, 52)
+        :param start: index of the first deal given by next_deal
+        """
+        if isinstance(deals, str):
+            deals = np.load(deals, mmap_mode="r")
+        if deals.ndim != 2 or deals.shape[1] != DECK_SIZE or deals.dtype != DEAL_DTYPE:
+            raise ValueError("a deal corpus must be an uint8 array of shape (n, {})".format(DECK_SIZE))
+        self.deals = deals
+        self.position = start
+
+    def __len__(self):
+        return len(self.deals)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.deals[index]
+
+    def next_deal(self) -> np.ndarray:
+        """
+        the next deal of the corpus, it wraps around at the end
+        """
+        deal = self.deals[self.position % len(self.deals)]
+        self.position += 1
+        return deal
+
+    def seek(self, position: int):
+        self.position = position
+
+    def split(self, parts: int, index: int) -> "DealCorpus":
+        """
+        a corpus over the index-th of parts contiguous slices, e.g. one per worker process
+        """
+        bounds = np.linspace(0, len(self.deals), parts + 1).astype(int)
+        return DealCorpus(self.deals[bounds[index]:bounds[index + 1]])
+
+    def hand_masks(self, index: int) -> Tuple[int, int, int, int, int]:
+        """
+        :return: the card-set masks of the four hands and the middle deck of a deal
+        """
+        deal = self.deals[index].tolist()
+        return tuple(mask_of(deal[s]) for s in HAND_SLICES) + (mask_of(deal[MIDDLE_SLICE]),)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="generate a corpus of random deals")
+    parser.add_argument("path")
+    parser.add_argument("num_deals", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    generate_deals(args.path, args.num_deals, args.seed)
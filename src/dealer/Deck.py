@@ -1,7 +1,10 @@
-import random
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, Sequence
 
-from dealer.Card import Card
+from numpy.random import Generator
+
+from dealer.Card import Card, CARDS
+from dealer.CardSet import CardSet, FULL_MASK, iter_ids, ids_of, mask_of, popcount
+from dealer.Utils import DEFAULT_RNG
 from players.Enum import SUITS, VALUES
 
 
@@ -30,135 +33,148 @@ class Hand:
 class Deck:
     deck_size = 52
 
-    def __init__(self, cards: List[Card] = None, deck_id: int = 0):
-        if cards is None:
-            cards = []
-        self._cards = list(sorted(cards))
+    def __init__(self, cards: List[Card] = None, deck_id: int = 0, rng: Generator = None):
+        self._set = CardSet(mask_of(c.id for c in cards) if cards else 0)
         self.deck_id = deck_id
+        self.rng = rng
+        self._cached_mask = 0
+        self._cached_cards = []
+
+    @classmethod
+    def from_mask(cls, mask: int, deck_id: int = 0):
+        deck = cls(None, deck_id)
+        deck._set.mask = mask
+        return deck
 
-    def deal(self) -> Tuple[Any, Any, Any, Any, Any]:
-        if len(self.cards) == 0:
-            self._cards = self.build_cards()
-        if len(self._cards) < self.deck_size:
+    def deal(self, rng: Generator = None, deal: Sequence[int] = None) -> Tuple[Any, Any, Any, Any, Any]:
+        """
+        :param rng: the table stream to shuffle with, by default the deck own generator
+        :param deal: a permutation of the card ids, e.g. a row of a DealCorpus, to deal instead of shuffling
+        """
+        if self._set.mask == 0:
+            self._set.mask = FULL_MASK
+        if len(self) < self.deck_size:
             raise ValueError("Not enough cards in deck to shuffle and deal!")
-        self._shuffle()
-        cards = list(self.cards)
+        if deal is not None:
+            ids = [int(i) for i in deal]
+            return Deck.from_mask(mask_of(ids[0:12]), 1), Deck.from_mask(mask_of(ids[12:24]), 2), \
+                Deck.from_mask(mask_of(ids[24:36]), 3), Deck.from_mask(mask_of(ids[36:40])), \
+                Deck.from_mask(mask_of(ids[40:52]), 4)
+        cards = self._shuffle(rng)
         return Deck(cards[0:12], 1), Deck(cards[12:24], 2), Deck(cards[24:36], 3), \
                Deck(cards[36:40]), Deck(cards[40:52], 4)
 
-    def _shuffle(self):
-        random.shuffle(self._cards)
+    def _rng(self, rng: Generator = None) -> Generator:
+        return rng or self.rng or DEFAULT_RNG
 
-    def _shuffle2(self):
-        cards = list(self._cards)
-        for i in range(random.randint(1, 3)):
-            splitted = [x for x in split(cards, random.randint(2, 5))]
-            random.shuffle(splitted)
+    def _shuffle(self, rng: Generator = None) -> List[Card]:
+        cards = list(self.cards)
+        self._rng(rng).shuffle(cards)
+        return cards
+
+    def _shuffle2(self, rng: Generator = None) -> List[Card]:
+        rng = self._rng(rng)
+        cards = list(self.cards)
+        for i in range(rng.integers(1, 4)):
+            splitted = [x for x in split(cards, rng.integers(2, 6))]
+            rng.shuffle(splitted)
             cards = [y for x in splitted for y in x]
-        self._cards = list(cards)
+        return cards
+
+    @property
+    def mask(self) -> int:
+        return self._set.mask
 
     @property
     def cards(self) -> List:
-        return self._cards
+        """
+        the cards of the deck sorted by id, rebuilt from the bitboard only when it has changed
+        """
+        if self._cached_mask != self._set.mask:
+            self._cached_cards = [_CARD_BY_ID[i] for i in iter_ids(self._set.mask)]
+            self._cached_mask = self._set.mask
+        return self._cached_cards
+
+    @property
+    def _cards(self) -> List:
+        return self.cards
+
+    @_cards.setter
+    def _cards(self, cards: List[Card]):
+        self._set.mask = mask_of(c.id for c in cards)
 
     @property
     def size(self) -> int:
-        return len(self.cards)
+        return len(self)
 
     def get_deck_score(self) -> int:
-        number_of_hands = len(self._cards) // 4
+        number_of_hands = len(self) // 4
         score = number_of_hands * 5
-        for card in self._cards:
-            if card.value == VALUES.Ace or card.value == VALUES.Ten:
-                score += 0#10
-            elif card.value == VALUES.Five:
-                score += 0#5
+        score += 0 * popcount(self._set.mask & ACE_TEN_MASK)  # 10
+        score += 0 * popcount(self._set.mask & FIVE_MASK)  # 5
         return score
 
     def count_eligible_cards(self, suit: SUITS):
-        count_card = 0
-        for c in self._cards:
-            if c.suit == suit:
-                count_card += 1
-        return count_card or len(self._cards)
-
-    def pop_random_from_suit(self, suit: SUITS):
-        # random.randint(0,12)
-        pop_index = random.randint(0, self.count_eligible_cards(suit)-1)
-        suit_ind = 0
-        for ind, card in enumerate(self._cards):
-            if card.suit == suit:
-                if suit_ind == pop_index:
-                    pop_index = ind
-                    break
-                else:
-                    suit_ind += 1
-        return self._cards.pop(pop_index)
+        return self._set.count(suit) or len(self)
+
+    def suit_count(self, suit: SUITS) -> int:
+        return self._set.count(suit)
+
+    def legal_mask(self, suit: SUITS) -> int:
+        return self._set.legal_mask(suit)
+
+    def pop_random_from_suit(self, suit: SUITS, rng: Generator = None):
+        eligible = ids_of(self._set.legal_mask(suit))
+        pop_index = self._rng(rng).integers(len(eligible))
+        return self.pop_by_id(eligible[pop_index])
+
+    def pop_by_id(self, card_id: int):
+        self._set.remove(card_id)
+        return _CARD_BY_ID[card_id]
 
     def pop_by_index(self, pop_index: int):
-        return self._cards.pop(pop_index)
+        return self.pop_by_id(self.cards[pop_index].id)
 
     def get_by_index(self, pop_index: int):
-        return self._cards[pop_index]
+        return self.cards[pop_index]
 
     def get_by_value(self, value):
-        for card in self._cards:
-            if card.id == value:
-                return card
+        if 0 <= value < self.deck_size and value in self._set:
+            return _CARD_BY_ID[value]
         raise ValueError("Card {} not found in my deck".format(value))
 
     def has_suit(self, suit: SUITS):
-        for card in self._cards:
-            if card.suit == suit:
-                return True
-        return False
+        return self._set.has_suit(suit)
 
     def pop_card_from_deck(self, card: Card):
-        for i, c in enumerate(self._cards):
-            if c == card:
-                pop_index = i
-                break
-        else:
+        if card.id not in self._set:
             raise ValueError("can't find selected card: {}".format(card))
-        return self._cards.pop(pop_index)
+        return self.pop_by_id(card.id)
 
     @staticmethod
     def build_cards() -> List:
         """
         Current build does not build Jokers!
+        :return: the 52 card singletons ordered by id: 0,1,2,3 -> 2s, 4,5,6,7 -> 3s ... 48,49,50,51 -> As
         """
-        built_cards = []
-        id = 0  # 0,1,2,3 -> 2s, 4,5,6,7 -> 3s ... 48,49,50,51 -> As
-        for val in VALUES:
-            for suit in SUITS:
-                if suit == SUITS.NOSUIT:
-                    continue
-                if val == VALUES.Joker:
-                    continue
-                new_card = Card(id, val, suit)
-                built_cards.append(new_card)
-                id += 1
-        return built_cards
+        return list(CARDS)
 
-    def __add__(self, other):
+    @staticmethod
+    def _mask_of(other) -> int:
         if isinstance(other, Deck):
-            return Deck(cards=list(self._cards) + list(other._cards))
+            return other._set.mask
         elif isinstance(other, list):
-            return Deck(cards=list(self._cards) + other)
+            return mask_of(c.id for c in other)
         elif isinstance(other, Card):
-            return Deck(cards=list(self._cards) + [other])
+            return 1 << other.id
         else:
             raise NotImplementedError
 
+    def __add__(self, other):
+        return Deck.from_mask(self._set.mask | self._mask_of(other))
+
     def __iadd__(self, other):
-        if isinstance(other, Deck):
-            self._cards = sorted(list(self._cards) + list(other._cards))
-        elif isinstance(other, list):
-            self._cards = sorted(list(self._cards) + other)
-        elif isinstance(other, Card):
-            self._cards = sorted(list(self._cards) + [other])
-        else:
-            raise NotImplementedError
+        self._set.mask |= self._mask_of(other)
         return self
 
     def __str__(self):
@@ -166,24 +182,22 @@ class Deck:
         for suit in SUITS:
             if suit == SUITS.NOSUIT:
                 continue
-            cards[suit] = []
-            for c in self._cards:
-                if c.suit == suit:
-                    cards[suit].append(c.value.value.name.title())
+            cards[suit] = [_CARD_BY_ID[i].value.value.name.title() for i in iter_ids(self._set.suit_mask(suit))]
 
         return "/".join(["{} of {}".format(",".join(cards[suit]), suit.name.title()) for suit in cards])
 
     def __repr__(self):
-        return "Stack(cards=%r)" % self._cards
+        return "Stack(cards=%r)" % self.cards
 
     def __setitem__(self, indice, value):
-        self._cards[indice] = value
+        self._set.remove(self.cards[indice].id)
+        self._set.add(value.id)
 
     def __len__(self):
-        return len(self._cards)
+        return popcount(self._set.mask)
 
     def __delitem__(self, index):
-        del self._cards[index]
+        self._set.remove(self.cards[index].id)
 
     def __getitem__(self, key):
         self_len = len(self)
@@ -194,39 +208,28 @@ class Deck:
                 key += self_len
             if key >= self_len:
                 raise IndexError("The index ({}) is out of range.".format(key))
-            return self._cards[key]
+            return self.cards[key]
         else:
             raise TypeError("Invalid argument type.")
 
+    def __iter__(self):
+        return iter(self.cards)
+
     def __contains__(self, card):
-        return id(card) in [id(x) for x in self._cards]
+        return isinstance(card, Card) and card.id in self._set
 
     def __ne__(self, other):
-        if isinstance(other, Deck):
-            ocards = other._cards
-        elif isinstance(other, list):
-            ocards = other
-        else:
-            return True
-        if len(self._cards) == len(ocards):
-            for i, card in enumerate(self._cards):
-                if card != ocards[i]:
-                    return True
-            return False
-        else:
-            return True
+        return not self == other
 
     def __eq__(self, other):
         if isinstance(other, Deck):
-            ocards = other._cards
+            return self._set.mask == other._set.mask
         elif isinstance(other, list):
-            ocards = other
-        else:
-            return False
-        if len(self._cards) == len(ocards):
-            for i, card in enumerate(self._cards):
-                if card != ocards[i]:
-                    return False
-            return True
+            return len(other) == len(self) and all(c == o for c, o in zip(self.cards, other))
         else:
             return False
+
+
+_CARD_BY_ID = CARDS
+ACE_TEN_MASK = mask_of(c.id for c in _CARD_BY_ID if c.value in (VALUES.Ace, VALUES.Ten))
+FIVE_MASK = mask_of(c.id for c in _CARD_BY_ID if c.value == VALUES.Five)
@@ -0,0 +1,224 @@
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dealer.Card import CARD_SUITS
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of, popcount
+from dealer.Simulator import RoundState, NO_CARD, play_tricks
+from dealer.Solver import DoubleDummySolver, PLAYING_SUITS, TRICK_POINTS, ordered_ids, solve_state
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS, PLAYER_INITIAL_CARDS
+
+# the suits of a canonical position: the hokm of NORMAL is always spades, the other suits are given in the order of
+# their signatures
+CANONICAL_HOKM = SUITS.SPADES
+NORMAL_SUITS = (SUITS.DIAMONDS, SUITS.CLUBS, SUITS.HEARTS)
+# CANONICAL_ORDERS[game_mode][suit] the card ids of suit from the highest to the lowest rank, the k-th highest
+# remaining card of a suit takes the k-th id of its canonical suit
+CANONICAL_ORDERS = tuple(None if mode == 0 else {suit: ordered_ids(SUIT_MASKS[suit], GAMEMODE(mode))
+                                                 for suit in PLAYING_SUITS} for mode in range(len(GAMEMODE) + 1))
+# an underlying solver drops its transposition table past this many positions
+MAX_TABLE_SIZE = 1 << 20
+# the entries written to the disk layer at once
+FLUSH_SIZE = 1024
+
+_SHARED = {}
+
+
+def canonical_position(game_mode: GAMEMODE, hokm_suit: SUITS, hands: Sequence[int], leader: int,
+                       trick: Sequence[int] = (), lead_suit: SUITS = SUITS.NOSUIT) -> Tuple[int, List[int], List[int],
+                                                                                             SUITS]:
+    """
+    Positions which only differ by the seat of the leader, by the cards already played between the remaining ones of
+    a suit or by a renaming of the suits which are not hokm share a single canonical position. The leader goes to
+    seat 0, the remaining cards of a suit are renamed to the highest of their canonical suit and the suits are sorted
+    by where their cards are
+    :param trick: the cards of the current trick in the order they were played from leader, as DoubleDummySolver.solve
+    :return: the key of the position, and its hands, trick and lead suit
+    """
+    owner = {}
+    for seat, hand in enumerate(hands):
+        rotated = (seat - leader) % NUM_PLAYERS
+        for card in ids_of(hand):
+            owner[card] = rotated
+    # the cards of the trick are told apart from the hands by their position in it
+    for k, card in enumerate(trick):
+        owner[card] = NUM_PLAYERS + k
+    alive = hands[0] | hands[1] | hands[2] | hands[3] | mask_of(trick)
+    if trick:
+        lead_suit = CARD_SUITS[trick[0]]
+    signatures = {suit: (suit == lead_suit, tuple(owner[card] for card in ordered_ids(alive & SUIT_MASKS[suit],
+                                                                                      game_mode)))
+                  for suit in PLAYING_SUITS}
+    if game_mode == GAMEMODE.NORMAL:
+        suits = dict(zip(NORMAL_SUITS, sorted((s for s in PLAYING_SUITS if s != hokm_suit), key=signatures.get)))
+        suits[CANONICAL_HOKM] = hokm_suit
+    else:
+        suits = dict(zip(PLAYING_SUITS, sorted(PLAYING_SUITS, key=signatures.get)))
+
+    key = game_mode
+    canonical_hands = [0] * NUM_PLAYERS
+    canonical_trick = [NO_CARD] * len(trick)
+    canonical_lead = SUITS.NOSUIT
+    for canonical_suit in PLAYING_SUITS:
+        leads, owners = signatures[suits[canonical_suit]]
+        if leads:
+            canonical_lead = canonical_suit
+        key = (key << 1 | leads) << 4 | len(owners)
+        for seat, card in zip(owners, CANONICAL_ORDERS[game_mode][canonical_suit]):
+            key = key << 3 | seat
+            if seat < NUM_PLAYERS:
+                canonical_hands[seat] |= 1 << card
+            else:
+                canonical_trick[seat - NUM_PLAYERS] = card
+    return key, canonical_hands, canonical_trick, canonical_lead
+
+
+class CachedSolver(DoubleDummySolver):
+    """
+    DoubleDummySolver of one game mode and hokm whose exact results come from an EndgameCache, card_values and
+    best_card included
+    """
+
+    def __init__(self, cache, game_mode: GAMEMODE, hokm_suit: SUITS):
+        super().__init__(game_mode, hokm_suit)
+        self.cache = cache
+
+    def solve(self, hands: Sequence[int], leader: int, trick: Sequence[int] = (), lead_suit: SUITS = SUITS.NOSUIT,
+              alpha: int = None, beta: int = None) -> int:
+        if alpha is not None or beta is not None:
+            return super().solve(hands, leader, trick, lead_suit, alpha, beta)
+        return self.cache.solve(self.game_mode, self.hokm_suit, hands, leader, trick, lead_suit)
+
+
+class EndgameCache:
+    """
+    The double dummy results of end positions by their canonical_position key, the most recently used capacity of them
+    in memory and optionally all of them in an sqlite file shared by runs and processes. rollout plays a round with
+    policies until max_tricks are left and looks the rest up, so the last tricks of the rollouts of a search become a
+    lookup once the same endings have been seen
+    """
+
+    def __init__(self, max_tricks: int = 4, capacity: int = 1 << 18, path: str = None):
+        self.max_tricks = max_tricks
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.solvers = {}
+        self.canonical_solvers = {}
+        self.db = None
+        self.pending = []
+        if path is not None:
+            self.db = sqlite3.connect(path, timeout=60)
+            self.db.execute("CREATE TABLE IF NOT EXISTS endgames (key BLOB PRIMARY KEY, points INTEGER NOT NULL)")
+            self.db.commit()
+        # stat variables
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def solver(self, game_mode: GAMEMODE, hokm_suit: SUITS) -> CachedSolver:
+        solver = self.solvers.get((game_mode, hokm_suit))
+        if solver is None:
+            solver = self.solvers[game_mode, hokm_suit] = CachedSolver(self, game_mode, hokm_suit)
+        return solver
+
+    def solve(self, game_mode: GAMEMODE, hokm_suit: SUITS, hands: Sequence[int], leader: int,
+              trick: Sequence[int] = (), lead_suit: SUITS = SUITS.NOSUIT) -> int:
+        """
+        same as DoubleDummySolver(game_mode, hokm_suit).solve
+        :return: the points the team of seats 0 and 2 takes from the remaining tricks
+        """
+        key, canonical_hands, canonical_trick, canonical_lead = canonical_position(game_mode, hokm_suit, hands,
+                                                                                   leader, trick, lead_suit)
+        points = self.lookup(key)
+        if points is None:
+            solver = self.canonical_solvers.get(game_mode)
+            if solver is None or len(solver.table) > MAX_TABLE_SIZE:
+                solver = self.canonical_solvers[game_mode] = DoubleDummySolver(game_mode, CANONICAL_HOKM)
+            points = solver.solve(canonical_hands, 0, canonical_trick, canonical_lead)
+            self.store(key, points)
+        # the canonical leader sits at seat 0
+        if leader % 2:
+            return (popcount(hands[leader]) + (1 if trick else 0)) * TRICK_POINTS - points
+        return points
+
+    def rollout(self, state: RoundState, policies) -> Tuple[int, int]:
+        """
+        plays state with policies until max_tricks are left, the state is changed
+        :return: the points of both teams at the end of the round, with the last tricks played double dummy
+        """
+        play_tricks(state, policies, PLAYER_INITIAL_CARDS - self.max_tricks)
+        if state.is_over:
+            return state.team_points()
+        return solve_state(state, self.solver(state.game_mode, state.hokm_suit))
+
+    def lookup(self, key: int) -> Optional[int]:
+        points = self.entries.get(key)
+        if points is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return points
+        if self.db is not None:
+            row = self.db.execute("SELECT points FROM endgames WHERE key = ?", (self.blob(key),)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                self.remember(key, row[0])
+                return row[0]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, points: int):
+        self.remember(key, points)
+        if self.db is not None:
+            self.pending.append((self.blob(key), points))
+            if len(self.pending) >= FLUSH_SIZE:
+                self.flush()
+
+    def remember(self, key: int, points: int):
+        self.entries[key] = points
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def blob(key: int) -> bytes:
+        return key.to_bytes((key.bit_length() + 7) // 8, "big")
+
+    def flush(self):
+        if self.db is not None and self.pending:
+            self.db.executemany("INSERT OR IGNORE INTO endgames VALUES (?, ?)", self.pending)
+            self.db.commit()
+            self.pending = []
+
+    def close(self):
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+def shared_cache(max_tricks: int, path: str = None) -> EndgameCache:
+    """
+    the cache of this process for max_tricks and path, e.g. of a worker of a search player
+    """
+    cache = _SHARED.get((max_tricks, path))
+    if cache is None:
+        cache = _SHARED[max_tricks, path] = EndgameCache(max_tricks, path=path)
+    return cache
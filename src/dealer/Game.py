@@ -2,9 +2,11 @@ from collections import deque
 from typing import Tuple, List
 
 from dealer.Card import Card
+from dealer.DealCorpus import DealCorpus
 from dealer.Deck import Deck
-from dealer.Logging import Logging
-from dealer.Utils import get_round_payoff
+from dealer.GameRecord import GameRecordWriter
+from dealer.Logging import Logging, LEVEL
+from dealer.Utils import close_pools, get_round_payoff, table_rngs
 from players.Enum import NUM_PLAYERS, SUITS, colors
 from players.IntelligentPlayer import PPOPlayer, IntelligentPlayer
 from players.Player import Player
@@ -15,29 +17,43 @@ training = True
 
 class Game:
 
-    def __init__(self, players: List[Player]):
+    def __init__(self, players: List[Player], seed=None, deals: DealCorpus = None,
+                 recorder: GameRecordWriter = None):
+        """
+        :param seed: seed of the table random streams, a run with the same seed and players is replayed exactly
+        :param deals: pre-generated deals to play in order instead of shuffling the deck
+        :param recorder: appends every round played to a record file
+        """
         self.game_end = 1165
         self.random_play = 0
         self.limit_game_number = 10000
         self.benchmark_rounds = 8000
         self.french_deck = Deck()
+        self.deals = deals
+        self.recorder = recorder
         self.players = players
+        self.rng, player_rngs = table_rngs(seed)
+        for player, rng in zip(self.players, player_rngs):
+            player.set_rng(rng)
         self.player_id_receiving_first_hand = 0
         self.team_1_score = 0
         self.team_2_score = 0
+        self.round_counter = 1
+        self.round_hands_played = []
 
     @staticmethod
     def check_card_validity(player: Player, card: Card, suit: SUITS):
         if suit == SUITS.NOSUIT or card.suit == suit:
             return True
-        for c in player.deck.cards:
-            if c.suit == suit:
-                return False
-        return True
+        return not player.deck.has_suit(suit)
 
     def play_a_round(self) -> Tuple[int, int]:
         # the last three number shows game mode, trump_suit, current_suit
-        d1, d2, d3, middle_deck, d4 = self.french_deck.deal()
+        deal = self.deals.next_deal() if self.deals is not None else None
+        d1, d2, d3, middle_deck, d4 = self.french_deck.deal(self.rng, deal)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.begin_round((d1, d2, d3, middle_deck, d4), self.player_id_receiving_first_hand)
         decks = deque([d1, d2, d3, d4])
         # give the first deck to the next player
         for _ in range(self.player_id_receiving_first_hand):
@@ -76,6 +92,9 @@ class Game:
             self.players[i].hokm_has_been_determined(game_mode, hokm_suit, last_bets[-1])
         for i in range(NUM_PLAYERS):
             self.players[i].set_hokm_and_game_mode(game_mode, hokm_suit, hakem.player_id)
+        if recorder is not None:
+            recorder.set_bids(last_bets, self.hakem_id)
+            recorder.set_hokm(game_mode, hokm_suit, hakem.saved_deck.mask)
 
         # card play phase
         hands_played = []
@@ -83,7 +102,7 @@ class Game:
         current_suit = hokm_suit
         for i in range(12):
             current_player_id = last_winner_id
-            current_hand = []
+            current_hand = [None] * NUM_PLAYERS
             winner_card = None
             Logging.debug("="*40)
 
@@ -96,10 +115,9 @@ class Game:
                 if not valid_card:
                     raise RuntimeError("Player {} played invalid card {}".format(current_player_id, played_card))
 
-                for j in range(NUM_PLAYERS):
-                    self.players[j].card_has_been_played(current_hand, current_suit)
-
-                current_hand.append(played_card)
+                current_hand[current_player_id] = played_card
+                if recorder is not None:
+                    recorder.play(played_card.id)
                 if winner_card:
                     if Card.compare(winner_card, played_card, game_mode, hokm_suit, current_suit) < 0:
                         last_winner_id = current_player_id
@@ -109,13 +127,17 @@ class Game:
                     winner_card = played_card
                     current_suit = played_card.suit
 
-                if played_card.suit == hokm_suit:
-                    color = colors.RED
-                elif played_card.suit == current_suit:
-                    color = colors.GREEN
-                else:
-                    color = colors.BROWN
-                Logging.debug(f"{color}Player{current_player_id}-> {played_card}{colors.ENDC}")
+                for j in range(NUM_PLAYERS):
+                    self.players[j].card_has_been_played(current_hand, current_suit)
+
+                if Logging.enabled(LEVEL.DEBUG):
+                    if played_card.suit == hokm_suit:
+                        color = colors.RED
+                    elif played_card.suit == current_suit:
+                        color = colors.GREEN
+                    else:
+                        color = colors.BROWN
+                    Logging.debug(f"{color}Player{current_player_id}-> {played_card}{colors.ENDC}")
 
                 current_player_id = (current_player_id + 1) % 4
 
@@ -126,6 +148,7 @@ class Game:
                 self.players[k].end_trick(current_hand, last_winner_id)
 
         self.player_id_receiving_first_hand = (self.player_id_receiving_first_hand + 1) % 4
+        self.round_hands_played = hands_played
 
         self.french_deck = self.players[0].saved_deck + self.players[2].saved_deck + \
             self.players[1].saved_deck + self.players[3].saved_deck
@@ -137,6 +160,8 @@ class Game:
         final_bet = last_bets[-1]
         for i in range(4):
             self.players[i].end_round(self.hakem_id, team1_score, team2_score)
+        if self.recorder is not None:
+            self.recorder.end_round(team1_score, team2_score)
 
         final_score1, final_score2, reward = get_round_payoff(self.hakem_id, final_bet.bet, team1_score, team2_score)
         return final_score1, final_score2
@@ -148,8 +173,10 @@ class Game:
             if not training or self.round_counter > self.benchmark_rounds:
                 self.team_1_score += s1
                 self.team_2_score += s2
-            Logging.info("{}Round {:04d}: H:{} Team 1 score = {:04d} ({:04d}) and Team 2 score = {:04d} ({:04d}){}".format(
-                colors.BLUE, self.round_counter, self.hakem_id, s1, self.team_1_score, s2, self.team_2_score, colors.ENDC))
+            Logging.round_summary(
+                lambda: "{}Round {:04d}: H:{} Team 1 score = {:04d} ({:04d}) and Team 2 score = {:04d} ({:04d}){}".format(
+                    colors.BLUE, self.round_counter, self.hakem_id, s1, self.team_1_score, s2, self.team_2_score,
+                    colors.ENDC))
             self.round_counter += 1
         self.finish_game()
 
@@ -158,6 +185,7 @@ class Game:
         Logging.important("{}Final Scores = Team 1 score = {} and Team 2 score = {}{}".format(
             colors.CYAN, self.team_1_score, self.team_2_score, colors.ENDC))
         self.players[0].print_game_stat()
+        close_pools(self.players)
 
     def check_game_finished(self):
         if self.limit_game_number > 0:
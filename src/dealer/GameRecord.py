@@ -0,0 +1,177 @@
+import os
+from typing import Iterator, List, Sequence
+
+import numpy as np
+
+from dealer.CardSet import ids_of, mask_of
+from dealer.DealCorpus import HAND_SLICES, MIDDLE_SLICE
+from players.Enum import DECK_SIZE, PLAYER_INITIAL_CARDS, NUM_PLAYERS
+
+MAGIC = b"SHLMREC1"
+MAX_BIDS = 6
+# a round in 123 bytes, the deal is in Deck.deal order: three hands, the middle deck and the fourth hand
+RECORD_DTYPE = np.dtype([
+    ("deal", np.uint8, DECK_SIZE),
+    ("first_hand", np.uint8),
+    ("hakem", np.uint8),
+    ("game_mode", np.uint8),
+    ("hokm_suit", np.uint8),
+    ("num_bids", np.uint8),
+    # the last MAX_BIDS raises of the bidding, the final one is the bet of the hakem
+    ("bid_seats", np.uint8, MAX_BIDS),
+    ("bid_values", np.uint8, MAX_BIDS),
+    ("discard", np.uint8, 4),
+    # card ids in the order they were played, the first one is led by the hakem
+    ("plays", np.uint8, PLAYER_INITIAL_CARDS * NUM_PLAYERS),
+    ("team_points", np.uint8, 2),
+])
+HEADER = MAGIC + np.array([RECORD_DTYPE.itemsize, 0], dtype=np.uint32).tobytes()
+
+
+class GameRecordWriter:
+    """
+    Appends the rounds played by a Game or ShelemGame to a record file. Rounds are gathered in a numpy buffer and
+    written buffer_size at a time, close (or the with block) writes the rest
+    """
+
+    def __init__(self, path: str, buffer_size: int = 4096):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new_file:
+            self.file.write(HEADER)
+        self.buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self.size = 0
+        self.written = 0
+        self.plays = []
+
+    def begin_round(self, decks: Sequence, first_hand: int):
+        """
+        :param decks: the five decks returned by Deck.deal
+        """
+        row = self.buffer[self.size]
+        row["deal"] = [card_id for deck in decks for card_id in ids_of(deck.mask)]
+        row["first_hand"] = first_hand
+        self.plays = []
+
+    def set_bids(self, bets: List, hakem: int):
+        """
+        :param bets: the raises of the round as Player.Bet
+        """
+        row = self.buffer[self.size]
+        row["hakem"] = hakem
+        row["num_bids"] = min(len(bets), 255)
+        last_bets = bets[-MAX_BIDS:]
+        row["bid_seats"][:len(last_bets)] = [bet.player_id for bet in last_bets]
+        row["bid_values"][:len(last_bets)] = [bet.bet for bet in last_bets]
+
+    def set_hokm(self, game_mode: int, hokm_suit: int, discard_mask: int):
+        row = self.buffer[self.size]
+        row["game_mode"] = game_mode
+        row["hokm_suit"] = hokm_suit
+        row["discard"] = ids_of(discard_mask)
+
+    def play(self, card_id: int):
+        self.plays.append(card_id)
+
+    def end_round(self, team1_points: int, team2_points: int):
+        row = self.buffer[self.size]
+        row["plays"] = self.plays
+        row["team_points"] = team1_points, team2_points
+        self.size += 1
+        if self.size == len(self.buffer):
+            self.flush()
+        self.buffer[self.size] = 0
+
+    def append_records(self, records: np.ndarray):
+        """
+        appends records built elsewhere, e.g. by records_of_results
+        """
+        self.flush()
+        self.file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+        self.written += len(records)
+
+    def flush(self):
+        self.file.write(self.buffer[:self.size].tobytes())
+        self.file.flush()
+        self.written += self.size
+        self.size = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def records_of_results(results: Sequence) -> np.ndarray:
+    """
+    :param results: Simulator.RoundResult of finished rounds
+    :return: the records of the rounds
+    """
+    records = np.zeros(len(results), dtype=RECORD_DTYPE)
+    for row, result in zip(records, results):
+        row["deal"] = result.deal
+        row["first_hand"] = result.first_hand
+        row["hakem"] = result.hakem
+        row["game_mode"] = result.game_mode
+        row["hokm_suit"] = result.hokm_suit
+        row["num_bids"] = min(len(result.bets), 255)
+        last_bets = result.bets[-MAX_BIDS:]
+        row["bid_seats"][:len(last_bets)] = [seat for seat, bet in last_bets]
+        row["bid_values"][:len(last_bets)] = [bet for seat, bet in last_bets]
+        row["discard"] = ids_of(result.discard)
+        leaders = [result.hakem] + result.trick_winners[:-1]
+        row["plays"] = [trick[(leader + k) % NUM_PLAYERS] for leader, trick in zip(leaders, result.tricks)
+                        for k in range(NUM_PLAYERS)]
+        row["team_points"] = result.team_points
+    return records
+
+
+def starting_hands(record) -> List[int]:
+    """
+    :return: the card-set mask of every seat when the hakem leads the first trick, after the widowing
+    """
+    hands = [0] * NUM_PLAYERS
+    deal = [int(card_id) for card_id in record["deal"]]
+    first_hand = int(record["first_hand"])
+    for deck, hand_slice in enumerate(HAND_SLICES):
+        hands[(deck - first_hand) % NUM_PLAYERS] = mask_of(deal[hand_slice])
+    hakem = int(record["hakem"])
+    hands[hakem] |= mask_of(deal[MIDDLE_SLICE])
+    hands[hakem] &= ~mask_of(int(card_id) for card_id in record["discard"])
+    return hands
+
+
+class GameRecordReader:
+    """
+    memory mapped view of a record file, the records are read from the page cache only when they are used
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            header = f.read(len(HEADER))
+        if header != HEADER:
+            raise ValueError("{} is not a game record file of this version".format(path))
+        if os.path.getsize(path) == len(HEADER):
+            # an empty file cannot be mapped
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        else:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=len(HEADER))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def batches(self, batch_size: int = 65536) -> Iterator[np.ndarray]:
+        """
+        yields consecutive views of batch_size records, e.g. batch["plays"] is a (batch_size, 48) uint8 array
+        """
+        for start in range(0, len(self.records), batch_size):
+            yield self.records[start:start + batch_size]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, TextIO
 
 from dealer.Card import Card
 from dealer.Deck import Hand, Deck
@@ -6,8 +6,46 @@ from players.Enum import GAMEMODE, SUITS
 from players.Player import Bet
 
 
+class LEVEL:
+    """
+    Logging.verbose thresholds, a message is written when verbose >= its level
+    """
+    OFF = 0
+    ERROR = 1
+    IMPORTANT = 2
+    INFO = 3
+    DEBUG = 4
+
+
+class BufferedSink:
+    """
+    collects messages in memory and writes them to a stream in one call every capacity messages, or only on
+    flush when capacity is None. A stream of None keeps every message in lines, with a capacity of None
+    """
+
+    def __init__(self, stream: Optional[TextIO], capacity: Optional[int] = 1000):
+        if stream is None and capacity is not None:
+            raise ValueError("a BufferedSink without a stream keeps every message, its capacity must be None")
+        self.stream = stream
+        self.capacity = capacity
+        self.lines = []
+
+    def write(self, message: str):
+        self.lines.append(message)
+        if self.capacity is not None and len(self.lines) >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        if self.stream is not None and self.lines:
+            self.stream.write("\n".join(self.lines) + "\n")
+            self.stream.flush()
+            del self.lines[:]
+
+
 class Logging:
-    verbose = 2
+    verbose = LEVEL.IMPORTANT
+    sink = None
+    summary_sink = None
 
     def __init__(self, verbose):
         self.hands = []
@@ -21,32 +59,79 @@ class Logging:
         self.hands.append(Hand(player_id, hand))
 
     def log_summery(self):
-        print("Middle Deck:\n{}".format("\t".join(["   [{:14s}]    ".format(str(x)) for x in self.middle_deck.cards])))
-        print("Betting Info:\tPlayer Id: {}\tScore: {}".format(self.bet.player_id, self.bet.bet))
-        print("Hokm: {}\t\tGame Mode: {}".format(self.hokm_suit.name.title(), self.game_mode.name.title()))
-        print("Hakem Saved Deck:\n{}\n\n".format("\t".join(["   [{:14s}]    ".format(str(x)) for x in self.saved_hand.cards])))
+        self.write("Middle Deck:\n{}".format("\t".join(["   [{:14s}]    ".format(str(x)) for x in self.middle_deck.cards])))
+        self.write("Betting Info:\tPlayer Id: {}\tScore: {}".format(self.bet.player_id, self.bet.bet))
+        self.write("Hokm: {}\t\tGame Mode: {}".format(self.hokm_suit.name.title(), self.game_mode.name.title()))
+        self.write("Hakem Saved Deck:\n{}\n\n".format("\t".join(["   [{:14s}]    ".format(str(x)) for x in self.saved_hand.cards])))
         for hand in self.hands:
-            print(hand)
+            self.write(hand)
 
     @classmethod
-    def debug(cls, message):
-        if cls.verbose > 3:
+    def enabled(cls, level: int) -> bool:
+        """
+        checked before building a message which is expensive to render, e.g. inside the trick loop
+        """
+        return cls.verbose >= level
+
+    @classmethod
+    def disable(cls):
+        cls.verbose = LEVEL.OFF
+
+    @classmethod
+    def set_sink(cls, sink=None, summary_sink=None):
+        """
+        :param sink: receives every enabled message instead of stdout, any object with write(message)
+        :param summary_sink: receives the per-round summaries, which go to sink at INFO level when it is None
+        """
+        cls.sink = sink
+        cls.summary_sink = summary_sink
+
+    @classmethod
+    def write(cls, message):
+        """
+        :param message: a string or an object to be converted by str, or a callable returning one
+        """
+        if callable(message):
+            message = message()
+        if cls.sink is None:
             print(message)
+        else:
+            cls.sink.write(str(message))
+
+    @classmethod
+    def log(cls, level: int, message):
+        if cls.verbose >= level:
+            cls.write(message)
+
+    @classmethod
+    def debug(cls, message):
+        if cls.verbose >= LEVEL.DEBUG:
+            cls.write(message)
 
     @classmethod
     def info(cls, message):
-        if cls.verbose > 2:
-            print(message)
+        if cls.verbose >= LEVEL.INFO:
+            cls.write(message)
 
     @classmethod
     def important(cls, message):
-        if cls.verbose > 1:
-            print(message)
+        if cls.verbose >= LEVEL.IMPORTANT:
+            cls.write(message)
 
     @classmethod
     def error(cls, message):
-        if cls.verbose > 0:
-            print(message)
+        if cls.verbose >= LEVEL.ERROR:
+            cls.write(message)
+
+    @classmethod
+    def round_summary(cls, message):
+        """
+        the line logged once per round, kept even when the console is quiet if a summary sink is set
+        """
+        if cls.summary_sink is not None:
+            cls.summary_sink.write(message() if callable(message) else str(message))
+        else:
+            cls.info(message)
 
     def log_bet(self, bet: Bet):
         self.bet = bet
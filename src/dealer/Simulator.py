@@ -0,0 +1,224 @@
+from typing import List, Tuple, Sequence
+
+from numpy.random import Generator
+
+from dealer.Card import CARD_SUITS
+from dealer.CardSet import SUIT_MASKS, mask_of, popcount
+from dealer.Trick import TRICK_STRENGTH
+from dealer.Utils import get_round_payoff, table_rngs
+from players.Enum import NUM_PLAYERS, PLAYER_INITIAL_CARDS, SUITS, GAMEMODE, DECK_SIZE
+
+NO_CARD = -1
+
+
+class RoundState:
+    """
+    Whole state of a round in flat integers: hands are card-set masks and the current trick is indexed by seat
+    """
+    __slots__ = ("rng", "rngs", "deal", "first_hand", "hands", "saved", "played", "widow", "discard", "bets", "hakem",
+                 "game_mode", "hokm_suit", "trick", "trick_leader", "trick_size", "current_player", "current_suit",
+                 "winner", "tricks", "trick_winners", "zobrist")
+
+    def __init__(self, rng: Generator = None, rngs: List[Generator] = None):
+        """
+        :param rng: stream of the deck
+        :param rngs: stream of each seat, used by the policies
+        """
+        self.rng = rng
+        self.rngs = rngs
+        self.deal = None
+        self.first_hand = 0
+        self.hands = [0] * NUM_PLAYERS
+        self.saved = [0] * NUM_PLAYERS
+        self.played = 0
+        self.widow = 0
+        self.discard = 0
+        self.bets = []
+        self.hakem = 0
+        self.game_mode = GAMEMODE.NORMAL
+        self.hokm_suit = SUITS.NOSUIT
+        self.trick = [NO_CARD] * NUM_PLAYERS
+        self.trick_leader = 0
+        self.trick_size = 0
+        self.current_player = 0
+        # suit handed to the player about to play: hokm for the very first lead, NOSUIT for other leads
+        self.current_suit = SUITS.NOSUIT
+        self.winner = 0
+        self.tricks = []
+        self.trick_winners = []
+        # a Zobrist.ZobristHash kept up to date by the functions below when it is set before deal_round
+        self.zobrist = None
+
+    def copy(self):
+        state = RoundState(self.rng, self.rngs)
+        for slot in self.__slots__:
+            value = getattr(self, slot)
+            setattr(state, slot, list(value) if isinstance(value, list) and slot != "rngs" else value)
+        if self.zobrist is not None:
+            state.zobrist = self.zobrist.copy()
+        return state
+
+    @property
+    def trick_number(self) -> int:
+        return len(self.tricks)
+
+    @property
+    def is_over(self) -> bool:
+        return len(self.tricks) == PLAYER_INITIAL_CARDS
+
+    def legal_mask(self, seat: int) -> int:
+        hand = self.hands[seat]
+        return hand & SUIT_MASKS[self.current_suit] or hand
+
+    def team_points(self) -> Tuple[int, int]:
+        """
+        same as Deck.get_deck_score of each team saved cards
+        """
+        return popcount(self.saved[0] | self.saved[2]) // 4 * 5, popcount(self.saved[1] | self.saved[3]) // 4 * 5
+
+
+class RoundResult:
+    def __init__(self, state: RoundState):
+        self.deal = state.deal
+        self.first_hand = state.first_hand
+        self.bets = state.bets
+        self.discard = state.discard
+        self.hakem = state.hakem
+        self.bet = state.bets[-1][1]
+        self.game_mode = state.game_mode
+        self.hokm_suit = state.hokm_suit
+        self.tricks = state.tricks
+        self.trick_winners = state.trick_winners
+        self.team_points = state.team_points()
+        self.scores = get_round_payoff(self.hakem, self.bet, *self.team_points)[:2]
+
+    def __str__(self):
+        return "RoundResult(hakem={}, bet={}, points={}, scores={})".format(
+            self.hakem, self.bet, self.team_points, self.scores)
+
+
+def deal_round(state: RoundState, deal: Sequence[int], first_hand: int = 0):
+    """
+    splits a 52-card permutation the way Deck.deal does and gives the first deck to first_hand
+    """
+    state.deal = deal
+    state.first_hand = first_hand
+    decks = [deal[0:12], deal[12:24], deal[24:36], deal[40:52]]
+    for seat in range(NUM_PLAYERS):
+        state.hands[seat] = mask_of(decks[(seat + first_hand) % NUM_PLAYERS])
+    state.widow = mask_of(deal[36:40])
+    if state.zobrist is not None:
+        state.zobrist.deal(state.hands, state.widow, first_hand)
+
+
+def run_bidding(state: RoundState, policies):
+    """
+    the betting loop of Game.play_a_round on seats instead of players
+    """
+    betting_seats = [(state.first_hand + i) % NUM_PLAYERS for i in range(NUM_PLAYERS)]
+    initially_passed_count = 0
+    betting_rounds = 0
+    bets = state.bets
+    while len(betting_seats) > 1:
+        seat = betting_seats.pop(0)
+        bet = policies[seat].make_bet(state, seat, bets)
+        if len(bets) == 0 or bet > bets[-1][1]:
+            bets.append((seat, bet))
+            betting_seats.append(seat)
+            if state.zobrist is not None:
+                state.zobrist.bid(seat, bet)
+        elif bet == 0 and 3 > betting_rounds == initially_passed_count:
+            initially_passed_count += 1
+            betting_rounds += 1
+    state.hakem = betting_seats[0]
+
+
+def run_widowing(state: RoundState, policies):
+    hakem = state.hakem
+    policy = policies[hakem]
+    state.game_mode = policy.decide_game_mode(state, hakem)
+    state.hands[hakem] |= state.widow
+    discard, state.hokm_suit = policy.discard_cards(state, hakem)
+    if popcount(discard) != 4 or discard & ~state.hands[hakem]:
+        raise RuntimeError("Player {} discarded invalid cards".format(hakem))
+    state.hands[hakem] ^= discard
+    state.saved[hakem] |= discard
+    state.discard = discard
+    state.trick_leader = state.current_player = state.winner = hakem
+    state.current_suit = state.hokm_suit
+    if state.zobrist is not None:
+        state.zobrist.take_widow(hakem, state.widow)
+        state.zobrist.discard_cards(hakem, discard)
+        state.zobrist.set_trump(state.game_mode, state.hokm_suit, hakem)
+
+
+def play_card(state: RoundState, card: int):
+    """
+    plays card for state.current_player and closes the trick after its fourth card, one step of play_tricks
+    """
+    seat = state.current_player
+    bit = 1 << card
+    if not state.legal_mask(seat) & bit:
+        raise RuntimeError("Player {} played invalid card {}".format(seat, card))
+    trick = state.trick
+    state.hands[seat] ^= bit
+    trick[seat] = card
+    if state.zobrist is not None:
+        state.zobrist.play_card(seat, card)
+    if state.trick_size == 0:
+        state.current_suit = CARD_SUITS[card]
+        state.winner = seat
+    else:
+        strength = TRICK_STRENGTH[state.game_mode][state.hokm_suit][CARD_SUITS[trick[state.trick_leader]]]
+        if strength[card] > strength[trick[state.winner]]:
+            state.winner = seat
+    state.trick_size += 1
+    if state.trick_size < NUM_PLAYERS:
+        state.current_player = (seat + 1) % NUM_PLAYERS
+        return
+    winner = state.winner
+    trick_mask = mask_of(trick)
+    if state.zobrist is not None:
+        state.zobrist.end_trick(trick, state.trick_leader, winner)
+    state.saved[winner] |= trick_mask
+    state.played |= trick_mask
+    state.tricks.append(tuple(trick))
+    state.trick_winners.append(winner)
+    trick[:] = [NO_CARD] * NUM_PLAYERS
+    state.trick_size = 0
+    state.trick_leader = state.current_player = winner
+    state.current_suit = SUITS.NOSUIT
+
+
+def play_tricks(state: RoundState, policies, until_trick: int = PLAYER_INITIAL_CARDS):
+    """
+    plays the remaining cards of a round from any point of the card play phase
+    :param until_trick: stops once this many tricks are done instead, e.g. to solve the last ones
+    """
+    while len(state.tricks) < until_trick:
+        seat = state.current_player
+        play_card(state, policies[seat].play_card(state, seat))
+
+
+def simulate_round(policies, seed=None, first_hand: int = 0, rngs: Tuple[Generator, List[Generator]] = None,
+                   deal: Sequence[int] = None) -> RoundResult:
+    """
+    Plays a whole round without Player objects, callbacks or logging. For the same seed and policies matching the
+    players it gives the same scores and tricks as the first Game(players, seed).play_a_round()
+    :param policies: one Policy per seat
+    :param first_hand: the player receiving the first hand, Game.player_id_receiving_first_hand
+    :param rngs: the table streams of Utils.table_rngs to continue instead of seeding new ones
+    :param deal: a permutation of the card ids, e.g. a row of a DealCorpus, to play instead of shuffling
+    """
+    deck_rng, seat_rngs = rngs or table_rngs(seed)
+    state = RoundState(deck_rng, seat_rngs)
+    if deal is None:
+        deal = list(range(DECK_SIZE))
+        deck_rng.shuffle(deal)
+    else:
+        deal = [int(i) for i in deal]
+    deal_round(state, deal, first_hand)
+    run_bidding(state, policies)
+    run_widowing(state, policies)
+    play_tricks(state, policies)
+    return RoundResult(state)
@@ -0,0 +1,417 @@
+from typing import Dict, List, Sequence, Tuple
+
+from dealer.Card import RANK_TABLE, CARD_SUITS
+from dealer.CardSet import SUIT_MASKS, highest_id, ids_of, mask_of, popcount
+from dealer.Simulator import RoundState, NO_CARD
+from dealer.Trick import TRICK_STRENGTH
+from players.Enum import NUM_PLAYERS, SUITS, GAMEMODE, DECK_SIZE, NUM_SUITS
+
+# every trick is worth the same, see Deck.get_deck_score
+TRICK_POINTS = 5
+PLAYING_SUITS = (SUITS.DIAMONDS, SUITS.CLUBS, SUITS.HEARTS, SUITS.SPADES)
+
+# the lowest card id of the aces
+ACE_ID = DECK_SIZE - NUM_SUITS
+# the last tricks are searched without the transposition table, they are cheaper to search than to look up
+SHALLOW_TRICKS = 2
+# EXACT, LOWER and UPPER bounds of the transposition table entries
+EXACT, LOWER, UPPER = range(3)
+
+
+def ordered_ids(mask: int, game_mode: GAMEMODE) -> List[int]:
+    """
+    :return: the card ids of a mask of one suit from the highest to the lowest rank of game_mode
+    """
+    card_ids = ids_of(mask)
+    if game_mode == GAMEMODE.NORMAL or game_mode == GAMEMODE.SARAS:
+        card_ids.reverse()
+    elif game_mode == GAMEMODE.ACE_NARAS and card_ids and card_ids[-1] >= ACE_ID:
+        # the ace is above the two
+        card_ids.insert(0, card_ids.pop())
+    return card_ids
+
+
+class DoubleDummySolver:
+    """
+    Solves the card play of a round with all hands known: alpha-beta over card-set masks where seats 0 and 2
+    maximize the points of their team, the result is found by a binary search of null window searches. Cards of a
+    hand which are adjacent in rank once the played cards are removed are equivalent and only one of them is
+    searched. Positions at the start of a trick are cut by the quick tricks of the leader or looked up in a
+    transposition table keyed by the relative ranks of the remaining cards, which is reused by every solve of the
+    same game mode and hokm
+    """
+
+    def __init__(self, game_mode: GAMEMODE, hokm_suit: SUITS):
+        self.game_mode = game_mode
+        self.hokm_suit = hokm_suit
+        self.strengths = TRICK_STRENGTH[game_mode][hokm_suit]
+        self.ranks = RANK_TABLE[game_mode]
+        # _position_key -> (bound, value, suit index and rank among the remaining cards of the best card)
+        self.table = {}
+        self.nodes = 0
+        # how often each card caused a cutoff, weighted by the depth
+        self.history = [0] * DECK_SIZE
+
+        self.hands = [0] * NUM_PLAYERS
+        # the seat holding every card of the position, cards never change hands
+        self.owner = [NO_CARD] * DECK_SIZE
+        # the cards of the hands and of the current trick
+        self.alive = 0
+        self.trick = [NO_CARD] * NUM_PLAYERS
+        self.trick_size = 0
+        self.leader = 0
+        self.winner = 0
+        self.strength = None
+
+    def clear(self):
+        self.table.clear()
+
+    def solve(self, hands: Sequence[int], leader: int, trick: Sequence[int] = (), lead_suit: SUITS = SUITS.NOSUIT,
+              alpha: int = None, beta: int = None) -> int:
+        """
+        :param hands: the card-set mask of every seat
+        :param leader: the seat who leads the current trick
+        :param trick: the cards of the current trick in the order they were played from leader
+        :param lead_suit: the suit the leader has to follow when trick is empty, the hokm suit for the first trick
+        :param alpha: with beta, a single search in this window instead of the exact result
+        :return: the points the team of seats 0 and 2 takes from the remaining tricks with best play of everyone
+        """
+        self._set_position(hands, leader, trick)
+        seat = (leader + len(trick)) % NUM_PLAYERS
+        if trick:
+            lead_suit = CARD_SUITS[trick[0]]
+        if alpha is not None or beta is not None:
+            return self._search(seat, lead_suit, -1 if alpha is None else alpha,
+                                self._remaining_points() + 1 if beta is None else beta)
+        # binary search of the result with null window searches, which cut far more than a single wide one
+        lower, upper = 0, self._remaining_points()
+        while lower < upper:
+            guess = lower + ((upper - lower) // TRICK_POINTS + 1) // 2 * TRICK_POINTS
+            value = self._search(seat, lead_suit, guess - 1, guess)
+            if value >= guess:
+                lower = value
+            else:
+                upper = value
+        return lower
+
+    def card_values(self, hands: Sequence[int], leader: int, trick: Sequence[int] = (),
+                    lead_suit: SUITS = SUITS.NOSUIT) -> Dict[int, int]:
+        """
+        :return: for every legal card of the seat to play, the points of the team of seats 0 and 2 once it is played
+        """
+        seat = (leader + len(trick)) % NUM_PLAYERS
+        values = {}
+        for card in ids_of(self._legal(hands[seat], lead_suit if not trick else CARD_SUITS[trick[0]])):
+            played = list(hands)
+            played[seat] ^= 1 << card
+            if len(trick) + 1 < NUM_PLAYERS:
+                values[card] = self.solve(played, leader, list(trick) + [card], lead_suit)
+                continue
+            strength = self.strengths[CARD_SUITS[trick[0]]]
+            cards = list(trick) + [card]
+            winner = (leader + max(range(NUM_PLAYERS), key=lambda k: strength[cards[k]])) % NUM_PLAYERS
+            points = TRICK_POINTS if winner % 2 == 0 else 0
+            values[card] = points + self.solve(played, winner)
+        return values
+
+    def best_card(self, hands: Sequence[int], leader: int, trick: Sequence[int] = (),
+                  lead_suit: SUITS = SUITS.NOSUIT) -> int:
+        seat = (leader + len(trick)) % NUM_PLAYERS
+        values = self.card_values(hands, leader, trick, lead_suit)
+        if seat % 2 == 0:
+            return max(values, key=values.get)
+        return min(values, key=values.get)
+
+    def _set_position(self, hands: Sequence[int], leader: int, trick: Sequence[int]):
+        self.hands = list(hands)
+        self.trick = [NO_CARD] * NUM_PLAYERS
+        self.trick_size = len(trick)
+        self.leader = leader
+        self.winner = leader
+        self.strength = None
+        self.owner = [NO_CARD] * DECK_SIZE
+        for seat, hand in enumerate(hands):
+            for card in ids_of(hand):
+                self.owner[card] = seat
+        self.alive = hands[0] | hands[1] | hands[2] | hands[3]
+        for k, card in enumerate(trick):
+            seat = (leader + k) % NUM_PLAYERS
+            self.owner[card] = seat
+            self.alive |= 1 << card
+            self.trick[seat] = card
+            if k == 0:
+                self.strength = self.strengths[CARD_SUITS[card]]
+            elif self.strength[card] > self.strength[self.trick[self.winner]]:
+                self.winner = seat
+
+    def _remaining_points(self) -> int:
+        return (popcount(self.hands[self.leader]) + (1 if self.trick_size else 0)) * TRICK_POINTS
+
+    def _legal(self, hand: int, suit: SUITS) -> int:
+        return hand & SUIT_MASKS[suit] or hand
+
+    def _representatives(self, seat: int, legal: int) -> List[int]:
+        """
+        one card per run of the legal cards, a run being cards of a suit with no card of another hand or of the
+        current trick ranked between them
+        """
+        owner = self.owner
+        cards = []
+        for suit in PLAYING_SUITS:
+            suit_mask = SUIT_MASKS[suit]
+            if not legal & suit_mask:
+                continue
+            in_run = False
+            for card in ordered_ids(self.alive & suit_mask, self.game_mode):
+                if owner[card] != seat:
+                    in_run = False
+                elif not in_run:
+                    cards.append(card)
+                    in_run = True
+        return cards
+
+    def _ordered_moves(self, seat: int, suit: SUITS, best: int) -> List[int]:
+        cards = self._representatives(seat, self._legal(self.hands[seat], suit))
+        ranks = self.ranks
+        if self.trick_size == 0:
+            # leads: the top cards of the suits first, then low cards to a top card of the partner, then the others
+            owner = self.owner
+            partner = (seat + 2) % NUM_PLAYERS
+            tops = {}
+            for card in cards:
+                suit_cards = ordered_ids(self.alive & SUIT_MASKS[CARD_SUITS[card]], self.game_mode)
+                tops[card] = 0 if suit_cards[0] == card else 1 if owner[suit_cards[0]] == partner else 2
+            history = self.history
+            cards.sort(key=lambda card: (tops[card], -history[card], ranks[card] if tops[card] == 1 else -ranks[card]))
+        else:
+            strength = self.strength
+            winning = strength[self.trick[self.winner]]
+            if (self.winner - seat) % 2 == 0:
+                # the partner wins the trick: cheap cards first
+                cards.sort(key=lambda card: (strength[card], ranks[card]))
+            else:
+                # the cheapest card beating the trick, then the cheapest of the others
+                cards.sort(key=lambda card: (strength[card] <= winning, strength[card], ranks[card]))
+        if best in cards:
+            cards.remove(best)
+            cards.insert(0, best)
+        return cards
+
+    def _position_key(self, seat: int, suit: SUITS) -> Tuple[tuple, List[List[int]]]:
+        """
+        the transposition key of a position at the start of a trick: the owners of the remaining cards of every
+        suit from the highest to the lowest. Only the order of the cards matters, so positions which differ by
+        which low cards were already played share the same key
+        :return: the key and the remaining card ids of every suit in rank order
+        """
+        owner = self.owner
+        key = [seat, suit]
+        orders = []
+        for order_suit in PLAYING_SUITS:
+            owners = 1
+            order = ordered_ids(self.alive & SUIT_MASKS[order_suit], self.game_mode)
+            for card in order:
+                owners = owners << 2 | owner[card]
+            key.append(owners)
+            orders.append(order)
+        return tuple(key), orders
+
+    def _last_trick(self, seat: int) -> int:
+        """
+        the points of the last trick, where every card is forced
+        """
+        hands = self.hands
+        strength = self.strengths[CARD_SUITS[highest_id(hands[seat])]]
+        winner = max(range(NUM_PLAYERS), key=lambda other: strength[highest_id(hands[other])])
+        return TRICK_POINTS if winner % 2 == 0 else 0
+
+    def _quick_tricks(self, seat: int, orders: List[List[int]]) -> int:
+        """
+        the tricks the team of the leader takes for sure by cashing the top cards of the leader, or of the partner
+        when the leader can reach it with a lead in a suit the partner tops. A top card wins when nobody can trump it
+        """
+        hands = self.hands
+        hand = hands[seat]
+        partner = (seat + 2) % NUM_PLAYERS
+        can_trump = False
+        if self.game_mode == GAMEMODE.NORMAL:
+            can_trump = (hands[(seat + 1) % NUM_PLAYERS] | hands[(seat + 3) % NUM_PLAYERS]) & SUIT_MASKS[self.hokm_suit]
+        tricks = partner_tricks = 0
+        entry = False
+        for order_suit, order in zip(PLAYING_SUITS, orders):
+            if not order or (can_trump and order_suit != self.hokm_suit):
+                continue
+            tricks += self._top_run(hand, order)
+            partner_run = self._top_run(hands[partner], order)
+            partner_tricks += partner_run
+            entry = entry or (partner_run and hand & SUIT_MASKS[order_suit])
+        return max(tricks, partner_tricks) if entry else tricks
+
+    @staticmethod
+    def _top_run(hand: int, order: List[int]) -> int:
+        run = 0
+        for card in order:
+            if not hand & (1 << card):
+                break
+            run += 1
+        return run
+
+    def _search(self, seat: int, suit: SUITS, alpha: int, beta: int) -> int:
+        """
+        :param suit: the suit seat has to follow if it can
+        :return: the points of the team of seats 0 and 2 in the remaining tricks, exact when it lies in
+        (alpha, beta), otherwise a bound on the same side of the window
+        """
+        self.nodes += 1
+        hands = self.hands
+        key = orders = None
+        best_card = NO_CARD
+        if self.trick_size == 0:
+            hand = hands[seat]
+            if hand & (hand - 1) == 0:
+                return self._last_trick(seat) if hand else 0
+            cards = popcount(hand)
+            remaining = cards * TRICK_POINTS
+            alpha = max(alpha, -1)
+            beta = min(beta, remaining + 1)
+        if self.trick_size == 0 and cards > SHALLOW_TRICKS:
+            key, orders = self._position_key(seat, suit)
+            entry = self.table.get(key)
+            if entry is not None:
+                bound, value, best_suit, best_index = entry
+                if bound == EXACT:
+                    return value
+                if bound == LOWER:
+                    if value >= beta:
+                        return value
+                    alpha = max(alpha, value)
+                elif value <= alpha:
+                    return value
+                else:
+                    beta = min(beta, value)
+                best_card = orders[best_suit][best_index]
+            if suit == SUITS.NOSUIT:
+                quick = self._quick_tricks(seat, orders) * TRICK_POINTS
+                if seat % 2 == 0 and quick >= beta:
+                    return quick
+                if seat % 2 == 1 and remaining - quick <= alpha:
+                    return remaining - quick
+        original_alpha, original_beta = alpha, beta
+
+        maximizing = seat % 2 == 0
+        best_value = None
+        for card in self._ordered_moves(seat, suit, best_card):
+            value = self._play(seat, card, alpha, beta)
+            if best_value is None or (value > best_value if maximizing else value < best_value):
+                best_value = value
+                best_card = card
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.history[card] += 1 << popcount(self.hands[seat])
+                break
+
+        if key is not None:
+            if best_value <= original_alpha:
+                bound = UPPER
+            elif best_value >= original_beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            best_suit = CARD_SUITS[best_card] - 1
+            self.table[key] = bound, best_value, best_suit, orders[best_suit].index(best_card)
+        return best_value
+
+    def _play(self, seat: int, card: int, alpha: int, beta: int) -> int:
+        bit = 1 << card
+        self.hands[seat] ^= bit
+        self.trick[seat] = card
+        previous_winner, previous_strength = self.winner, self.strength
+        if self.trick_size == 0:
+            self.strength = self.strengths[CARD_SUITS[card]]
+            self.winner = seat
+        elif self.strength[card] > self.strength[self.trick[self.winner]]:
+            self.winner = seat
+        self.trick_size += 1
+
+        if self.trick_size < NUM_PLAYERS:
+            value = self._search((seat + 1) % NUM_PLAYERS, CARD_SUITS[self.trick[self.leader]], alpha, beta)
+        else:
+            winner = self.winner
+            points = TRICK_POINTS if winner % 2 == 0 else 0
+            trick, leader, alive = self.trick, self.leader, self.alive
+            self.alive = alive & ~(1 << trick[0] | 1 << trick[1] | 1 << trick[2] | 1 << trick[3])
+            self.trick = [NO_CARD] * NUM_PLAYERS
+            self.trick_size = 0
+            self.leader = winner
+            value = points + self._search(winner, SUITS.NOSUIT, alpha - points, beta - points)
+            self.trick, self.leader, self.alive = trick, leader, alive
+            self.trick_size = NUM_PLAYERS
+
+        self.trick_size -= 1
+        self.winner, self.strength = previous_winner, previous_strength
+        self.trick[seat] = NO_CARD
+        self.hands[seat] ^= bit
+        return value
+
+
+def discard_points(discard: int) -> int:
+    """
+    the points the discarded cards add to the team of the hakem, see RoundState.team_points
+    """
+    return popcount(discard) // NUM_PLAYERS * TRICK_POINTS
+
+
+def solve_state(state: RoundState, solver: DoubleDummySolver = None) -> Tuple[int, int]:
+    """
+    double dummy points of both teams for a round of the simulator in its card play phase, including the tricks
+    already taken and the discard
+    """
+    solver = solver or DoubleDummySolver(state.game_mode, state.hokm_suit)
+    trick = [state.trick[(state.trick_leader + k) % NUM_PLAYERS] for k in range(state.trick_size)]
+    total = state.team_points()
+    future = solver.solve(state.hands, state.trick_leader, trick, state.current_suit if not trick else SUITS.NOSUIT)
+    # the remaining tricks are shared between the teams
+    remaining = (popcount(state.hands[state.trick_leader]) + (1 if trick else 0)) * TRICK_POINTS
+    return total[0] + future, total[1] + remaining - future
+
+
+def solve_record(record, solver: DoubleDummySolver = None) -> Tuple[int, int]:
+    """
+    double dummy points of both teams for the card play of a recorded round, from the first lead of the hakem
+    """
+    from dealer.GameRecord import starting_hands
+    game_mode, hokm_suit = GAMEMODE(int(record["game_mode"])), SUITS(int(record["hokm_suit"]))
+    solver = solver or DoubleDummySolver(game_mode, hokm_suit)
+    hakem = int(record["hakem"])
+    points = solver.solve(starting_hands(record), hakem, lead_suit=hokm_suit)
+    total = [points, len(record["plays"]) // NUM_PLAYERS * TRICK_POINTS - points]
+    total[hakem % 2] += discard_points(mask_of(int(card) for card in record["discard"]))
+    return total[0], total[1]
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    from dealer.GameRecord import GameRecordReader
+
+    parser = argparse.ArgumentParser(description="double dummy analysis of the rounds of a game record file")
+    parser.add_argument("records", help="a file written by dealer.GameRecord")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    reader = GameRecordReader(args.records)
+    records = reader[:args.limit]
+    differences = []
+    t0 = time.time()
+    for i, record in enumerate(records):
+        solved = solve_record(record)
+        hakem_team = int(record["hakem"]) % 2
+        played = int(record["team_points"][hakem_team])
+        differences.append(played - solved[hakem_team])
+        print("round {:05d}: hakem team took {:3d} points, {:3d} with double dummy play".format(
+            i, played, solved[hakem_team]))
+    if differences:
+        print("{} rounds in {:.1f}s, the hakem team took {:+.2f} points per round over double dummy play".format(
+            len(differences), time.time() - t0, sum(differences) / len(differences)))
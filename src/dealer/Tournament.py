@@ -0,0 +1,145 @@
+import itertools
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, cpu_count
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+
+from dealer.DealCorpus import DealCorpus
+from dealer.Game import Game
+from dealer.Logging import Logging
+from dealer.Utils import spawn_seeds
+from players.Enum import NUM_PLAYERS
+from players.Player import Player
+
+# builds the player of a seat from (player_id, team_mate_player_id), so Player classes are entrants as they are
+Entrant = Callable[[int, int], Player]
+
+Z_95 = 1.96
+
+
+def seat_players(team1: Entrant, team2: Entrant) -> List[Player]:
+    """
+    team1 sits at seats 0 and 2, team2 at seats 1 and 3
+    """
+    return [(team1 if seat % 2 == 0 else team2)(seat, (seat + 2) % NUM_PLAYERS) for seat in range(NUM_PLAYERS)]
+
+
+def play_duplicate(entrant_a: Entrant, entrant_b: Entrant, deals: Union[str, np.ndarray], start: int, stop: int,
+                   seed) -> np.ndarray:
+    """
+    plays the deals [start, stop) twice, once with a as team 1 and once with the teams swapped, on tables seeded
+    alike so that the luck of the cards cancels out
+    :return: the round score of a minus the round score of b, averaged over the two tables, for each deal
+    """
+    if isinstance(deals, str):
+        deals = np.load(deals, mmap_mode="r")
+    deals = deals[start:stop]
+    straight = Game(seat_players(entrant_a, entrant_b), seed, DealCorpus(deals))
+    swapped = Game(seat_players(entrant_b, entrant_a), seed, DealCorpus(deals))
+    differences = np.empty(len(deals))
+    for i in range(len(deals)):
+        a1, b1 = straight.play_a_round()
+        b2, a2 = swapped.play_a_round()
+        differences[i] = ((a1 - b1) + (a2 - b2)) / 2
+    return differences
+
+
+def _quiet_worker():
+    Logging.verbose = 0
+
+
+class MatchupResult:
+    def __init__(self, name_a: str, name_b: str, differences: np.ndarray, seconds: float):
+        self.name_a = name_a
+        self.name_b = name_b
+        self.differences = differences
+        self.seconds = seconds
+
+    @property
+    def deals(self) -> int:
+        return len(self.differences)
+
+    @property
+    def mean(self) -> float:
+        """
+        average score difference per round, positive when a is better
+        """
+        return float(self.differences.mean())
+
+    @property
+    def confidence_interval(self) -> float:
+        """
+        half width of the 95% confidence interval of the mean
+        """
+        if self.deals < 2:
+            return math.inf
+        return Z_95 * float(self.differences.std(ddof=1)) / math.sqrt(self.deals)
+
+    @property
+    def games_per_sec(self) -> float:
+        # every deal is played at two tables
+        return 2 * self.deals / self.seconds
+
+    def __str__(self):
+        return "{} vs {}: {:+.2f} +/- {:.2f} per round over {} deals ({:.0f} games/sec)".format(
+            self.name_a, self.name_b, self.mean, self.confidence_interval, self.deals, self.games_per_sec)
+
+
+class Tournament:
+    """
+    Round robin of duplicate matches: every pair of entrants plays the same deals of a corpus at two tables with
+    the teams swapped. The deals are split in blocks played by a pool of processes
+    """
+
+    def __init__(self, entrants: Dict[str, Entrant], deals: Union[str, np.ndarray], num_deals: int = None,
+                 num_workers: int = None, block_size: int = 250, seed: int = 0):
+        """
+        :param entrants: name -> Player class or any picklable (player_id, team_mate_player_id) -> Player factory
+        :param deals: the path of a DealCorpus file, given to the workers which map it again, or an array of deals
+        :param num_deals: the number of deals of the corpus to play, all of them by default
+        """
+        self.entrants = entrants
+        self.deals = deals
+        total = len(np.load(deals, mmap_mode="r")) if isinstance(deals, str) else len(deals)
+        self.num_deals = min(num_deals or total, total)
+        self.num_workers = num_workers or max(1, cpu_count() - 1)
+        self.block_size = block_size
+        self.seed = seed
+
+    def play_matchup(self, name_a: str, name_b: str, executor: ProcessPoolExecutor = None) -> MatchupResult:
+        blocks = list(range(0, self.num_deals, self.block_size))
+        seeds = spawn_seeds(self.seed, len(blocks))
+        args = [(self.entrants[name_a], self.entrants[name_b], self.deals, start,
+                 min(start + self.block_size, self.num_deals), block_seed) for start, block_seed in zip(blocks, seeds)]
+        t0 = time.time()
+        if executor is None:
+            differences = [play_duplicate(*a) for a in args]
+        else:
+            differences = list(executor.map(play_duplicate, *zip(*args)))
+        result = MatchupResult(name_a, name_b, np.concatenate(differences), time.time() - t0)
+        Logging.important(str(result))
+        return result
+
+    def run(self) -> List[MatchupResult]:
+        if self.num_workers == 1:
+            return [self.play_matchup(a, b) for a, b in itertools.combinations(self.entrants, 2)]
+        with ProcessPoolExecutor(self.num_workers, mp_context=get_context("spawn"),
+                                 initializer=_quiet_worker) as executor:
+            return [self.play_matchup(a, b, executor) for a, b in itertools.combinations(self.entrants, 2)]
+
+
+if __name__ == '__main__':
+    import argparse
+    from players.IntelligentPlayer import IntelligentPlayer
+    from players.RuleBasedPlayer import RuleBasedPlayer
+
+    parser = argparse.ArgumentParser(description="duplicate tournament of the built-in bots")
+    parser.add_argument("deals", help="a file written by dealer.DealCorpus")
+    parser.add_argument("--num-deals", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    Tournament({"random": Player, "intelligent": IntelligentPlayer, "rule_based": RuleBasedPlayer}, args.deals,
+               args.num_deals, args.workers).run()
@@ -0,0 +1,71 @@
+from typing import Sequence, Tuple
+
+from dealer.Card import RANK_TABLE, CARD_SUITS
+from players.Enum import GAMEMODE, SUITS, DECK_SIZE
+
+LEAD_BONUS = 16
+HOKM_BONUS = 32
+
+
+def _build_strength(game_mode: GAMEMODE, hokm_suit: SUITS, lead_suit: SUITS) -> Tuple[int, ...]:
+    """
+    strength of every card in a trick, the highest strength wins the trick, exactly as repeated Card.compare calls do:
+    hokm cards (only in NORMAL mode) beat lead suit cards which beat anything else, ties are broken by the mode rank
+    """
+    ranks = RANK_TABLE[game_mode]
+    strength = []
+    for card_id in range(DECK_SIZE):
+        suit = CARD_SUITS[card_id]
+        if game_mode == GAMEMODE.NORMAL and suit == hokm_suit:
+            strength.append(HOKM_BONUS + ranks[card_id])
+        elif suit == lead_suit:
+            strength.append(LEAD_BONUS + ranks[card_id])
+        else:
+            strength.append(0)
+    return tuple(strength)
+
+
+# TRICK_STRENGTH[game_mode][hokm_suit][lead_suit][card_id]
+TRICK_STRENGTH = tuple(
+    None if mode == 0 else tuple(
+        None if hokm == 0 else tuple(
+            None if lead == 0 else _build_strength(GAMEMODE(mode), SUITS(hokm), SUITS(lead))
+            for lead in range(len(SUITS) + 1))
+        for hokm in range(len(SUITS) + 1))
+    for mode in range(len(GAMEMODE) + 1))
+
+
+def _build_higher_cards(game_mode: GAMEMODE) -> Tuple[int, ...]:
+    ranks = RANK_TABLE[game_mode]
+    higher = []
+    for card_id in range(DECK_SIZE):
+        mask = 0
+        for other in range(DECK_SIZE):
+            if CARD_SUITS[other] == CARD_SUITS[card_id] and ranks[other] > ranks[card_id]:
+                mask |= 1 << other
+        higher.append(mask)
+    return tuple(higher)
+
+
+# HIGHER_CARDS[game_mode][card_id] is the card set of the same suit cards which beat card_id
+HIGHER_CARDS = tuple(None if mode == 0 else _build_higher_cards(GAMEMODE(mode)) for mode in range(len(GAMEMODE) + 1))
+
+
+def trick_strength(game_mode: GAMEMODE, hokm_suit: SUITS, lead_suit: SUITS) -> Tuple[int, ...]:
+    return TRICK_STRENGTH[game_mode][hokm_suit][lead_suit]
+
+
+def trick_winner(card_ids: Sequence[int], game_mode: GAMEMODE, hokm_suit: SUITS, lead_suit: SUITS = None) -> int:
+    """
+    :param card_ids: ids of the cards of a trick in the order they have been played
+    :param lead_suit: suit of the trick, the suit of the first card if not given
+    :return: index of the winning card in card_ids
+    """
+    if lead_suit is None:
+        lead_suit = CARD_SUITS[card_ids[0]]
+    strength = TRICK_STRENGTH[game_mode][hokm_suit][lead_suit]
+    winner = 0
+    for ind in range(1, len(card_ids)):
+        if strength[card_ids[ind]] > strength[card_ids[winner]]:
+            winner = ind
+    return winner
@@ -1,3 +1,14 @@
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+from numpy.random import Generator, SeedSequence
+
+from players.Enum import NUM_PLAYERS
+
+
 class ThreeConsecutivePassesException(Exception):
     pass
 
@@ -24,3 +35,91 @@ def get_round_payoff(hakem_id: int, hakem_bet: int, team1_score: int, team2_scor
             return team1_score, -hakem_bet, 0.5
         else:
             return team1_score, -2 * hakem_bet, 1.0
+
+
+# fallback stream of Decks and Players which have not been given their own generator
+DEFAULT_RNG = np.random.default_rng()
+
+
+def seed_sequence(seed=None) -> SeedSequence:
+    """
+    :param seed: None, an int or an already spawned SeedSequence
+    """
+    if isinstance(seed, SeedSequence):
+        return seed
+    return SeedSequence(seed)
+
+
+def spawn_seeds(seed, n: int) -> List[SeedSequence]:
+    """
+    independent child seeds, e.g. one per worker process, all reproducible from seed
+    """
+    return seed_sequence(seed).spawn(n)
+
+
+def table_rngs(seed=None) -> Tuple[Generator, List[Generator]]:
+    """
+    the random streams of one table: one for shuffling the deck and one per player
+    """
+    children = seed_sequence(seed).spawn(1 + NUM_PLAYERS)
+    return np.random.default_rng(children[0]), [np.random.default_rng(child) for child in children[1:]]
+
+
+def run_batches(function: Callable, batches: Sequence, executor: Executor = None, deadline: float = None) -> List:
+    """
+    calls function on every batch, in place or on executor, until the perf_counter deadline comes, but always on the
+    first batch. The batches still waiting at the deadline are cancelled
+    :return: the results of a prefix of batches, so that they only depend on how many batches were done in time
+    """
+    results = []
+    if executor is None:
+        for batch in batches:
+            results.append(function(batch))
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return results
+    futures = [executor.submit(function, batch) for batch in batches]
+    futures[0].result()
+    timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+    done, not_done = wait(futures, timeout)
+    for future in not_done:
+        future.cancel()
+    for future in futures:
+        if future not in done:
+            break
+        results.append(future.result())
+    return results
+
+
+class WorkerPool:
+    """
+    owner of a pool of num_workers spawned processes, started on first use and shut down by close, at the end of a
+    with block or by close_pools when a game is over
+    """
+    num_workers = 0
+    executor = None
+
+    def pool(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.num_workers, mp_context=get_context("spawn"))
+        return self.executor
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def close_pools(players: Sequence):
+    """
+    shuts down the worker processes of the players which own a WorkerPool, they start again on their next search
+    """
+    for player in players:
+        if isinstance(player, WorkerPool):
+            player.close()
@@ -0,0 +1,148 @@
+from typing import Sequence
+
+import numpy as np
+
+from dealer.CardSet import iter_ids
+from dealer.Simulator import RoundState, NO_CARD
+from players.Enum import DECK_SIZE, GAMEMODE, SUITS, NUM_PLAYERS
+
+# the keys are the same in every process and run, so hashes can be stored and compared between them
+ZOBRIST_SEED = 0x5E1E3
+MAX_BET = 256
+
+_rng = np.random.default_rng(ZOBRIST_SEED)
+
+
+def _keys(*shape) -> list:
+    return _rng.integers(0, 2 ** 64, size=shape, dtype=np.uint64).tolist()
+
+
+# public: what every seat has seen
+FIRST_HAND_KEYS = _keys(NUM_PLAYERS)
+BID_KEYS = _keys(NUM_PLAYERS, MAX_BET)
+MODE_KEYS = _keys(len(GAMEMODE) + 1)
+HOKM_KEYS = _keys(len(SUITS) + 1)
+TURN_KEYS = _keys(NUM_PLAYERS)
+PLAYED_KEYS = _keys(NUM_PLAYERS, DECK_SIZE)
+TRICK_KEYS = _keys(DECK_SIZE)
+WON_KEYS = _keys(NUM_PLAYERS, DECK_SIZE)
+# hidden: the hands, the widow before the hakem takes it and the discard of the hakem
+HAND_KEYS = _keys(NUM_PLAYERS, DECK_SIZE)
+WIDOW_KEYS = _keys(DECK_SIZE)
+DISCARD_KEYS = _keys(DECK_SIZE)
+
+
+def cards_key(keys: Sequence[int], mask: int) -> int:
+    key = 0
+    for card in iter_ids(mask):
+        key ^= keys[card]
+    return key
+
+
+class ZobristHash:
+    """
+    Zobrist hashes of a round, updated by xor as it is dealt, bid, widowed and played. public covers what every seat
+    has seen: the first hand, the raises, the game mode and hokm, the cards played by every seat, the current trick,
+    the cards won by every seat and the seat to play. full adds the hands, the widow and the discard, the perfect
+    information state, and observation(seat) the hand of seat only
+    """
+    __slots__ = ("public", "hands", "widow", "discard", "hakem")
+
+    def __init__(self):
+        self.public = 0
+        self.hands = [0] * NUM_PLAYERS
+        self.widow = 0
+        self.discard = 0
+        self.hakem = -1
+
+    def copy(self):
+        zobrist = ZobristHash()
+        zobrist.public = self.public
+        zobrist.hands = list(self.hands)
+        zobrist.widow = self.widow
+        zobrist.discard = self.discard
+        zobrist.hakem = self.hakem
+        return zobrist
+
+    @property
+    def full(self) -> int:
+        hands = self.hands
+        return self.public ^ hands[0] ^ hands[1] ^ hands[2] ^ hands[3] ^ self.widow ^ self.discard
+
+    def observation(self, seat: int) -> int:
+        """
+        the hash of what seat knows, the discard included for the hakem
+        """
+        return self.public ^ self.hands[seat] ^ (self.discard if seat == self.hakem else 0)
+
+    def deal(self, hands: Sequence[int], widow: int, first_hand: int):
+        """
+        :param hands: the card-set mask of every seat
+        """
+        self.public = FIRST_HAND_KEYS[first_hand]
+        self.hands = [cards_key(HAND_KEYS[seat], hand) for seat, hand in enumerate(hands)]
+        self.widow = cards_key(WIDOW_KEYS, widow)
+        self.discard = 0
+        self.hakem = -1
+
+    def bid(self, seat: int, bet: int):
+        """
+        a raise, bets which do not raise are not part of the state
+        """
+        self.public ^= BID_KEYS[seat][bet]
+
+    def take_widow(self, hakem: int, widow: int):
+        self.widow = 0
+        self.hands[hakem] ^= cards_key(HAND_KEYS[hakem], widow)
+
+    def discard_cards(self, hakem: int, discard: int):
+        self.hands[hakem] ^= cards_key(HAND_KEYS[hakem], discard)
+        self.discard = cards_key(DISCARD_KEYS, discard)
+        self.hakem = hakem
+
+    def set_trump(self, game_mode: GAMEMODE, hokm_suit: SUITS, leader: int):
+        self.public ^= MODE_KEYS[game_mode] ^ HOKM_KEYS[hokm_suit] ^ TURN_KEYS[leader]
+
+    def play_card(self, seat: int, card: int):
+        self.hands[seat] ^= HAND_KEYS[seat][card]
+        self.public ^= PLAYED_KEYS[seat][card] ^ TRICK_KEYS[card] ^ TURN_KEYS[seat] ^ \
+            TURN_KEYS[(seat + 1) % NUM_PLAYERS]
+
+    def end_trick(self, trick: Sequence[int], leader: int, winner: int):
+        """
+        :param trick: the card ids of the finished trick
+        :param leader: the seat who led it, the turn is back to it after the fourth card
+        """
+        key = TURN_KEYS[leader] ^ TURN_KEYS[winner]
+        won = WON_KEYS[winner]
+        for card in trick:
+            key ^= TRICK_KEYS[card] ^ won[card]
+        self.public ^= key
+
+
+def round_state_hash(state: RoundState) -> ZobristHash:
+    """
+    the hashes of a simulator state computed from scratch, they equal the ones the simulator updates when
+    state.zobrist is set before deal_round
+    """
+    zobrist = ZobristHash()
+    if state.deal is None:
+        return zobrist
+    public = FIRST_HAND_KEYS[state.first_hand]
+    for seat, bet in state.bets:
+        public ^= BID_KEYS[seat][bet]
+    if state.hokm_suit == SUITS.NOSUIT:
+        zobrist.widow = cards_key(WIDOW_KEYS, state.widow)
+    else:
+        zobrist.discard = cards_key(DISCARD_KEYS, state.discard)
+        zobrist.hakem = state.hakem
+        public ^= MODE_KEYS[state.game_mode] ^ HOKM_KEYS[state.hokm_suit] ^ TURN_KEYS[state.current_player]
+    for trick, winner in zip(state.tricks, state.trick_winners):
+        for seat, card in enumerate(trick):
+            public ^= PLAYED_KEYS[seat][card] ^ WON_KEYS[winner][card]
+    for seat, card in enumerate(state.trick):
+        if card != NO_CARD:
+            public ^= PLAYED_KEYS[seat][card] ^ TRICK_KEYS[card]
+    zobrist.public = public
+    zobrist.hands = [cards_key(HAND_KEYS[seat], hand) for seat, hand in enumerate(state.hands)]
+    return zobrist
@@ -0,0 +1,207 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Union
+
+import numpy as np
+
+from dealer.CardSet import SUIT_MASKS, mask_of, popcount
+from dealer.EndgameCache import shared_cache
+from dealer.Logging import Logging
+from dealer.Simulator import RoundState, deal_round, run_widowing
+from dealer.Solver import PLAYING_SUITS, TRICK_POINTS
+from dealer.Utils import get_round_payoff, seed_sequence, spawn_seeds, table_rngs
+from players.Enum import DECK_SIZE, NUM_PLAYERS, NUM_SUITS, PLAYER_INITIAL_CARDS, SAFE_BET, MAX_SCORE
+from players.Policy import HakemPolicy
+
+BID_STEP = TRICK_POINTS
+# the bets worth making, a round has MAX_SCORE points
+BIDS = np.arange(SAFE_BET, MAX_SCORE + 1, BID_STEP)
+# the points a team can take, one histogram bin each
+POINTS = np.arange(0, MAX_SCORE + 1, TRICK_POINTS)
+
+# the suit lengths of a hand from the longest suit
+SHAPES = tuple(shape for shape in itertools.product(range(PLAYER_INITIAL_CARDS + 1), repeat=NUM_SUITS)
+               if sum(shape) == PLAYER_INITIAL_CARDS and list(shape) == sorted(shape, reverse=True))
+SHAPE_INDEX = {shape: index for index, shape in enumerate(SHAPES)}
+ACES, KINGS, QUEENS = (mask_of(range(DECK_SIZE - (k + 1) * NUM_SUITS, DECK_SIZE - k * NUM_SUITS)) for k in range(3))
+HONORS = ACES | KINGS | QUEENS
+# a key is (((shape * 5 + aces) * 5 + kings) * 5 + queens) * 4 + honors of the longest suit, see hand_key
+HONOR_COUNTS = NUM_SUITS + 1
+LONG_HONOR_COUNTS = 4
+NUM_KEYS = len(SHAPES) * HONOR_COUNTS ** 3 * LONG_HONOR_COUNTS
+# the least samples a key is estimated from alone, rarer keys take the samples of a coarser key: the shape, aces and
+# kings, then the longest suit length and aces, then all of them
+MIN_SAMPLES = 32
+
+# PAYOFFS[b][p] the score of the team of the hakem of a BIDS[b] contract which takes POINTS[p]
+PAYOFFS = np.array([[get_round_payoff(0, bid, points, MAX_SCORE - points)[0] for points in POINTS] for bid in BIDS])
+
+
+def hand_key(hand: int) -> int:
+    """
+    the features of a 12-card hand the estimates are kept by: its suit lengths from the longest, its aces, kings and
+    queens, and how many of them are in its longest suit
+    """
+    suits = [hand & SUIT_MASKS[suit] for suit in PLAYING_SUITS]
+    lengths = [popcount(mask) for mask in suits]
+    # the most honors of the longest suits
+    long_honors = max((length, popcount(mask & HONORS)) for length, mask in zip(lengths, suits))[1]
+    shape = SHAPE_INDEX[tuple(sorted(lengths, reverse=True))]
+    key = shape * HONOR_COUNTS + popcount(hand & ACES)
+    key = key * HONOR_COUNTS + popcount(hand & KINGS)
+    key = key * HONOR_COUNTS + popcount(hand & QUEENS)
+    return key * LONG_HONOR_COUNTS + long_honors
+
+
+def simulate_contracts(deals: np.ndarray, seed, solver_tricks: int = 0) -> np.ndarray:
+    """
+    plays every deal four times, each seat being once the hakem of a SAFE_BET contract, with HakemPolicy at every seat
+    :param solver_tricks: the last tricks are solved double dummy instead of played
+    :return: (4 * len(deals), 2) the hand_key of each hakem and the points its team took
+    """
+    policies = [HakemPolicy()] * NUM_PLAYERS
+    cache = shared_cache(solver_tricks)
+    rngs = table_rngs(seed)
+    samples = np.empty((NUM_PLAYERS * len(deals), 2), dtype=np.int64)
+    for i, deal in enumerate(deals):
+        deal = deal.tolist()
+        for seat in range(NUM_PLAYERS):
+            state = RoundState(*rngs)
+            deal_round(state, deal)
+            key = hand_key(state.hands[seat])
+            state.bets = [(seat, SAFE_BET)]
+            state.hakem = seat
+            run_widowing(state, policies)
+            samples[NUM_PLAYERS * i + seat] = key, cache.rollout(state, policies)[seat % 2]
+    cache.flush()
+    return samples
+
+
+class BidEstimator:
+    """
+    The points a 12-card hand takes as hakem, estimated from simulated contracts and kept by hand_key: each key has the
+    histogram of the points taken by the hands of its samples. The expected points and the highest bet whose
+    contract scores positively on average are tabled for every key when the estimator is built or loaded, so that
+    a bet is a hand_key and a list lookup
+    """
+
+    def __init__(self, histograms: np.ndarray = None):
+        """
+        :param histograms: (NUM_KEYS, len(POINTS)) sample counts, e.g. from a file written by save
+        """
+        if histograms is None:
+            histograms = np.zeros((NUM_KEYS, len(POINTS)), dtype=np.int64)
+        if histograms.shape != (NUM_KEYS, len(POINTS)):
+            raise ValueError("bidding histograms must be of shape ({}, {})".format(NUM_KEYS, len(POINTS)))
+        self.histograms = histograms.astype(np.int64)
+        self.points = []
+        self.max_bids = []
+        self.tabulate()
+
+    def __len__(self):
+        """
+        the number of samples
+        """
+        return int(self.histograms.sum())
+
+    def add_samples(self, samples: np.ndarray):
+        """
+        :param samples: rows of hand_key and points, see simulate_contracts
+        """
+        np.add.at(self.histograms, (samples[:, 0], samples[:, 1] // TRICK_POINTS), 1)
+        self.tabulate()
+
+    def tabulate(self):
+        keys = np.arange(NUM_KEYS)
+        fine = self.histograms
+        # the key without its queens and long suit honors, then the longest suit length and aces
+        coarse = fine.reshape(-1, HONOR_COUNTS * LONG_HONOR_COUNTS, len(POINTS)).sum(1)
+        shape_aces = coarse.reshape(-1, HONOR_COUNTS, len(POINTS)).sum(1)
+        longest_aces = np.array([SHAPES[index // HONOR_COUNTS][0] * HONOR_COUNTS + index % HONOR_COUNTS
+                                 for index in range(len(shape_aces))])
+        longest = np.zeros(((PLAYER_INITIAL_CARDS + 1) * HONOR_COUNTS, len(POINTS)), dtype=np.int64)
+        np.add.at(longest, longest_aces, shape_aces)
+        histograms = np.broadcast_to(fine.sum(0), fine.shape)
+        for level in (longest[longest_aces[keys // HONOR_COUNTS ** 2 // LONG_HONOR_COUNTS]],
+                      coarse[keys // (HONOR_COUNTS * LONG_HONOR_COUNTS)], fine):
+            histograms = np.where(level.sum(1, keepdims=True) >= MIN_SAMPLES, level, histograms)
+        probabilities = histograms / np.maximum(histograms.sum(1, keepdims=True), 1)
+        expected = probabilities @ PAYOFFS.T
+        self.points = (probabilities @ POINTS).tolist()
+        self.max_bids = np.where(expected > 0, BIDS, 0).max(1).tolist()
+
+    def estimate(self, hand: int) -> float:
+        """
+        :return: the points the team of the hakem of hand is expected to take
+        """
+        return self.points[hand_key(hand)]
+
+    def max_bid(self, hand: int) -> int:
+        """
+        :return: the highest bet whose contract scores positively on average, 0 if none does
+        """
+        return self.max_bids[hand_key(hand)]
+
+    def bid(self, hand: int, last_bet: int) -> int:
+        """
+        The bet of a hand after last_bet, the highest bet so far or 0 before the first one. A hand raises by BID_STEP
+        as long as it stays under its max_bid and passes otherwise, but the first bet always opens at SAFE_BET: the
+        passes are not part of the bets, and a round needs a contract
+        :return: the bet or 0 to pass
+        """
+        if not last_bet:
+            return SAFE_BET
+        bet = last_bet + BID_STEP
+        return bet if bet <= self.max_bids[hand_key(hand)] else 0
+
+    def save(self, path: str):
+        np.save(path, self.histograms)
+
+    @classmethod
+    def load(cls, path: str) -> "BidEstimator":
+        return cls(np.load(path))
+
+    @classmethod
+    def build(cls, num_deals: int, seed=None, num_workers: int = 0, solver_tricks: int = 0, chunk_size: int = 1024,
+              deals: Union[str, np.ndarray] = None) -> "BidEstimator":
+        """
+        simulates 4 * num_deals contracts in chunks, in place or on a pool of num_workers spawned processes
+        :param deals: a DealCorpus file or array to play instead of random deals, num_deals of them at most
+        """
+        t0 = time.perf_counter()
+        if isinstance(deals, str):
+            deals = np.load(deals, mmap_mode="r")
+        if deals is None:
+            rng = np.random.default_rng(seed_sequence(seed))
+            base = np.tile(np.arange(DECK_SIZE, dtype=np.uint8), (num_deals, 1))
+            deals = rng.permuted(base, axis=1)
+        deals = deals[:num_deals]
+        chunks = [np.asarray(deals[start:start + chunk_size]) for start in range(0, len(deals), chunk_size)]
+        seeds = spawn_seeds(seed, len(chunks))
+        solver_tricks = [solver_tricks] * len(chunks)
+        if num_workers:
+            with ProcessPoolExecutor(num_workers, mp_context=get_context("spawn")) as executor:
+                samples = list(executor.map(simulate_contracts, chunks, seeds, solver_tricks))
+        else:
+            samples = list(map(simulate_contracts, chunks, seeds, solver_tricks))
+        estimator = cls()
+        estimator.add_samples(np.concatenate(samples))
+        elapsed = time.perf_counter() - t0
+        Logging.important("simulated {} contracts in {:.1f}s, {:.0f} contracts/sec".format(
+            len(estimator), elapsed, len(estimator) / elapsed))
+        return estimator
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="simulate the contracts of a bidding table")
+    parser.add_argument("path")
+    parser.add_argument("num_deals", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--solver-tricks", type=int, default=0)
+    parser.add_argument("--deals", default=None, help="a file written by dealer.DealCorpus")
+    args = parser.parse_args()
+    BidEstimator.build(args.num_deals, args.seed, args.workers, args.solver_tricks, deals=args.deals).save(args.path)
@@ -0,0 +1,250 @@
+import math
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from numpy.random import SeedSequence
+
+from dealer.Card import Card, RANK_TABLE
+from dealer.CardSet import ids_of
+from dealer.Deck import Deck
+from dealer.EndgameCache import shared_cache
+from dealer.Logging import Logging
+from dealer.Simulator import NO_CARD, play_card
+from dealer.Utils import spawn_seeds
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS, PLAYER_INITIAL_CARDS
+from players.PIMCPlayer import PIMCPlayer, Position, round_state, sample_layout
+from players.Policy import RuleBasedPolicy
+
+NO_NODE = -1
+
+
+class SearchTree:
+    """
+    Single observer information set MCTS: every iteration deals a layout of the unseen cards and walks down the
+    children whose card is legal in it, choosing by UCB over the times a child was available instead of the visits of
+    its parent, then plays the rest of the round with RuleBasedPolicy but for its last solver_tricks tricks, which
+    are solved double dummy through the EndgameCache of the process.
+
+    The nodes live in preallocated parallel lists and are addressed by their index, a released subtree goes back to
+    the free list, so the search itself allocates no object per node. Once the max_nodes are in use, iterations go
+    on without expanding
+    """
+
+    def __init__(self, max_nodes: int = 1 << 16, exploration: float = 0.7, solver_tricks: int = 3,
+                 endgame_path: str = None):
+        self.max_nodes = max_nodes
+        self.exploration = exploration
+        self.cache = shared_cache(solver_tricks, endgame_path)
+        # the card which leads to the node and the seat who played it
+        self.card = [NO_CARD] * max_nodes
+        self.seat = [0] * max_nodes
+        self.child = [NO_NODE] * max_nodes
+        self.sibling = [NO_NODE] * max_nodes
+        self.visits = [0] * max_nodes
+        self.available = [0] * max_nodes
+        # sum of the shares of the round points taken by the team of seat
+        self.total = [0.0] * max_nodes
+        self.free = []
+        self.root = NO_NODE
+        self.reset()
+
+    def __len__(self):
+        return self.max_nodes - len(self.free)
+
+    def reset(self):
+        self.free = list(range(self.max_nodes - 1, -1, -1))
+        self.root = self.new_node(NO_CARD, 0)
+
+    def new_node(self, card: int, seat: int) -> int:
+        if not self.free:
+            return NO_NODE
+        node = self.free.pop()
+        self.card[node] = card
+        self.seat[node] = seat
+        self.child[node] = self.sibling[node] = NO_NODE
+        self.visits[node] = self.available[node] = 0
+        self.total[node] = 0.0
+        return node
+
+    def release(self, node: int):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            self.free.append(node)
+            child = self.child[node]
+            while child != NO_NODE:
+                stack.append(child)
+                child = self.sibling[child]
+
+    def advance(self, card: int):
+        """
+        moves the root to its child of card, which keeps the statistics of that subtree, and releases the rest
+        """
+        next_root = NO_NODE
+        child = self.child[self.root]
+        while child != NO_NODE:
+            # the links of a released node stay valid until it is allocated again
+            if self.card[child] == card:
+                next_root = child
+            else:
+                self.release(child)
+            child = self.sibling[child]
+        self.free.append(self.root)
+        if next_root == NO_NODE:
+            next_root = self.new_node(card, 0)
+        self.sibling[next_root] = NO_NODE
+        self.root = next_root
+
+    def root_visits(self) -> Dict[int, int]:
+        visits = {}
+        child = self.child[self.root]
+        while child != NO_NODE:
+            visits[self.card[child]] = self.visits[child]
+            child = self.sibling[child]
+        return visits
+
+    def search(self, position: Position, rng: np.random.Generator, iterations: int, deadline: float = None) -> int:
+        """
+        runs iterations from the root, which has to stand for position, or less when the perf_counter deadline comes
+        :return: the number of nodes visited
+        """
+        card, seat, child, sibling = self.card, self.seat, self.child, self.sibling
+        visits, available, total = self.visits, self.available, self.total
+        exploration = self.exploration
+        policies = [RuleBasedPolicy()] * NUM_PLAYERS
+        nodes = 0
+        for i in range(iterations):
+            if i and deadline is not None and time.perf_counter() > deadline:
+                break
+            state = round_state(position, sample_layout(position, rng))
+            node = self.root
+            path = [node]
+            while len(state.tricks) < PLAYER_INITIAL_CARDS:
+                legal = state.legal_mask(state.current_player)
+                seen = 0
+                best, best_score = NO_NODE, -1.0
+                c = child[node]
+                while c != NO_NODE:
+                    bit = 1 << card[c]
+                    if legal & bit:
+                        seen |= bit
+                        available[c] += 1
+                        score = total[c] / visits[c] + exploration * math.sqrt(math.log(available[c]) / visits[c])
+                        if score > best_score:
+                            best, best_score = c, score
+                    c = sibling[c]
+                untried = ids_of(legal & ~seen)
+                if untried:
+                    new = self.new_node(untried[int(rng.integers(len(untried)))], state.current_player)
+                    if new != NO_NODE:
+                        sibling[new] = child[node]
+                        child[node] = new
+                        available[new] = 1
+                        play_card(state, card[new])
+                        path.append(new)
+                    break
+                play_card(state, card[best])
+                node = best
+                path.append(node)
+            points = self.cache.rollout(state, policies)
+            shares = [p / (sum(points) or 1) for p in points]
+            for node in path:
+                visits[node] += 1
+                total[node] += shares[seat[node] % 2]
+            nodes += len(path)
+        self.cache.flush()
+        return nodes
+
+
+def search_root(position: Position, seed: SeedSequence, iterations: int, max_nodes: int, exploration: float,
+                solver_tricks: int, endgame_path: str = None, time_budget: float = None) -> Tuple[int, Dict[int, int]]:
+    """
+    a search of a fresh tree, the work of a process of the root parallelism
+    :return: the number of nodes visited and the visits of each card of the root
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    tree = SearchTree(max_nodes, exploration, solver_tricks, endgame_path)
+    nodes = tree.search(position, np.random.default_rng(seed), iterations, deadline)
+    return nodes, tree.root_visits()
+
+
+class ISMCTSPlayer(PIMCPlayer):
+    """
+    Plays the most visited card of an information set MCTS, see SearchTree. It keeps the voids and the seen cards
+    like PIMCPlayer, and the tree between its decisions: each card played on the table moves the root down, so the
+    subtree of the actual play is reused instead of searched again.
+
+    With num_workers, as many processes search fresh trees of the same position with their own seeds meanwhile and
+    their root visits are added up (root parallelism)
+    """
+
+    def __init__(self, player_id, team_mate_player_id, iterations: int = 500, max_nodes: int = 1 << 16,
+                 exploration: float = 0.7, time_budget: float = None, num_workers: int = 0, solver_tricks: int = 3,
+                 endgame_path: str = None):
+        super().__init__(player_id, team_mate_player_id, time_budget=time_budget, solver_tricks=solver_tricks,
+                         num_workers=num_workers, endgame_path=endgame_path)
+        self.iterations = iterations
+        self.tree = SearchTree(max_nodes, exploration, solver_tricks, endgame_path)
+        # stat variables
+        self.nodes = 0
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.search_time if self.search_time else 0.0
+
+    @property
+    def decision_time(self) -> float:
+        """
+        mean seconds of a searched decision
+        """
+        return self.search_time / self.decisions if self.decisions else 0.0
+
+    def begin_round(self, deck: Deck):
+        super().begin_round(deck)
+        self.tree.reset()
+
+    def set_hokm_and_game_mode(self, game_mode: GAMEMODE, hokm_suit: SUITS, hakem: int):
+        super().set_hokm_and_game_mode(game_mode, hokm_suit, hakem)
+        self.tree.reset()
+
+    def card_has_been_played(self, current_hand: List, current_suit: SUITS):
+        played = len(self.trick_order)
+        super().card_has_been_played(current_hand, current_suit)
+        for seat in self.trick_order[played:]:
+            self.tree.advance(self.trick_cards[seat])
+
+    def play_a_card(self, current_hand: List, current_suit: SUITS) -> Card:
+        candidates = self.get_legal_actions(current_suit)
+        if len(candidates) == 1:
+            return self.deck.pop_by_id(candidates[0])
+        visits = self.search(self.position(current_suit), candidates)
+        # the lowest of the equally visited cards
+        ranks = RANK_TABLE[self.game_mode]
+        best = max(range(len(candidates)), key=lambda i: (visits[i], -ranks[candidates[i]]))
+        return self.deck.pop_by_id(candidates[best])
+
+    def search(self, position: Position, candidates: List[int]) -> np.ndarray:
+        """
+        :return: the root visits of every candidate card, summed over the trees of the workers
+        """
+        t0 = time.perf_counter()
+        seeds = spawn_seeds(int(self.rng.integers(2 ** 63)), 1 + self.num_workers)
+        futures = [self.pool().submit(search_root, position, seed, self.iterations, self.tree.max_nodes,
+                                      self.tree.exploration, self.solver_tricks, self.endgame_path, self.time_budget)
+                   for seed in seeds[1:]]
+        deadline = None if self.time_budget is None else t0 + self.time_budget
+        nodes = self.tree.search(position, np.random.default_rng(seeds[0]), self.iterations, deadline)
+        root_visits = self.tree.root_visits()
+        visits = np.array([root_visits.get(card, 0) for card in candidates])
+        for future in futures:
+            worker_nodes, worker_visits = future.result()
+            nodes += worker_nodes
+            visits += [worker_visits.get(card, 0) for card in candidates]
+        elapsed = time.perf_counter() - t0
+        self.decisions += 1
+        self.nodes += nodes
+        self.search_time += elapsed
+        Logging.debug("Player{} visited {} nodes in {:.3f}s, {:.0f} nodes/sec, tree of {} nodes".format(
+            self.player_id, nodes, elapsed, self.nodes_per_sec, len(self.tree)))
+        return visits
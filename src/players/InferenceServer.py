@@ -0,0 +1,144 @@
+import queue
+import threading
+import time
+from typing import Tuple
+
+import numpy as np
+import torch
+
+from players.Enum import ACTION_DIM
+from players.PPO import MaskableActorCritic
+from rlcard_env.game_state import NUMBER_OF_PARAMS
+
+STOP = -1
+
+
+class InferenceClient:
+    """
+    The handle of one seat or table on an InferenceServer. The request is written in the client row of the shared
+    tensors, only the row number goes through the request queue
+    """
+
+    def __init__(self, server_slots, client_id: int):
+        self.states, self.masks, self.actions, self.logprobs, self.request_times, self.requests, self.ready = \
+            server_slots
+        self.client_id = client_id
+        self.event = self.ready[client_id]
+
+    def act(self, state: np.ndarray, valid_actions: np.ndarray) -> Tuple[int, float]:
+        """
+        blocks until the server has answered
+        :return: the sampled action and its log probability
+        """
+        i = self.client_id
+        self.states[i] = torch.from_numpy(state)
+        self.masks[i] = torch.from_numpy(np.asarray(valid_actions, dtype=bool))
+        self.request_times[i] = time.perf_counter()
+        self.event.clear()
+        self.requests.put(i)
+        self.event.wait()
+        return int(self.actions[i]), float(self.logprobs[i])
+
+
+class InferenceServer:
+    """
+    Serves a MaskableActorCritic to many clients: the pending requests are gathered in batches of up to max_batch
+    (waiting at most max_wait seconds for more once one has arrived) and answered with a single forward pass.
+    Clients are threads of this process by default, or processes when a multiprocessing context is given, the
+    states, masks and answers then live in shared memory
+    """
+
+    def __init__(self, policy: MaskableActorCritic, num_clients: int, max_batch: int = None, max_wait: float = 0.001,
+                 context=None):
+        """
+        :param context: a torch.multiprocessing context, e.g. get_context("spawn"), to serve client processes
+        """
+        self.policy = policy
+        self.num_clients = num_clients
+        self.max_batch = max_batch or num_clients
+        self.max_wait = max_wait
+        self.states = torch.zeros(num_clients, NUMBER_OF_PARAMS)
+        self.masks = torch.zeros(num_clients, ACTION_DIM, dtype=torch.bool)
+        self.actions = torch.zeros(num_clients, dtype=torch.long)
+        self.logprobs = torch.zeros(num_clients)
+        self.request_times = torch.zeros(num_clients, dtype=torch.float64)
+        if context is None:
+            self.requests = queue.Queue()
+            self.ready = [threading.Event() for _ in range(num_clients)]
+        else:
+            for tensor in (self.states, self.masks, self.actions, self.logprobs, self.request_times):
+                tensor.share_memory_()
+            self.requests = context.Queue()
+            self.ready = [context.Event() for _ in range(num_clients)]
+        self.thread = None
+
+        self.served = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def client(self, client_id: int) -> InferenceClient:
+        return InferenceClient((self.states, self.masks, self.actions, self.logprobs, self.request_times,
+                                self.requests, self.ready), client_id)
+
+    def next_batch(self) -> list:
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch and batch[-1] != STOP:
+            try:
+                batch.append(self.requests.get(timeout=max(0.0, deadline - time.perf_counter())))
+            except queue.Empty:
+                break
+        return batch
+
+    def serve_batch(self, batch: list):
+        rows = torch.tensor(batch)
+        actions, logprobs = self.policy.act_batch(self.states[rows], self.masks[rows])
+        self.actions[rows] = actions
+        self.logprobs[rows] = logprobs
+        now = time.perf_counter()
+        latencies = now - self.request_times[rows]
+        for i in batch:
+            self.ready[i].set()
+        self.served += len(batch)
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.total_latency += float(latencies.sum())
+        self.max_latency = max(self.max_latency, float(latencies.max()))
+
+    def serve_forever(self):
+        while True:
+            batch = self.next_batch()
+            stop = STOP in batch
+            batch = [i for i in batch if i != STOP]
+            if batch:
+                self.serve_batch(batch)
+            if stop:
+                return
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.requests.put(STOP)
+        self.thread.join()
+        self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.served,
+            "batches": self.batches,
+            "mean_batch_size": self.served / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "mean_latency_ms": 1000 * self.total_latency / self.served if self.served else 0.0,
+            "max_latency_ms": 1000 * self.max_latency,
+        }
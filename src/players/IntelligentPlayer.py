@@ -3,10 +3,11 @@ import numpy as np
 from numpy import ndarray
 
 from dealer.Card import Card
+from dealer.CardSet import iter_ids, ids_of
 from dealer.Deck import Deck
 from dealer.Logging import Logging
 from dealer.Utils import get_round_payoff
-from players.Player import Player, Bet
+from players.Player import Player
 from players.Enum import *
 from rlcard_env.game_state import GameState, NUMBER_OF_PARAMS, STATE, GameState2, CARD_STATE
 
@@ -25,8 +26,8 @@ class BaseIntelligentPlayer(Player):
     @property
     def action_mask(self):
         valid_actions = ACTION_SIZE * [False]
-        for c in self.deck:
-            valid_actions[c.id] = True
+        for card_id in iter_ids(self.deck.mask):
+            valid_actions[card_id] = True
         return valid_actions
 
     def begin_round(self, deck: Deck):
@@ -37,25 +38,15 @@ class BaseIntelligentPlayer(Player):
         self.observation.reset_state()
         for i in range(len(deck.cards)):
             self.observation1.set_state(STATE.MY_HAND, deck.cards[i].id, 1)
-            self.observation.set_state(deck.cards[i].id, CARD_STATE.MY_HAND)
-
-    def make_bet(self, previous_last_bets: List[Bet]) -> Bet:
-        """
-        :return: Pass / 100 < score < 165 / Shelem / Sar-Shelem / Super-Shelem
-         Base on a 12-card hand available
-         Score should be strictly > previous_last_bet
-        """
-        # TODO: NotImplemented
-        return Bet(self.player_id, SAFE_BET)
+        self.observation.set_states(iter_ids(deck.mask), CARD_STATE.MY_HAND)
 
     def decide_trump(self) -> SUITS:
         trump = super().decide_trump()
         # set new deck
-        for i in range(DECK_SIZE):
-            self.observation1.set_state(STATE.MY_HAND, i, 0)
+        self.observation1.clear(STATE.MY_HAND)
         for i in range(len(self.deck.cards)):
             self.observation1.set_state(STATE.MY_HAND, self.deck.cards[i].id, 1)
-            self.observation.set_state(self.deck.cards[i].id, CARD_STATE.MY_HAND)
+        self.observation.set_states(iter_ids(self.deck.mask), CARD_STATE.MY_HAND)
         # set widow cards
         widow_size = 4
         for i in range(widow_size):
@@ -73,7 +64,7 @@ class BaseIntelligentPlayer(Player):
             self.observation1.set_state(STATE.LEADER, i, int(i == hakem))
 
     def play_a_card(self, current_hand: List, current_suit: SUITS) -> Card:
-        return self.deck.pop_random_from_suit(current_suit)
+        return self.deck.pop_random_from_suit(current_suit, self.rng)
 
     def card_has_been_played(self, current_hand: List, current_suit: SUITS):
         for i in range(SUITS.SPADES):
@@ -101,47 +92,24 @@ class BaseIntelligentPlayer(Player):
             # add card to played cards
             self.observation1.set_state(STATE.PLAYED_CARDS, c.id, 1)
             self.observation.set_state(c.id, CARD_STATE.PLAYED)
-        max_crr_trick_num = 3
-        for i in range(max_crr_trick_num*DECK_SIZE):
-            self.observation1.set_state(STATE.CRR_TRICK, i, 0)
-        for i in range(SUITS.SPADES):
-            self.observation1.set_state(STATE.CRR_SUIT, i, 0)
+        self.observation1.clear(STATE.CRR_TRICK)
+        self.observation1.clear(STATE.CRR_SUIT)
 
     def get_valid_actions(self, current_suit):
         valid_actions = DECK_SIZE * [False]
-        valid_action_found = False
-        for c in self.deck.cards:
-            if self.deck.has_suit(current_suit):
-                if c.suit == current_suit:
-                    valid_actions[c.id] = True
-                    valid_action_found = True
-            else:
-                valid_actions[c.id] = True
-                valid_action_found = True
+        for card_id in iter_ids(self.deck.legal_mask(current_suit)):
+            valid_actions[card_id] = True
 
-        if not valid_action_found:
+        if len(self.deck) == 0:
             raise RuntimeError("No Valid action found")
         return np.array(valid_actions)
 
     def get_legal_actions(self, current_suit):
-        valid_actions = []
-        for c in self.deck.cards:
-            if self.deck.has_suit(current_suit):
-                if c.suit == current_suit:
-                    valid_actions.append(c.id)
-            else:
-                valid_actions.append(c.id)
-        return valid_actions
+        return ids_of(self.deck.legal_mask(current_suit))
 
     def get_legal_actions2(self, current_suit):
-        valid_actions = []
-        for idx, c in enumerate(self.deck.cards):
-            if self.deck.has_suit(current_suit):
-                if c.suit == current_suit:
-                    valid_actions.append(idx)
-            else:
-                valid_actions.append(idx)
-        return valid_actions
+        legal_mask = self.deck.legal_mask(current_suit)
+        return [idx for idx, c in enumerate(self.deck.cards) if (legal_mask >> c.id) & 1]
 
     def build_model(self):
         pass
@@ -159,6 +127,13 @@ class AgentPlayer(BaseIntelligentPlayer):
 
 
 class PPOPlayer(BaseIntelligentPlayer):
+    # rollout workers turn this off and ship self.memory to a central learner instead
+    train_inline = True
+    # an InferenceClient answering request_action instead of self.ppo.policy_old
+    inference = None
+
+    def set_inference_client(self, client):
+        self.inference = client
 
     def build_model(self):
         state_dim = NUMBER_OF_PARAMS
@@ -171,8 +146,8 @@ class PPOPlayer(BaseIntelligentPlayer):
         K_epochs = 4  # update policy for K epochs
         eps_clip = 0.2  # clip parameter for PPO
         #############################################
-        from players.PPO import Memory, PPO
-        self.memory = Memory()
+        from players.PPO import PPO, RolloutBuffer
+        self.memory = RolloutBuffer(state_dim, action_dim)
         self.ppo = PPO(state_dim, action_dim, n_latent_var, lr, betas, gamma, K_epochs, eps_clip)
 
     def play_a_card(self, current_hand: List, current_suit: SUITS) -> Card:
@@ -186,7 +161,7 @@ class PPOPlayer(BaseIntelligentPlayer):
         while invalid_card:
             try:
                 valid_actions = self.get_valid_actions(current_suit)
-                action = self.request_action(self.observation1, valid_actions)
+                action = self.request_action(self.observation.state, valid_actions)
                 selected_card = self.deck.get_by_value(action)
             except ValueError as err:
                 # print(err)
@@ -211,11 +186,14 @@ class PPOPlayer(BaseIntelligentPlayer):
 
     def set_reward(self, reward: float, done: bool):
         # print("reward: {}".format(reward))
-        self.memory.rewards.append(reward)
-        self.memory.is_terminals.append(done)
-
-    def request_action(self, game_state: List, valid_actions: ndarray):
-        action = self.ppo.policy_old.act(np.array(game_state), self.memory, valid_actions)
+        self.memory.add_reward(reward, done)
+
+    def request_action(self, game_state: ndarray, valid_actions: ndarray):
+        if self.inference is not None:
+            action, logprob = self.inference.act(game_state, valid_actions)
+            self.memory.add_action(game_state, action, logprob, valid_actions)
+            return action
+        action = self.ppo.policy_old.act(game_state, self.memory, valid_actions)
         # action = self.ppo.policy_old.act(np.array(game_state), self.memory)
         # idx = torch.argmax(self.ppo.policy_old.action_probs)
         # print("ideal card: {}".format(Card.description(idx.item())))
@@ -236,8 +214,9 @@ class PPOPlayer(BaseIntelligentPlayer):
         round_reward += self.reward
         round_reward = sorted((-1, (final_score1 - final_score2) / (2 * MAX_SCORE), 1))[1]
         self.set_reward(round_reward, True)
-        self.ppo.update(self.memory)
-        self.memory.clear_memory()
+        if self.train_inline:
+            self.ppo.update(self.memory)
+            self.memory.clear_memory()
 
     def end_trick(self, hand: List[Card], winner_id: int):
         super().end_trick(hand, winner_id)
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+import numpy as np
+
+from dealer.CardSet import FULL_MASK, SUIT_MASKS, ids_of
+from dealer.Logging import Logging
+from dealer.Solver import PLAYING_SUITS, TRICK_POINTS
+from players.Enum import GAMEMODE, DECK_SIZE, NUM_PLAYERS, NUM_SUITS, PLAYER_INITIAL_CARDS
+from players.Policy import hakem_discard
+from rlcard_env.batched_game import play_rounds
+
+GAME_MODES = tuple(GAMEMODE)
+
+
+def hand_signature(hand: int) -> Tuple[int, ...]:
+    """
+    the rank patterns of the suits of a hand in increasing order: hands which only differ by a renaming of their
+    suits share it, and every game mode treats them alike
+    """
+    return tuple(sorted(sum(1 << (card // NUM_SUITS) for card in ids_of(hand & SUIT_MASKS[suit]))
+                        for suit in PLAYING_SUITS))
+
+
+class ModeSelector:
+    """
+    Chooses the game mode of a hakem from its 16 cards. Every game mode is played with the hakem_discard of the mode
+    on the same num_samples layouts of the other hands, all of them at once by rlcard_env.batched_game.play_rounds,
+    and the mode whose team of the hakem takes the most points on average is chosen. The estimates are kept by
+    hand_signature, the most recently used capacity of them
+    """
+
+    def __init__(self, num_samples: int = 256, capacity: int = 1 << 16):
+        self.num_samples = num_samples
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        # stat variables
+        self.hits = 0
+        self.misses = 0
+        self.simulations = 0
+        self.search_time = 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def sims_per_sec(self) -> float:
+        return self.simulations / self.search_time if self.search_time else 0.0
+
+    def select(self, hand: int, seed) -> GAMEMODE:
+        """
+        :param hand: the 16 cards of the hakem, the widow included
+        :param seed: the seed of the layouts, e.g. drawn from the stream of the player
+        """
+        return GAME_MODES[int(np.argmax(self.evaluate(hand, seed)))]
+
+    def evaluate(self, hand: int, seed) -> np.ndarray:
+        """
+        :return: the points the team of the hakem is expected to take in each of GAME_MODES
+        """
+        signature = hand_signature(hand)
+        points = self.entries.get(signature)
+        if points is not None:
+            self.entries.move_to_end(signature)
+            self.hits += 1
+            return points
+        self.misses += 1
+        points = self.simulate(hand, seed)
+        self.entries[signature] = points
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return points
+
+    def simulate(self, hand: int, seed) -> np.ndarray:
+        t0 = time.perf_counter()
+        samples = self.num_samples
+        rng = np.random.default_rng(seed)
+        layouts = rng.permuted(np.tile(ids_of(FULL_MASK & ~hand), (samples, 1)), axis=1)
+        # the hakem at seat 0 and the other hands dealt alike for every mode
+        hands = np.zeros((len(GAME_MODES), samples, NUM_PLAYERS, DECK_SIZE), dtype=bool)
+        layout_rows = np.arange(samples)[:, None]
+        for seat in range(1, NUM_PLAYERS):
+            hands[:, layout_rows, seat, layouts[:, (seat - 1) * PLAYER_INITIAL_CARDS:seat * PLAYER_INITIAL_CARDS]] = True
+        hokm_suits = []
+        for i, game_mode in enumerate(GAME_MODES):
+            discard, hokm_suit = hakem_discard(hand, game_mode)
+            hands[i, :, 0, ids_of(hand & ~discard)] = True
+            hokm_suits.append(hokm_suit)
+        won = play_rounds(hands.reshape(-1, NUM_PLAYERS, DECK_SIZE), np.repeat(GAME_MODES, samples),
+                          np.repeat(hokm_suits, samples), np.zeros(len(GAME_MODES) * samples, dtype=np.int64))
+        # the discard is worth a trick
+        points = (won[:, 0] + won[:, 2] + 1) * TRICK_POINTS
+        points = points.reshape(len(GAME_MODES), samples).mean(axis=1)
+        elapsed = time.perf_counter() - t0
+        self.simulations += len(won)
+        self.search_time += elapsed
+        Logging.debug("game modes {} expected to take {} points, {} rounds in {:.3f}s".format(
+            [mode.name for mode in GAME_MODES], points.round(1).tolist(), len(won), elapsed))
+        return points
@@ -0,0 +1,303 @@
+import time
+from functools import partial
+from typing import List, Sequence
+
+import numpy as np
+from numpy.random import SeedSequence
+
+from dealer.Card import Card, CARD_SUITS, RANK_TABLE
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of
+from dealer.Deck import Deck
+from dealer.EndgameCache import EndgameCache, shared_cache
+from dealer.Logging import Logging
+from dealer.Simulator import RoundState, NO_CARD
+from dealer.Solver import TRICK_POINTS
+from dealer.Trick import TRICK_STRENGTH
+from dealer.Utils import WorkerPool, run_batches, spawn_seeds
+from players.Enum import DECK_SIZE, GAMEMODE, SUITS, NUM_PLAYERS, PLAYER_INITIAL_CARDS
+from players.Policy import Policy, RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+FULL_DECK = (1 << DECK_SIZE) - 1
+DISCARD_SIZE = 4
+# the hidden discard of the hakem is the fifth pile of a layout
+DISCARD = NUM_PLAYERS
+
+
+class Position:
+    """
+    What a seat knows of the round when it has to play, the picklable input of sample_layout and evaluate_samples
+    """
+    __slots__ = ("seat", "hand", "unseen", "sizes", "voids", "saved", "played", "trick", "trick_leader", "trick_size",
+                 "current_suit", "tricks_done", "game_mode", "hokm_suit", "hakem")
+
+    def __init__(self, seat: int, hand: int, game_mode: GAMEMODE, hokm_suit: SUITS, hakem: int):
+        self.seat = seat
+        self.hand = hand
+        self.game_mode = game_mode
+        self.hokm_suit = hokm_suit
+        self.hakem = hakem
+        # the cards nobody has shown, shared by the other hands and the discard
+        self.unseen = 0
+        # how many unseen cards every hand and the discard hold
+        self.sizes = [0] * (NUM_PLAYERS + 1)
+        # the cards every hand cannot hold because it failed to follow their suit
+        self.voids = [0] * (NUM_PLAYERS + 1)
+        self.saved = [0] * NUM_PLAYERS
+        self.played = 0
+        self.trick = [NO_CARD] * NUM_PLAYERS
+        self.trick_leader = seat
+        self.trick_size = 0
+        self.current_suit = SUITS.NOSUIT
+        self.tricks_done = 0
+
+
+class _ForcedCard(Policy):
+    """
+    plays the given card once and then hands over to policy
+    """
+
+    def __init__(self, card: int, policy: Policy):
+        self.card = card
+        self.policy = policy
+
+    def play_card(self, state: RoundState, seat: int) -> int:
+        card, self.card = self.card, NO_CARD
+        return self.policy.play_card(state, seat) if card == NO_CARD else card
+
+
+def sample_layout(position: Position, rng: np.random.Generator, attempts: int = 16) -> List[int]:
+    """
+    deals the unseen cards to the other hands and the discard, respecting the known voids. The cards fewer piles may
+    take are dealt first and every card goes to a pile with probability proportional to its free room, which keeps
+    the layouts close to uniform. Voids are dropped when they cannot be met, e.g. after a revoke
+    :return: the card-set mask of every hand, the seat's own hand included, and of the discard
+    """
+    cards = ids_of(position.unseen)
+    piles = [p for p in range(NUM_PLAYERS + 1) if position.sizes[p]]
+    for attempt in range(attempts + 1):
+        voids = position.voids if attempt < attempts else [0] * (NUM_PLAYERS + 1)
+        layout = [0] * (NUM_PLAYERS + 1)
+        layout[position.seat] = position.hand
+        free = list(position.sizes)
+        order = [cards[i] for i in rng.permutation(len(cards))]
+        order.sort(key=lambda c: sum(1 for p in piles if not voids[p] >> c & 1))
+        for card in order:
+            eligible = [p for p in piles if free[p] and not voids[p] >> card & 1]
+            if not eligible:
+                break
+            r = int(rng.integers(sum(free[p] for p in eligible)))
+            for pile in eligible:
+                r -= free[pile]
+                if r < 0:
+                    break
+            layout[pile] |= 1 << card
+            free[pile] -= 1
+        else:
+            return layout
+    raise RuntimeError("{} unseen cards do not fit hands of {}".format(len(cards), position.sizes))
+
+
+def round_state(position: Position, layout: Sequence[int]) -> RoundState:
+    """
+    the simulator state of a sampled layout, at the turn of position.seat
+    """
+    state = RoundState()
+    state.hands = list(layout[:NUM_PLAYERS])
+    state.saved = list(position.saved)
+    state.saved[position.hakem] |= layout[DISCARD]
+    state.discard = layout[DISCARD]
+    state.played = position.played
+    state.hakem = position.hakem
+    state.game_mode = position.game_mode
+    state.hokm_suit = position.hokm_suit
+    state.trick = list(position.trick)
+    state.trick_leader = position.trick_leader
+    state.trick_size = position.trick_size
+    state.current_player = position.seat
+    state.current_suit = position.current_suit
+    state.winner = position.trick_leader
+    if position.trick_size:
+        strength = TRICK_STRENGTH[position.game_mode][position.hokm_suit][CARD_SUITS[position.trick[
+            position.trick_leader]]]
+        for seat, card in enumerate(position.trick):
+            if card != NO_CARD and strength[card] > strength[position.trick[state.winner]]:
+                state.winner = seat
+    # only the number of finished tricks matters to play_tricks
+    state.tricks = [()] * position.tricks_done
+    return state
+
+
+def evaluate_layout(position: Position, layout: Sequence[int], candidates: Sequence[int], cache: EndgameCache,
+                    policy: Policy = None) -> List[int]:
+    """
+    :return: the points of the team of position.seat at the end of the round after each candidate card, solved
+    double dummy through cache for its last cache.max_tricks tricks and played by policy before
+    """
+    state = round_state(position, layout)
+    team = position.seat % 2
+    points = state.team_points()[team]
+    remaining_tricks = PLAYER_INITIAL_CARDS - position.tricks_done
+    if remaining_tricks <= cache.max_tricks:
+        solver = cache.solver(position.game_mode, position.hokm_suit)
+        leader = position.trick_leader
+        trick = [position.trick[(leader + k) % NUM_PLAYERS] for k in range(position.trick_size)]
+        values = solver.card_values(state.hands, leader, trick, position.current_suit)
+        if team:
+            return [points + remaining_tricks * TRICK_POINTS - values[card] for card in candidates]
+        return [points + values[card] for card in candidates]
+    policy = policy or RuleBasedPolicy()
+    results = []
+    for card in candidates:
+        rollout = state.copy()
+        policies = [policy] * NUM_PLAYERS
+        policies[position.seat] = _ForcedCard(card, policy)
+        results.append(cache.rollout(rollout, policies)[team])
+    return results
+
+
+def evaluate_samples(position: Position, candidates: Sequence[int], seeds: Sequence[SeedSequence],
+                     solver_tricks: int, endgame_path: str = None) -> np.ndarray:
+    """
+    the work of one batch, run in a worker process or in place. The layout of every sample only depends on its own
+    seed, so the result does not depend on how the samples were split into batches
+    :return: (len(seeds), len(candidates)) points of the team of position.seat
+    """
+    policy = RuleBasedPolicy()
+    cache = shared_cache(solver_tricks, endgame_path)
+    scores = np.zeros((len(seeds), len(candidates)))
+    for i, seed in enumerate(seeds):
+        layout = sample_layout(position, np.random.default_rng(seed))
+        scores[i] = evaluate_layout(position, layout, candidates, cache, policy)
+    cache.flush()
+    return scores
+
+
+class PIMCPlayer(RuleBasedPlayer, WorkerPool):
+    """
+    Perfect information Monte Carlo: at every card, deals the unseen cards in layouts consistent with the voids shown
+    so far and plays the card which takes the most points on average over them. Bidding and widowing are the ones of
+    RuleBasedPlayer.
+
+    The samples are evaluated in batches, in place or on a pool of num_workers spawned processes, until num_samples
+    are done or the time_budget of the decision (seconds) runs out. The samples of a decision are seeded from the
+    player stream, so a table with the same seed is replayed exactly as long as the budget is not hit. The last
+    solver_tricks tricks are solved double dummy through the EndgameCache of each process, which is kept in the
+    endgame_path sqlite file as well when it is given
+    """
+
+    def __init__(self, player_id, team_mate_player_id, num_samples: int = 32, time_budget: float = None,
+                 solver_tricks: int = 3, num_workers: int = 0, batch_size: int = 8, endgame_path: str = None):
+        super().__init__(player_id, team_mate_player_id)
+        self.num_samples = num_samples
+        self.time_budget = time_budget
+        self.solver_tricks = solver_tricks
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self.endgame_path = endgame_path
+        self.executor = None
+        # stat variables
+        self.decisions = 0
+        self.simulations = 0
+        self.search_time = 0.0
+
+        self.hakem = player_id
+        self.known_discard = 0
+        self.voids = [0] * NUM_PLAYERS
+        self.won = [0] * NUM_PLAYERS
+        self.trick_cards = [NO_CARD] * NUM_PLAYERS
+        self.trick_order = []
+        self.follow_suit = SUITS.NOSUIT
+
+    @property
+    def sims_per_sec(self) -> float:
+        """
+        layouts times candidate cards evaluated per second of search
+        """
+        return self.simulations / self.search_time if self.search_time else 0.0
+
+    def begin_round(self, deck: Deck):
+        super().begin_round(deck)
+        self.hakem = self.player_id
+        self.known_discard = 0
+        self.voids = [0] * NUM_PLAYERS
+        self.won = [0] * NUM_PLAYERS
+        self.trick_cards = [NO_CARD] * NUM_PLAYERS
+        self.trick_order = []
+
+    def set_hokm_and_game_mode(self, game_mode: GAMEMODE, hokm_suit: SUITS, hakem: int):
+        super().set_hokm_and_game_mode(game_mode, hokm_suit, hakem)
+        self.hakem = hakem
+        self.known_discard = self.saved_deck.mask if hakem == self.player_id else 0
+
+    def card_has_been_played(self, current_hand: List, current_suit: SUITS):
+        super().card_has_been_played(current_hand, current_suit)
+        for seat, card in enumerate(current_hand):
+            if card is None or self.trick_cards[seat] != NO_CARD:
+                continue
+            if self.trick_order:
+                suit = self.follow_suit
+            else:
+                # the hakem has to lead hokm in the first trick when possible
+                suit = self.hokm_suit if self.trick_number == 0 else SUITS.NOSUIT
+                # the suit the others are handed after the lead
+                self.follow_suit = current_suit
+            if suit != SUITS.NOSUIT and card.suit != suit:
+                self.voids[seat] |= SUIT_MASKS[suit]
+            self.trick_cards[seat] = card.id
+            self.trick_order.append(seat)
+
+    def end_trick(self, hand: List[Card], winner_id: int):
+        super().end_trick(hand, winner_id)
+        self.won[winner_id] |= mask_of(c.id for c in hand)
+        self.trick_cards = [NO_CARD] * NUM_PLAYERS
+        self.trick_order = []
+
+    def position(self, current_suit: SUITS) -> Position:
+        position = Position(self.player_id, self.deck.mask, self.game_mode, self.hokm_suit, self.hakem)
+        position.trick = list(self.trick_cards)
+        position.trick_size = len(self.trick_order)
+        position.trick_leader = self.trick_order[0] if self.trick_order else self.player_id
+        position.current_suit = current_suit
+        position.tricks_done = self.trick_number
+        position.played = self.played_mask
+        position.saved = list(self.won)
+        position.saved[self.hakem] |= self.known_discard
+        trick_mask = mask_of(card for card in self.trick_cards if card != NO_CARD)
+        position.unseen = FULL_DECK & ~(self.deck.mask | self.played_mask | trick_mask | self.known_discard)
+        for seat in range(NUM_PLAYERS):
+            if seat != self.player_id:
+                position.sizes[seat] = PLAYER_INITIAL_CARDS - self.trick_number - (seat in self.trick_order)
+        position.sizes[DISCARD] = DISCARD_SIZE if self.hakem != self.player_id else 0
+        position.voids[:NUM_PLAYERS] = self.voids
+        return position
+
+    def play_a_card(self, current_hand: List, current_suit: SUITS) -> Card:
+        candidates = ids_of(self.deck.legal_mask(current_suit))
+        if len(candidates) == 1:
+            return self.deck.pop_by_id(candidates[0])
+        scores = self.search(self.position(current_suit), candidates).mean(axis=0)
+        # the lowest of the equally good cards
+        ranks = RANK_TABLE[self.game_mode]
+        best = min((c for c, score in zip(candidates, scores) if score >= scores.max() - 1e-9), key=lambda c: ranks[c])
+        return self.deck.pop_by_id(best)
+
+    def search(self, position: Position, candidates: List[int]) -> np.ndarray:
+        """
+        :return: (samples, len(candidates)) points of the team for every evaluated layout, at least one batch of them
+        """
+        t0 = time.perf_counter()
+        seeds = spawn_seeds(int(self.rng.integers(2 ** 63)), self.num_samples)
+        batches = [seeds[i:i + self.batch_size] for i in range(0, len(seeds), self.batch_size)]
+        deadline = None if self.time_budget is None else t0 + self.time_budget
+        evaluate = partial(evaluate_samples, position, candidates, solver_tricks=self.solver_tricks,
+                           endgame_path=self.endgame_path)
+        results = run_batches(evaluate, batches, self.pool() if self.num_workers else None, deadline)
+        scores = np.concatenate(results)
+        elapsed = time.perf_counter() - t0
+        self.decisions += 1
+        self.simulations += scores.size
+        self.search_time += elapsed
+        Logging.debug("Player{} searched {} layouts of {} cards in {:.3f}s, {:.0f} sims/sec".format(
+            self.player_id, len(scores), len(candidates), elapsed, self.sims_per_sec))
+        return scores
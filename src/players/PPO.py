@@ -4,7 +4,6 @@ import torch.nn as nn
 from torch.distributions import Categorical
 
 from envs import ShelemEnv
-from players.Enum import DECK_SIZE
 
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 
@@ -16,6 +15,35 @@ class Memory:
         self.logprobs = []
         self.rewards = []
         self.is_terminals = []
+        self.masks = []
+
+    def __len__(self):
+        return len(self.actions)
+
+    def add_action(self, state, action: int, logprob: float, mask=None):
+        """
+        stores a decision, the state is copied since the observation buffer is reused by the encoder
+        :param mask: the legal actions the action was sampled from, None when it was sampled from all of them
+        """
+        self.states.append(torch.as_tensor(state, dtype=torch.float32).detach().clone())
+        self.actions.append(torch.as_tensor(action).detach())
+        self.logprobs.append(torch.as_tensor(logprob, dtype=torch.float32).detach())
+        if mask is not None:
+            self.masks.append(torch.as_tensor(np.asarray(mask, dtype=bool)))
+
+    def add_reward(self, reward: float, done: bool):
+        self.rewards.append(reward)
+        self.is_terminals.append(done)
+
+    def tensors(self):
+        """
+        :return: the states, actions, logprobs, rewards, is_terminals and masks stacked as tensors, masks is None
+        unless every action was stored with its mask
+        """
+        masks = torch.stack(self.masks) if self.masks and len(self.masks) == len(self.actions) else None
+        return (torch.stack(self.states), torch.stack(self.actions), torch.stack(self.logprobs),
+                torch.tensor(self.rewards, dtype=torch.float32), torch.tensor(self.is_terminals, dtype=torch.bool),
+                masks)
 
     def clear_memory(self):
         del self.actions[:]
@@ -23,10 +51,130 @@ class Memory:
         del self.logprobs[:]
         del self.rewards[:]
         del self.is_terminals[:]
+        del self.masks[:]
+
+
+class RolloutBuffer:
+    """
+    Memory with preallocated tensors, rows are overwritten in place so that nothing is allocated per decision.
+    The capacity doubles when a rollout does not fit, it then stays at that size across clear_memory calls
+    """
+
+    def __init__(self, state_dim: int, action_dim: int, capacity: int = 2048):
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+        self.size = 0
+        self.reward_size = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity: int):
+        self.capacity = capacity
+        self.states = torch.zeros(capacity, self.state_dim)
+        self.actions = torch.zeros(capacity, dtype=torch.long)
+        self.logprobs = torch.zeros(capacity)
+        self.rewards = torch.zeros(capacity)
+        self.is_terminals = torch.zeros(capacity, dtype=torch.bool)
+        self.masks = torch.ones(capacity, self.action_dim, dtype=torch.bool)
+
+    def reserve(self, size: int):
+        if size <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < size:
+            capacity *= 2
+        old = self.states, self.actions, self.logprobs, self.rewards, self.is_terminals, self.masks
+        self.allocate(capacity)
+        new = self.states, self.actions, self.logprobs, self.rewards, self.is_terminals, self.masks
+        for old_tensor, new_tensor in zip(old, new):
+            new_tensor[:len(old_tensor)] = old_tensor
+
+    def __len__(self):
+        return self.size
+
+    def add_action(self, state, action: int, logprob: float, mask=None):
+        self.reserve(self.size + 1)
+        i = self.size
+        self.states[i] = torch.as_tensor(state).detach()
+        self.actions[i] = int(action)
+        self.logprobs[i] = float(logprob)
+        if mask is not None:
+            self.masks[i] = torch.as_tensor(np.asarray(mask, dtype=bool))
+        self.size += 1
+
+    def add_reward(self, reward: float, done: bool):
+        self.reserve(self.reward_size + 1)
+        self.rewards[self.reward_size] = reward
+        self.is_terminals[self.reward_size] = done
+        self.reward_size += 1
+
+    def extend(self, states, actions, logprobs, rewards, is_terminals, masks=None):
+        """
+        appends whole trajectories, e.g. the ones sent by rollout workers
+        """
+        start, stop = self.size, self.size + len(actions)
+        self.reserve(max(stop, self.reward_size + len(rewards)))
+        self.states[start:stop] = states
+        self.actions[start:stop] = actions
+        self.logprobs[start:stop] = logprobs
+        self.masks[start:stop] = True if masks is None else masks
+        self.rewards[self.reward_size:self.reward_size + len(rewards)] = rewards
+        self.is_terminals[self.reward_size:self.reward_size + len(rewards)] = is_terminals
+        self.size = stop
+        self.reward_size += len(rewards)
+
+    def tensors(self):
+        """
+        :return: views of the filled rows of states, actions, logprobs, rewards, is_terminals and masks, rows
+        added without a mask are all legal
+        """
+        return (self.states[:self.size], self.actions[:self.size], self.logprobs[:self.size],
+                self.rewards[:self.reward_size], self.is_terminals[:self.reward_size], self.masks[:self.size])
+
+    def clear_memory(self):
+        self.size = 0
+        self.reward_size = 0
+        self.masks.fill_(True)
+
+
+def discounted_returns(rewards: torch.Tensor, is_terminals: torch.Tensor, gamma: float) -> torch.Tensor:
+    """
+    the Monte Carlo return of every step, episodes end at the terminal steps
+    """
+    return generalized_advantages(rewards, torch.zeros_like(rewards), is_terminals, gamma, 1.0)
+
+
+def generalized_advantages(rewards: torch.Tensor, values: torch.Tensor, is_terminals: torch.Tensor, gamma: float,
+                           lam: float) -> torch.Tensor:
+    """
+    GAE(gamma, lam) of every step, the value after the last step of the buffer is taken as 0.
+    The episodes are laid out as the rows of a padded [episodes, longest episode] matrix so that the backward
+    recursion runs once per step of the longest episode on all the episodes at once
+    """
+    n = len(rewards)
+    if n == 0:
+        return rewards.clone()
+    next_values = torch.cat([values[1:], values.new_zeros(1)]).masked_fill(is_terminals, 0.0)
+    deltas = rewards + gamma * next_values - values
+
+    ends = is_terminals.clone()
+    ends[-1] = True
+    episode = torch.cat([ends.new_zeros(1, dtype=torch.long), ends[:-1].long().cumsum(0)])
+    starts = torch.cat([ends.new_ones(1), ends[:-1]]).nonzero().squeeze(1)
+    position = torch.arange(n, device=rewards.device) - starts[episode]
+
+    length = int(position.max()) + 1
+    padded_deltas = deltas.new_zeros(len(starts), length)
+    padded_deltas[episode, position] = deltas
+    advantages = deltas.new_zeros(len(starts), length + 1)
+    for t in range(length - 1, -1, -1):
+        advantages[:, t] = padded_deltas[:, t] + gamma * lam * advantages[:, t + 1]
+    return advantages[episode, position]
+
 
 class ActorCritic(nn.Module):
     def __init__(self, state_dim, action_dim, n_latent_var):
         super().__init__()
+        self.n_latent_var = n_latent_var
 
         # actor
         self.action_layer = nn.Sequential(
@@ -56,9 +204,7 @@ class ActorCritic(nn.Module):
         dist = Categorical(action_probs)
         action = dist.sample()
 
-        memory.states.append(state)
-        memory.actions.append(action)
-        memory.logprobs.append(dist.log_prob(action))
+        memory.add_action(state, action, dist.log_prob(action))
 
         return action.item()
 
@@ -78,29 +224,55 @@ class MaskableActorCritic(ActorCritic):
 
     def act(self, state, memory, valid_actions):
         state = torch.from_numpy(state).float().to(device)
-        self.action_probs = self.action_layer(state)
-        # mask actions
-        # print(self.action_probs)
-        self.new_probs = torch.tensor(DECK_SIZE * [0.0]).to(device)
-        self.new_probs.masked_scatter_(torch.from_numpy(valid_actions).to(device), self.action_probs)
-        # print(self.new_probs)
-        dist = Categorical(self.new_probs)
-        action = dist.sample()
-
-        memory.states.append(state)
-        memory.actions.append(action)
-        memory.logprobs.append(dist.log_prob(action))
-
-        return action.item()
+        mask = torch.from_numpy(np.asarray(valid_actions, dtype=bool)).to(device)
+        actions, logprobs = self.act_batch(state.unsqueeze(0), mask.unsqueeze(0))
+
+        memory.add_action(state, actions[0], logprobs[0], valid_actions)
+
+        return actions.item()
+
+    @torch.no_grad()
+    def act_batch(self, states: torch.Tensor, masks: torch.Tensor):
+        """
+        samples one legal action per row
+        :param states: [B, state_dim] observations
+        :param masks: [B, action_dim] bool, True for the legal actions
+        :return: the actions and their log probabilities
+        """
+        dist = Categorical(logits=self.masked_logits(states, masks))
+        actions = dist.sample()
+        return actions, dist.log_prob(actions)
+
+    def masked_logits(self, states: torch.Tensor, masks: torch.Tensor) -> torch.Tensor:
+        """
+        the log probabilities of the policy restricted to the legal actions, -inf for the illegal ones
+        """
+        # the action layer without its final Softmax
+        logits = self.action_layer[:-1](states).masked_fill(~masks, float("-inf"))
+        return torch.log_softmax(logits, dim=-1)
+
+    def evaluate(self, state, action, masks=None):
+        """
+        :param masks: [B, action_dim] the legal actions of every step, the log probabilities and the entropy are
+        those of the masked distribution the actions were sampled from
+        """
+        if masks is None:
+            return super().evaluate(state, action)
+        dist = Categorical(logits=self.masked_logits(state, masks))
+        state_value = self.value_layer(state)
+        return dist.log_prob(action), torch.squeeze(state_value), dist.entropy()
 
 
 class PPO:
-    def __init__(self, state_dim, action_dim, n_latent_var, lr, betas, gamma, K_epochs, eps_clip):
+    def __init__(self, state_dim, action_dim, n_latent_var, lr, betas, gamma, K_epochs, eps_clip, minibatch_size=64,
+                 gae_lambda=0.95):
         self.lr = lr
         self.betas = betas
         self.gamma = gamma
         self.eps_clip = eps_clip
         self.K_epochs = K_epochs
+        self.minibatch_size = minibatch_size
+        self.gae_lambda = gae_lambda
         print("using device: {}".format(device))
 
         self.policy = MaskableActorCritic(state_dim, action_dim, n_latent_var).to(device)
@@ -111,42 +283,42 @@ class PPO:
         self.MseLoss = nn.MSELoss()
 
     def update(self, memory):
-        # Monte Carlo estimate of state rewards:
-        rewards = []
-        discounted_reward = 0
-        for reward, is_terminal in zip(reversed(memory.rewards), reversed(memory.is_terminals)):
-            if is_terminal:
-                discounted_reward = 0
-            discounted_reward = reward + (self.gamma * discounted_reward)
-            rewards.insert(0, discounted_reward)
-
-        # Normalizing the rewards:
-        rewards = torch.tensor(rewards, dtype=torch.float32).to(device)
-        rewards = (rewards - rewards.mean()) / (rewards.std() + 1e-5)
-
-        # convert list to tensor
-        old_states = torch.stack(memory.states).to(device).detach()
-        old_actions = torch.stack(memory.actions).to(device).detach()
-        old_logprobs = torch.stack(memory.logprobs).to(device).detach()
+        """
+        K_epochs of shuffled minibatch SGD on the clipped surrogate, the advantages are GAE(gamma, gae_lambda)
+        :param memory: a Memory or a RolloutBuffer with one reward per action
+        """
+        old_states, old_actions, old_logprobs, rewards, is_terminals, masks = \
+            (None if t is None else t.to(device) for t in memory.tensors())
+        if len(rewards) != len(old_actions):
+            raise ValueError("{} rewards for {} actions".format(len(rewards), len(old_actions)))
+
+        with torch.no_grad():
+            values = self.policy.value_layer(old_states).squeeze(-1)
+        advantages = generalized_advantages(rewards, values, is_terminals, self.gamma, self.gae_lambda)
+        returns = advantages + values
+        advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-5)
 
         # Optimize policy for K epochs:
+        n = len(old_actions)
         for _ in range(self.K_epochs):
-            # Evaluating old actions and values :
-            logprobs, state_values, dist_entropy = self.policy.evaluate(old_states, old_actions)
-
-            # Finding the ratio (pi_theta / pi_theta__old):
-            ratios = torch.exp(logprobs - old_logprobs.detach())
-
-            # Finding Surrogate Loss:
-            advantages = rewards - state_values.detach()
-            surr1 = ratios * advantages
-            surr2 = torch.clamp(ratios, 1-self.eps_clip, 1+self.eps_clip) * advantages
-            loss = -torch.min(surr1, surr2) + 0.5*self.MseLoss(state_values, rewards) - 0.01*dist_entropy
-
-            # take gradient step
-            self.optimizer.zero_grad()
-            loss.mean().backward()
-            self.optimizer.step()
+            for batch in torch.randperm(n, device=device).split(self.minibatch_size):
+                # Evaluating old actions and values :
+                logprobs, state_values, dist_entropy = self.policy.evaluate(
+                    old_states[batch], old_actions[batch], None if masks is None else masks[batch])
+
+                # Finding the ratio (pi_theta / pi_theta__old):
+                ratios = torch.exp(logprobs - old_logprobs[batch])
+
+                # Finding Surrogate Loss:
+                surr1 = ratios * advantages[batch]
+                surr2 = torch.clamp(ratios, 1-self.eps_clip, 1+self.eps_clip) * advantages[batch]
+                loss = -torch.min(surr1, surr2) + 0.5*self.MseLoss(state_values.view(-1), returns[batch]) \
+                    - 0.01*dist_entropy
+
+                # take gradient step
+                self.optimizer.zero_grad()
+                loss.mean().backward()
+                self.optimizer.step()
 
         # Copy new weights into old policy:
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -1,6 +1,8 @@
-import random
 from typing import Tuple, List
 
+import numpy as np
+from numpy.random import Generator
+
 from dealer.Card import Card
 from dealer.Deck import Deck
 from dealer.Utils import InvalidActionError
@@ -34,8 +36,15 @@ class Player:
         self.hokm_suit = SUITS.NOSUIT
         self.player_id = player_id
         self.team_mate_player_id = team_mate_player_id
+        self.rng = np.random.default_rng()
         self.trick_number = 0
         self.hakem_bid = 0
+        # a Bidding.BidEstimator which makes the bets instead of SAFE_BET when it is set
+        self.bid_estimator = None
+        # a Widowing.DiscardOptimizer which chooses the discard and the hokm instead of chance when it is set
+        self.discard_optimizer = None
+        # a ModeSelection.ModeSelector which chooses the game mode instead of SARAS when it is set
+        self.mode_selector = None
         # stat variables
         self.nl_double = 0
         self.l_shelem = 0
@@ -49,6 +58,12 @@ class Player:
     def __str__(self):
         return f"Player{self.player_id}"
 
+    def set_rng(self, rng: Generator):
+        """
+        gives the player its own stream of the table, see Utils.table_rngs
+        """
+        self.rng = rng
+
     def begin_round(self, deck: Deck):
         self.deck = deck
         self.game_has_begun = True
@@ -89,7 +104,7 @@ class Player:
             self.saved_deck += hand
 
     def play_random_card(self, current_hand: List, current_suit: SUITS) -> Card:
-        return self.deck.pop_random_from_suit(current_suit)
+        return self.deck.pop_random_from_suit(current_suit, self.rng)
 
     def pop_card_from_deck(self, card: int, current_suit: SUITS):
         try:
@@ -113,7 +128,11 @@ class Player:
 
     def decide_game_mode(self, middle_hand: Deck):
         self.deck += middle_hand
-        return GAMEMODE.SARAS
+        # the discard is chosen for the game mode of the round
+        self.game_mode = GAMEMODE.SARAS
+        if self.mode_selector is not None:
+            self.game_mode = self.mode_selector.select(self.deck.mask, int(self.rng.integers(2 ** 63)))
+        return self.game_mode
 
     def decide_trump(self) -> SUITS:
         """
@@ -141,7 +160,7 @@ class Player:
         :return: pops and plays the best available card in the current hand
         request action
         """
-        return self.deck.pop_random_from_suit(current_suit)
+        return self.deck.pop_random_from_suit(current_suit, self.rng)
 
     def make_bet(self, previous_last_bets: List[Bet]) -> Bet:
         """
@@ -149,26 +168,32 @@ class Player:
          Base on a 12-card hand available
          Score should be strictly > previous_last_bet
         """
-        # TODO: NotImplemented
+        if self.bid_estimator is not None:
+            last_bet = previous_last_bets[-1].bet if previous_last_bets else 0
+            return Bet(self.player_id, self.bid_estimator.bid(self.deck.mask, last_bet))
         return Bet(self.player_id, SAFE_BET)
-        choice = random.random()
+        choice = self.rng.random()
         if choice < 0.4:
             return Bet(self.player_id, 0)
         elif choice < 0.7:
-            return Bet(self.player_id, random.randint(20, 22) * 5)
+            return Bet(self.player_id, int(self.rng.integers(20, 23)) * 5)
         elif choice < 0.9:
-            return Bet(self.player_id, random.randint(23, 25) * 5)
+            return Bet(self.player_id, int(self.rng.integers(23, 26)) * 5)
         elif choice < 0.97:
-            return Bet(self.player_id, random.randint(26, 30) * 5)
+            return Bet(self.player_id, int(self.rng.integers(26, 31)) * 5)
         else:
-            return Bet(self.player_id, random.randint(31, 33) * 5)
+            return Bet(self.player_id, int(self.rng.integers(31, 34)) * 5)
 
     def discard_cards_from_leader(self) -> Tuple[Tuple[int, int, int, int], GAMEMODE, SUITS]:
         """
         if its a hakem hand, selects 4 indices out of 16 and removes them out of hand and saves them in saved_deck 
         :return: 
         """
-        return random.sample(range(16), 4), self.game_mode, self.deck.cards[0].suit
+        if self.discard_optimizer is not None:
+            discard, hokm_suit = self.discard_optimizer.optimize(self.deck.mask, self.game_mode,
+                                                                 int(self.rng.integers(2 ** 63)))
+            return [ind for ind in range(len(self.deck)) if discard >> self.deck[ind].id & 1], self.game_mode, hokm_suit
+        return self.rng.choice(16, 4, replace=False).tolist(), self.game_mode, self.deck.cards[0].suit
 
     def print_game_stat(self):
         print()
@@ -0,0 +1,212 @@
+from typing import List, Tuple
+
+from dealer.Card import CARD_SUITS, RANK_TABLE, compare_ids
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of, popcount
+from dealer.Simulator import RoundState, NO_CARD
+from dealer.Trick import HIGHER_CARDS
+from players.Enum import GAMEMODE, SUITS, SAFE_BET, NUM_PLAYERS, NUM_HOKM_CARDS
+
+
+class Policy:
+    """
+    Decision maker of the headless simulator, the flat-state counterpart of Player
+    """
+
+    def __init__(self, bid_estimator=None, discard_optimizer=None, mode_selector=None):
+        """
+        :param bid_estimator: a Bidding.BidEstimator which makes the bets instead of SAFE_BET, see Player.make_bet
+        :param discard_optimizer: a Widowing.DiscardOptimizer which chooses the discard and the hokm
+        :param mode_selector: a ModeSelection.ModeSelector which chooses the game mode
+        """
+        self.bid_estimator = bid_estimator
+        self.discard_optimizer = discard_optimizer
+        self.mode_selector = mode_selector
+
+    def make_bet(self, state: RoundState, seat: int, last_bets: List[Tuple[int, int]]) -> int:
+        if self.bid_estimator is not None:
+            return self.bid_estimator.bid(state.hands[seat], last_bets[-1][1] if last_bets else 0)
+        return SAFE_BET
+
+    def decide_game_mode(self, state: RoundState, seat: int) -> GAMEMODE:
+        """
+        called before the widow joins the hand of the hakem
+        """
+        if self.mode_selector is not None:
+            return self.mode_selector.select(state.hands[seat] | state.widow, int(state.rngs[seat].integers(2 ** 63)))
+        return GAMEMODE.SARAS
+
+    def discard_cards(self, state: RoundState, seat: int) -> Tuple[int, SUITS]:
+        """
+        same as Player.discard_cards_from_leader
+        :return: mask of the 4 discarded cards and the hokm suit
+        """
+        if self.discard_optimizer is not None:
+            return self.discard_optimizer.optimize(state.hands[seat], state.game_mode,
+                                                   int(state.rngs[seat].integers(2 ** 63)))
+        hand = ids_of(state.hands[seat])
+        discarding_indices = state.rngs[seat].choice(16, 4, replace=False)
+        return mask_of(hand[ind] for ind in discarding_indices), CARD_SUITS[hand[0]]
+
+    def play_card(self, state: RoundState, seat: int) -> int:
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """
+    Player.play_a_card
+    """
+
+    def play_card(self, state: RoundState, seat: int) -> int:
+        eligible = ids_of(state.legal_mask(seat))
+        return eligible[state.rngs[seat].integers(len(eligible))]
+
+
+class RuleBasedPolicy(Policy):
+    """
+    RuleBasedPlayer.play_a_card on a RoundState
+    """
+
+    def play_card(self, state: RoundState, seat: int) -> int:
+        turn = state.trick_size
+        if turn == 0:
+            return self.play_turn0(state, seat)
+        elif turn == 1:
+            return self.play_turn1(state, seat)
+        elif turn == 2:
+            return self.play_turn2(state, seat)
+        elif turn == 3:
+            return self.play_turn3(state, seat)
+        raise RuntimeError("Invalid turn")
+
+    @staticmethod
+    def is_best_card(state: RoundState, card: int) -> bool:
+        return HIGHER_CARDS[state.game_mode][card] & ~state.played == 0
+
+    @staticmethod
+    def should_play_hokm(state: RoundState, seat: int) -> bool:
+        hokm_mask = SUIT_MASKS[state.hokm_suit]
+        return popcount(state.played & hokm_mask) + popcount(state.hands[seat] & hokm_mask) != NUM_HOKM_CARDS
+
+    def play_turn0(self, state: RoundState, seat: int) -> int:
+        current_suit = state.current_suit
+        for c in reversed(ids_of(state.hands[seat])):
+            if current_suit == SUITS.NOSUIT or CARD_SUITS[c] == current_suit:
+                if self.is_best_card(state, c):
+                    if CARD_SUITS[c] == state.hokm_suit:
+                        if self.should_play_hokm(state, seat):
+                            return c
+                    else:
+                        return c
+        return self.play_lowest_card(state, seat)
+
+    def play_turn1(self, state: RoundState, seat: int) -> int:
+        hand = state.hands[seat]
+        current_suit = state.current_suit
+        if hand & SUIT_MASKS[current_suit]:
+            for c in reversed(ids_of(hand & SUIT_MASKS[current_suit])):
+                if self.is_best_card(state, c):
+                    return c
+        else:
+            best_card = self.best_card_in_trick(state)
+            for c in ids_of(hand):
+                if compare_ids(c, best_card, state.game_mode, state.hokm_suit, current_suit) > 0:
+                    return c
+        return self.play_lowest_card(state, seat)
+
+    def play_turn2(self, state: RoundState, seat: int) -> int:
+        hand = state.hands[seat]
+        game_mode, hokm_suit, current_suit = state.game_mode, state.hokm_suit, state.current_suit
+        teammate_card = state.trick[(seat + 2) % NUM_PLAYERS]
+        opponent_card = state.trick[(seat - 1 + NUM_PLAYERS) % NUM_PLAYERS]
+        if hand & SUIT_MASKS[current_suit]:
+            for c in reversed(ids_of(hand & SUIT_MASKS[current_suit])):
+                better_value = compare_ids(c, opponent_card, game_mode, hokm_suit, current_suit) > 0
+                teammate_difference = compare_ids(c, teammate_card, game_mode, hokm_suit, current_suit) > 1
+                if better_value and teammate_difference:
+                    return c
+        else:
+            is_teammate_good = self.is_best_card(state, teammate_card)
+            for c in ids_of(hand):
+                if is_teammate_good:
+                    has_opponent_boresh = compare_ids(
+                        opponent_card, teammate_card, game_mode, hokm_suit, current_suit) > 0
+                    better_boresh = compare_ids(c, opponent_card, game_mode, hokm_suit, current_suit) > 0
+                    if has_opponent_boresh and better_boresh:
+                        return c
+                else:
+                    my_boresh = compare_ids(c, teammate_card, game_mode, hokm_suit, current_suit) > 0
+                    better_boresh = compare_ids(c, opponent_card, game_mode, hokm_suit, current_suit) > 0
+                    if my_boresh and better_boresh:
+                        return c
+        return self.play_lowest_card(state, seat)
+
+    def play_turn3(self, state: RoundState, seat: int) -> int:
+        hand = state.hands[seat]
+        current_suit = state.current_suit
+        best_card = self.best_card_in_trick(state)
+        if state.trick[(seat + 2) % NUM_PLAYERS] == best_card:
+            return self.play_lowest_card(state, seat)
+        candidates = hand & SUIT_MASKS[current_suit] or hand
+        for c in ids_of(candidates):
+            if compare_ids(c, best_card, state.game_mode, state.hokm_suit, current_suit) > 0:
+                return c
+        return self.play_lowest_card(state, seat)
+
+    @staticmethod
+    def best_card_in_trick(state: RoundState) -> int:
+        """
+        scans the trick in seat order like RuleBasedPlayer.best_card_in_trick
+        """
+        best_card = NO_CARD
+        for c in state.trick:
+            if c == NO_CARD:
+                continue
+            if best_card == NO_CARD or compare_ids(c, best_card, state.game_mode, state.hokm_suit,
+                                                   state.current_suit) > 0:
+                best_card = c
+        return best_card
+
+    @staticmethod
+    def play_lowest_card(state: RoundState, seat: int) -> int:
+        hand = state.hands[seat]
+        suit_cards = hand & SUIT_MASKS[state.current_suit]
+        if suit_cards:
+            return (suit_cards & -suit_cards).bit_length() - 1
+        ranks = RANK_TABLE[state.game_mode]
+        worst_card = NO_CARD
+        for c in ids_of(hand):
+            if worst_card == NO_CARD or ranks[c] < ranks[worst_card]:
+                worst_card = c
+        return worst_card
+
+
+def hakem_discard(hand: int, game_mode: GAMEMODE) -> Tuple[int, SUITS]:
+    """
+    the longest suit of a 16-card hand as hokm, the stronger one in the ranks of game_mode between suits as long as
+    each other, and the lowest cards of the shortest other suits as discard, keeping the highest card of each suit as
+    long as it can
+    :return: mask of the 4 discarded cards and the hokm suit
+    """
+    ranks = RANK_TABLE[game_mode]
+    suit_cards = [sorted(ids_of(hand & SUIT_MASKS[suit]), key=ranks.__getitem__) for suit in range(len(SUITS) + 1)]
+    hokm_suit = max(SUITS.DIAMONDS, SUITS.CLUBS, SUITS.HEARTS, SUITS.SPADES,
+                    key=lambda suit: (len(suit_cards[suit]), [ranks[c] for c in reversed(suit_cards[suit])]))
+    order = sorted(ids_of(hand), key=lambda c: (CARD_SUITS[c] == hokm_suit, c == suit_cards[CARD_SUITS[c]][-1],
+                                                len(suit_cards[CARD_SUITS[c]]), ranks[c]))
+    return mask_of(order[:4]), hokm_suit
+
+
+class HakemPolicy(RuleBasedPolicy):
+    """
+    RuleBasedPolicy which plays its contracts in NORMAL unless a mode_selector is set and widows with hakem_discard
+    """
+
+    def decide_game_mode(self, state: RoundState, seat: int) -> GAMEMODE:
+        if self.mode_selector is not None:
+            return super().decide_game_mode(state, seat)
+        return GAMEMODE.NORMAL
+
+    def discard_cards(self, state: RoundState, seat: int) -> Tuple[int, SUITS]:
+        if self.discard_optimizer is not None:
+            return super().discard_cards(state, seat)
+        return hakem_discard(state.hands[seat], state.game_mode)
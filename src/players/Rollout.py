@@ -0,0 +1,162 @@
+import queue
+import time
+from typing import Callable, List, Union
+
+import torch
+import torch.multiprocessing as mp
+from numpy.random import SeedSequence
+
+from dealer.Game import Game
+from dealer.Logging import Logging
+from dealer.Utils import spawn_seeds
+from players.Enum import ACTION_DIM
+from players.IntelligentPlayer import PPOPlayer
+from players.Player import Player
+from players.PPO import PPO, Memory, MaskableActorCritic, RolloutBuffer
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game_state import NUMBER_OF_PARAMS
+
+
+def default_players() -> List[Player]:
+    return [PPOPlayer(0, 2), RuleBasedPlayer(1, 3), RuleBasedPlayer(2, 0), RuleBasedPlayer(3, 1)]
+
+
+class Trajectory:
+    """
+    the memory of one PPO seat over a few rounds as stacked tensors, cheap to send through a torch queue
+    since torch moves the tensor storages to shared memory
+    """
+
+    def __init__(self, memory: Union[Memory, RolloutBuffer]):
+        # the rows of a RolloutBuffer are overwritten by the next rounds
+        self.states, self.actions, self.logprobs, self.rewards, self.is_terminals, self.masks = \
+            (None if t is None else t.detach().clone() for t in memory.tensors())
+
+    def __len__(self):
+        return len(self.actions)
+
+    def extend_memory(self, memory: RolloutBuffer):
+        memory.extend(self.states, self.actions, self.logprobs, self.rewards, self.is_terminals, self.masks)
+
+
+def rollout_worker(worker_id: int, shared_policy: MaskableActorCritic, version, weights_lock, trajectories: mp.Queue,
+                   stop_event, players_factory: Callable[[], List[Player]], rounds_per_trajectory: int,
+                   seed: SeedSequence):
+    """
+    plays rounds with a frozen copy of the shared policy and streams every PPO seat memory back to the learner,
+    the local copy is refreshed whenever the learner publishes new weights
+    :param seed: the child seed of this worker, it seeds the table streams and torch sampling
+    """
+    torch.set_num_threads(1)
+    torch.manual_seed(int(seed.generate_state(1)[0]))
+    Logging.verbose = 0
+
+    players = players_factory()
+    policy = MaskableActorCritic(NUMBER_OF_PARAMS, ACTION_DIM, shared_policy.n_latent_var)
+    ppo_players = [p for p in players if isinstance(p, PPOPlayer)]
+    for p in ppo_players:
+        p.train_inline = False
+        p.ppo.policy_old = policy
+    game = Game(players, seed)
+    local_version = -1
+    while not stop_event.is_set():
+        if local_version != version.value:
+            with weights_lock:
+                policy.load_state_dict(shared_policy.state_dict())
+                local_version = version.value
+        for _ in range(rounds_per_trajectory):
+            game.play_a_round()
+        for p in ppo_players:
+            trajectories.put((worker_id, local_version, Trajectory(p.memory)))
+            p.memory.clear_memory()
+
+
+class RolloutLearner:
+    """
+    Central PPO learner fed by a pool of self-play rollout workers. Workers play with a frozen copy of policy_old
+    and stream trajectories back, the learner batches them into one PPO.update and broadcasts the new weights
+    through a shared-memory copy of the policy
+    """
+
+    def __init__(self, ppo: PPO, num_workers: int = None, players_factory: Callable[[], List[Player]] = None,
+                 rounds_per_trajectory: int = 4, trajectories_per_update: int = None, seed: int = 0):
+        self.ppo = ppo
+        self.num_workers = num_workers or max(1, mp.cpu_count() - 1)
+        self.players_factory = players_factory or default_players
+        self.rounds_per_trajectory = rounds_per_trajectory
+        self.trajectories_per_update = trajectories_per_update or self.num_workers
+        self.seed = seed
+
+        self.context = mp.get_context("spawn")
+        self.shared_policy = MaskableActorCritic(NUMBER_OF_PARAMS, ACTION_DIM, ppo.policy.n_latent_var)
+        self.shared_policy.load_state_dict(ppo.policy_old.state_dict())
+        self.shared_policy.share_memory()
+        self.version = self.context.Value("i", 0)
+        self.weights_lock = self.context.Lock()
+        self.trajectories = self.context.Queue(maxsize=4 * self.num_workers)
+        self.stop_event = self.context.Event()
+        self.workers = []
+        # reused by every collect, it grows to the size of the largest update once
+        self.memory = RolloutBuffer(NUMBER_OF_PARAMS, ACTION_DIM)
+
+        self.updates = 0
+        self.steps = 0
+        self.stale_trajectories = 0
+
+    def start(self):
+        worker_seeds = spawn_seeds(self.seed, self.num_workers)
+        for worker_id in range(self.num_workers):
+            worker = self.context.Process(
+                target=rollout_worker, daemon=True,
+                args=(worker_id, self.shared_policy, self.version, self.weights_lock, self.trajectories,
+                      self.stop_event, self.players_factory, self.rounds_per_trajectory, worker_seeds[worker_id]))
+            worker.start()
+            self.workers.append(worker)
+
+    def collect(self, timeout: float = 60) -> RolloutBuffer:
+        memory = self.memory
+        memory.clear_memory()
+        for _ in range(self.trajectories_per_update):
+            worker_id, worker_version, trajectory = self.trajectories.get(timeout=timeout)
+            if worker_version != self.version.value:
+                self.stale_trajectories += 1
+            trajectory.extend_memory(memory)
+        return memory
+
+    def publish(self):
+        with self.weights_lock:
+            self.shared_policy.load_state_dict(self.ppo.policy_old.state_dict())
+            self.version.value += 1
+
+    def train(self, num_updates: int):
+        if not self.workers:
+            self.start()
+        t0 = time.time()
+        for _ in range(num_updates):
+            memory = self.collect()
+            self.ppo.update(memory)
+            self.publish()
+            self.updates += 1
+            self.steps += len(memory)
+            Logging.info("update {:05d}: {} steps, {:.0f} steps/sec, {} stale trajectories".format(
+                self.updates, len(memory), self.steps / (time.time() - t0), self.stale_trajectories))
+
+    def close(self):
+        self.stop_event.set()
+        # drain the queue so that blocked workers can see the stop event, the storages of trajectories sent by
+        # workers which have already exited cannot be received anymore
+        while any(w.is_alive() for w in self.workers):
+            try:
+                self.trajectories.get(timeout=0.1)
+            except (queue.Empty, OSError):
+                pass
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
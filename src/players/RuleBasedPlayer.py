@@ -1,8 +1,9 @@
 from typing import Tuple, List
 from collections import Counter
 
-from dealer.Card import Card
+from dealer.Card import Card, RANK_TABLE
 from dealer.Deck import Deck
+from dealer.Trick import HIGHER_CARDS
 from players.IntelligentPlayer import IntelligentPlayer
 from players.Enum import *
 
@@ -11,18 +12,19 @@ class RuleBasedPlayer(IntelligentPlayer):
     def begin_round(self, deck: Deck):
         super().begin_round(deck)
         self.played_cards = ([], [], [], [], [])
+        self.played_mask = 0
 
     def end_trick(self, hand: List[Card], winner_id: int):
         super().end_trick(hand, winner_id)
         for c in hand:
             self.played_cards[c.suit].append(c.value)
+            self.played_mask |= 1 << c.id
 
     def discard_cards_from_leader_advanced(self) -> Tuple[Tuple[int, int, int, int], GAMEMODE, SUITS]:
         """
         if its a hakem hand, selects 4 indices out of 16 and removes them out of hand and saves them in saved_deck 
         :return: 
         """
-        self.deck._cards = sorted(self.deck._cards)
         cnts = Counter()
         mappings = {}
         for ind, card in enumerate(self.deck._cards):
@@ -137,30 +139,18 @@ class RuleBasedPlayer(IntelligentPlayer):
         for c in self.deck.cards:
             if c.suit == current_suit:
                 return c
+        ranks = RANK_TABLE[self.game_mode]
         worst_card = None
         for c in self.deck.cards:
-            if worst_card is None:
+            if worst_card is None or ranks[c.id] < ranks[worst_card.id]:
                 worst_card = c
-            else:
-                worst_value = worst_card.value.value.get_value(self.game_mode)
-                current_value = c.value.value.get_value(self.game_mode)
-                if current_value < worst_value:
-                    worst_card = c
         return worst_card
 
     def is_this_the_best_card(self, card: Card):
-        for value in VALUES:
-            has_better_value = card.value.value.get_value(self.game_mode) < value.value.get_value(self.game_mode)
-            has_not_been_played = value not in self.played_cards[card.suit]
-            if has_better_value and has_not_been_played:
-                return False
-        return True
+        return HIGHER_CARDS[self.game_mode][card.id] & ~self.played_mask == 0
 
     def should_play_hokm(self):
-        my_hokm_count = 0
-        for c in self.deck.cards:
-            if c.suit == self.hokm_suit:
-                my_hokm_count += 1
+        my_hokm_count = self.deck.suit_count(self.hokm_suit)
         if len(self.played_cards[self.hokm_suit]) + my_hokm_count == NUM_HOKM_CARDS:
             return False
         return True
@@ -0,0 +1,142 @@
+import itertools
+import math
+import time
+from functools import partial
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from numpy.random import SeedSequence
+
+from dealer.Card import RANK_TABLE
+from dealer.CardSet import FULL_MASK, SUIT_MASKS, ids_of, mask_of
+from dealer.EndgameCache import shared_cache
+from dealer.Logging import Logging
+from dealer.Simulator import RoundState
+from dealer.Solver import PLAYING_SUITS
+from dealer.Utils import WorkerPool, run_batches, spawn_seeds
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS, PLAYER_INITIAL_CARDS, SAFE_BET
+from players.PIMCPlayer import DISCARD_SIZE
+from players.Policy import RuleBasedPolicy
+
+# a discard of the hakem and the hokm it plays with
+Option = Tuple[int, SUITS]
+
+
+def candidate_discards(hand: int, game_mode: GAMEMODE) -> List[int]:
+    """
+    The discards of a 16-card hand worth trying. Keeping a card of a suit rather than a higher one in the ranks of
+    game_mode is dominated but for rare unblocking plays, so every suit is discarded from its lowest card: at most 35
+    discards out of the 1820 sets of 4 cards
+    """
+    ranks = RANK_TABLE[game_mode]
+    suits = [sorted(ids_of(hand & SUIT_MASKS[suit]), key=ranks.__getitem__) for suit in PLAYING_SUITS]
+    discards = []
+    for counts in itertools.product(*(range(min(len(cards), DISCARD_SIZE) + 1) for cards in suits)):
+        if sum(counts) == DISCARD_SIZE:
+            discards.append(mask_of(card for cards, count in zip(suits, counts) for card in cards[:count]))
+    return discards
+
+
+def evaluate_options(hand: int, game_mode: GAMEMODE, options: Sequence[Option], seeds: Sequence[SeedSequence],
+                     solver_tricks: int) -> np.ndarray:
+    """
+    plays every option on the layout of the other three hands drawn from each seed, the hakem at seat 0 leading the
+    first trick and RuleBasedPolicy at every seat. A layout only depends on its own seed, so all the options are
+    compared on the same layouts whatever the batches are
+    :return: (len(seeds), len(options)) points of the team of the hakem
+    """
+    policies = [RuleBasedPolicy()] * NUM_PLAYERS
+    cache = shared_cache(solver_tricks)
+    unseen = ids_of(FULL_MASK & ~hand)
+    points = np.empty((len(seeds), len(options)))
+    for i, seed in enumerate(seeds):
+        cards = np.random.default_rng(seed).permutation(unseen).tolist()
+        others = [mask_of(cards[k * PLAYER_INITIAL_CARDS:(k + 1) * PLAYER_INITIAL_CARDS]) for k in range(3)]
+        for j, (discard, hokm_suit) in enumerate(options):
+            state = RoundState()
+            state.hands = [hand & ~discard] + others
+            state.saved[0] = state.discard = discard
+            state.bets = [(0, SAFE_BET)]
+            state.game_mode = game_mode
+            state.hokm_suit = state.current_suit = hokm_suit
+            points[i, j] = cache.rollout(state, policies)[0]
+    cache.flush()
+    return points
+
+
+class DiscardOptimizer(WorkerPool):
+    """
+    Chooses the discard and the hokm of a hakem among the candidate_discards and the four suits by successive halving:
+    all the options are played on num_samples layouts of the unseen cards, the best keep fraction of them go on to
+    as many new layouts as have been played so far, and so on until a single option is left, max_samples layouts
+    have been played or the time_budget (seconds) runs out after the first round.
+
+    The layouts are split in batches of batch_size, played in place or on a pool of num_workers spawned processes,
+    and are all seeded from the seed of the decision, so the choice does not depend on the workers. The last
+    solver_tricks tricks are solved double dummy through the EndgameCache of each process
+    """
+
+    def __init__(self, num_samples: int = 8, keep: float = 0.25, max_samples: int = 128, time_budget: float = None,
+                 solver_tricks: int = 0, num_workers: int = 0, batch_size: int = 8):
+        self.num_samples = num_samples
+        self.keep = keep
+        self.max_samples = max_samples
+        self.time_budget = time_budget
+        self.solver_tricks = solver_tricks
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self.executor = None
+        # stat variables
+        self.decisions = 0
+        self.simulations = 0
+        self.search_time = 0.0
+
+    @property
+    def sims_per_sec(self) -> float:
+        return self.simulations / self.search_time if self.search_time else 0.0
+
+    def optimize(self, hand: int, game_mode: GAMEMODE, seed) -> Option:
+        """
+        :param hand: the 16 cards of the hakem, the widow included
+        :param seed: the seed of the layouts, e.g. drawn from the stream of the player
+        :return: the mask of the 4 cards to discard and the hokm suit
+        """
+        t0 = time.perf_counter()
+        deadline = None if self.time_budget is None else t0 + self.time_budget
+        options = [(discard, hokm_suit) for discard in candidate_discards(hand, game_mode)
+                   for hokm_suit in PLAYING_SUITS]
+        seeds = spawn_seeds(seed, self.max_samples)
+        alive = np.arange(len(options))
+        totals = np.zeros(len(options))
+        played = 0
+        simulations = 0
+        while True:
+            new_seeds = seeds[played:played + max(played, self.num_samples)]
+            points = self.evaluate(hand, game_mode, [options[i] for i in alive], new_seeds,
+                                   None if played == 0 else deadline)
+            totals[alive] += points.sum(0)
+            played += len(points)
+            simulations += points.size
+            if len(alive) == 1 or played == len(seeds) or len(points) < len(new_seeds) or \
+                    (deadline is not None and time.perf_counter() > deadline):
+                break
+            order = np.argsort(-totals[alive], kind="stable")
+            alive = alive[order[:max(1, math.ceil(len(alive) * self.keep))]]
+        best = alive[np.argmax(totals[alive])]
+        elapsed = time.perf_counter() - t0
+        self.decisions += 1
+        self.simulations += simulations
+        self.search_time += elapsed
+        Logging.debug("{} of {} discards left after {} rollouts in {:.3f}s, {:.0f} sims/sec".format(
+            len(alive), len(options), simulations, elapsed, self.sims_per_sec))
+        return options[best]
+
+    def evaluate(self, hand: int, game_mode: GAMEMODE, options: List[Option], seeds: Sequence[SeedSequence],
+                 deadline: float = None) -> np.ndarray:
+        """
+        :return: (layouts, len(options)) points of the team of the hakem on a prefix of seeds, the whole of them
+        unless the perf_counter deadline comes, at least one batch of them
+        """
+        batches = [seeds[i:i + self.batch_size] for i in range(0, len(seeds), self.batch_size)]
+        evaluate = partial(evaluate_options, hand, game_mode, options, solver_tricks=self.solver_tricks)
+        return np.concatenate(run_batches(evaluate, batches, self.pool() if self.num_workers else None, deadline))
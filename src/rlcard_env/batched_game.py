@@ -0,0 +1,296 @@
+import numpy as np
+
+from dealer.Card import RANK_TABLE
+from dealer.Trick import TRICK_STRENGTH, HIGHER_CARDS
+from dealer.Utils import InvalidActionError
+from players.Enum import NUM_PLAYERS, DECK_SIZE, NUM_SUITS, SUITS, GAMEMODE, SAFE_BET, MAX_SCORE, \
+    PLAYER_INITIAL_CARDS, NUM_HOKM_CARDS
+from rlcard_env.game_state import NUMBER_OF_PARAMS, CARD_STATE
+
+NO_CARD = -1
+
+# STRENGTH[game_mode, hokm_suit, lead_suit, card_id], see dealer.Trick.TRICK_STRENGTH
+STRENGTH = np.zeros((len(GAMEMODE) + 1, len(SUITS) + 1, len(SUITS) + 1, DECK_SIZE), dtype=np.int8)
+for _mode in GAMEMODE:
+    for _hokm in SUITS:
+        for _lead in SUITS:
+            STRENGTH[_mode, _hokm, _lead] = TRICK_STRENGTH[_mode][_hokm][_lead]
+
+# RANKS[game_mode, card_id], see dealer.Card.RANK_TABLE
+RANKS = np.zeros((len(GAMEMODE) + 1, DECK_SIZE), dtype=np.int8)
+# HIGHER[game_mode, card_id, other] is True if other is of the suit of card_id and beats it, see HIGHER_CARDS
+HIGHER = np.zeros((len(GAMEMODE) + 1, DECK_SIZE, DECK_SIZE), dtype=bool)
+for _mode in GAMEMODE:
+    RANKS[_mode] = RANK_TABLE[_mode]
+    for _card in range(DECK_SIZE):
+        HIGHER[_mode, _card] = [(HIGHER_CARDS[_mode][_card] >> _other) & 1 for _other in range(DECK_SIZE)]
+# a hokm card of NORMAL is kept rather than any other card when a card has to be thrown away, ranks are below it
+HOKM_KEEP = NUM_HOKM_CARDS + 1
+
+# SUIT_MATRIX[suit, card_id] is True if the card is of that suit, the NOSUIT row is empty
+SUIT_MATRIX = np.zeros((len(SUITS) + 1, DECK_SIZE), dtype=bool)
+for _suit in range(1, NUM_SUITS + 1):
+    SUIT_MATRIX[_suit, _suit - 1::NUM_SUITS] = True
+CARD_SUIT = np.arange(DECK_SIZE) % NUM_SUITS + 1
+
+# position of a card in a dealt permutation -> deck number of Deck.deal, -1 for the middle deck
+DEAL_DECK = np.array([0] * 12 + [1] * 12 + [2] * 12 + [-1] * 4 + [3] * 12)
+
+
+def get_round_payoffs(hakem: np.ndarray, bet: np.ndarray, team1_score: np.ndarray, team2_score: np.ndarray):
+    """
+    dealer.Utils.get_round_payoff on arrays of rounds
+    :return: final score of team 1 and team 2
+    """
+    team1_hakem = (hakem % 2) == 0
+    score1 = np.select(
+        [team2_score == 0, team1_score >= bet, team1_score > team2_score], [2 * bet, bet, -bet], -2 * bet)
+    score2 = np.select(
+        [team1_score == 0, team2_score >= bet, team2_score > team1_score], [2 * bet, bet, -bet], -2 * bet)
+    final1 = np.where(team1_hakem, score1, team1_score)
+    final2 = np.where(team1_hakem, team2_score, score2)
+    return final1, final2
+
+
+def play_rounds(hands: np.ndarray, game_modes: np.ndarray, hokm_suits: np.ndarray, leaders: np.ndarray) -> np.ndarray:
+    """
+    Plays N rounds from their first lead to their last trick together, every seat following the same greedy rule:
+    lead the highest card if nobody else holds a higher one of its suit and the lowest card otherwise, take the trick
+    with the cheapest card which does unless the partner already wins it, else throw the lowest card, a hokm of
+    NORMAL last. Every table has its own game mode and hokm, the rules come from the RANKS, HIGHER and STRENGTH tables
+    :param hands: bool[N, 4, 52] the 12 cards of every seat, they are played
+    :param leaders: the seat of the hakem who leads the first trick, of which hokm is the suit to follow
+    :return: int[N, 4] the tricks taken by every seat
+    """
+    n = len(hands)
+    rows = np.arange(n)
+    ranks = RANKS[game_modes]
+    throw_keys = ranks + HOKM_KEEP * (SUIT_MATRIX[hokm_suits] & (game_modes == GAMEMODE.NORMAL)[:, None])
+    played = np.zeros((n, DECK_SIZE), dtype=bool)
+    trick = np.full((n, NUM_PLAYERS), NO_CARD, dtype=np.int64)
+    won = np.zeros((n, NUM_PLAYERS), dtype=np.int64)
+    current = np.asarray(leaders, dtype=np.int64).copy()
+    winner = current.copy()
+    lead_suit = np.asarray(hokm_suits, dtype=np.int64).copy()
+    for trick_number in range(PLAYER_INITIAL_CARDS):
+        for turn in range(NUM_PLAYERS):
+            hand = hands[rows, current]
+            if turn == 0 and trick_number > 0:
+                legal = hand
+            else:
+                follow = hand & SUIT_MATRIX[lead_suit]
+                legal = np.where(follow.any(axis=1, keepdims=True), follow, hand)
+            lowest = np.argmin(np.where(legal, throw_keys, np.iinfo(np.int64).max), axis=1)
+            if turn == 0:
+                highest = np.argmax(np.where(legal, ranks, -1), axis=1)
+                others = ~played & ~hand
+                best = ~(HIGHER[game_modes, highest] & others).any(axis=1)
+                cards = np.where(best, highest, lowest)
+                lead_suit = CARD_SUIT[cards]
+                winner = current.copy()
+            else:
+                strength = STRENGTH[game_modes, hokm_suits, lead_suit]
+                winning = strength[rows, trick[rows, winner]]
+                beats = legal & (strength > winning[:, None])
+                cheapest = np.argmin(np.where(beats, strength, np.iinfo(np.int8).max), axis=1)
+                take = beats.any(axis=1) & (winner != (current + 2) % NUM_PLAYERS)
+                cards = np.where(take, cheapest, lowest)
+                # the lowest card may beat the partner all the same
+                winner = np.where(strength[rows, cards] > winning, current, winner)
+            hands[rows, current, cards] = False
+            trick[rows, current] = cards
+            current = (current + 1) % NUM_PLAYERS
+        won[rows, winner] += 1
+        played[rows[:, None], trick] = True
+        current = winner
+    return won
+
+
+class BatchedShelemGame:
+    """
+    N Shelem tables stepped together with NumPy. The agent sits at agent_id on every table and the other seats play
+    a uniformly random legal card (Player.play_a_card). Bidding, game mode and widowing follow Player defaults:
+    everybody bets SAFE_BET so the first bidder becomes hakem, discards 4 random cards and picks the suit of its
+    lowest card as hokm.
+    """
+
+    def __init__(self, num_envs: int, agent_id: int = 0, seed=None, game_mode=GAMEMODE.SARAS):
+        self.num_envs = num_envs
+        self.agent_id = agent_id
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(num_envs)
+        self.game_modes = np.broadcast_to(np.asarray(game_mode, dtype=np.int64), (num_envs,)).copy()
+
+        self.hands = np.zeros((num_envs, NUM_PLAYERS, DECK_SIZE), dtype=bool)
+        self.played = np.zeros((num_envs, DECK_SIZE), dtype=bool)
+        self.discarded = np.zeros((num_envs, DECK_SIZE), dtype=bool)
+        self.trick = np.full((num_envs, NUM_PLAYERS), NO_CARD, dtype=np.int64)
+        self.trick_size = np.zeros(num_envs, dtype=np.int64)
+        self.lead_suit = np.full(num_envs, SUITS.NOSUIT, dtype=np.int64)
+        self.winner = np.zeros(num_envs, dtype=np.int64)
+        self.current_player = np.zeros(num_envs, dtype=np.int64)
+        self.tricks_played = np.zeros(num_envs, dtype=np.int64)
+        self.saved_count = np.zeros((num_envs, NUM_PLAYERS), dtype=np.int64)
+        self.first_hand = np.zeros(num_envs, dtype=np.int64)
+        self.hakem = np.zeros(num_envs, dtype=np.int64)
+        self.bet = np.full(num_envs, SAFE_BET, dtype=np.int64)
+        self.hokm_suit = np.full(num_envs, SUITS.NOSUIT, dtype=np.int64)
+
+        self.team_1_score = np.zeros(num_envs, dtype=np.int64)
+        self.team_2_score = np.zeros(num_envs, dtype=np.int64)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.round_finished = np.zeros(num_envs, dtype=bool)
+        self.round_counter = 0
+
+    def reset(self):
+        """
+        deals a new round on every table
+        :return: obs[N, NUMBER_OF_PARAMS], legal_mask[N, 52]
+        """
+        self.first_hand[:] = 0
+        self.team_1_score[:] = 0
+        self.team_2_score[:] = 0
+        self._start_rounds(self.rows)
+        self._advance()
+        return self.get_observations(), self.get_legal_mask()
+
+    def step(self, actions: np.ndarray):
+        """
+        plays the agent card on every table then lets the other seats play until the agent is to play again, tables
+        whose round has ended are dealt a new round and flagged in round_finished
+        :return: obs[N, NUMBER_OF_PARAMS], legal_mask[N, 52], rewards[N]
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        legal = self.get_legal_mask()
+        if not legal[self.rows, actions].all():
+            raise InvalidActionError("Illegal actions on tables {}".format(np.flatnonzero(~legal[self.rows, actions])))
+        self.rewards[:] = 0.0
+        self.round_finished[:] = False
+        self._play(self.rows, actions)
+        self._advance()
+        return self.get_observations(), self.get_legal_mask(), self.rewards.copy()
+
+    def current_suit(self, rows=None) -> np.ndarray:
+        """
+        suit that must be followed: the lead suit, hokm for the first lead of a round and NOSUIT for other leads
+        """
+        if rows is None:
+            rows = self.rows
+        leading = self.trick_size[rows] == 0
+        first_lead = self.hokm_suit[rows] * (self.tricks_played[rows] == 0)
+        return np.where(leading, np.where(first_lead > 0, first_lead, SUITS.NOSUIT), self.lead_suit[rows])
+
+    def _legal(self, rows, seats) -> np.ndarray:
+        hands = self.hands[rows, seats]
+        follow = hands & SUIT_MATRIX[self.current_suit(rows)]
+        return np.where(follow.any(axis=1, keepdims=True), follow, hands)
+
+    def get_legal_mask(self) -> np.ndarray:
+        return self._legal(self.rows, self.current_player)
+
+    def get_observations(self) -> np.ndarray:
+        """
+        GameState2 encoding of every table seen by the agent
+        """
+        obs = np.zeros((self.num_envs, NUMBER_OF_PARAMS), dtype=np.float32)
+        obs[self.played] = CARD_STATE.PLAYED / CARD_STATE.PLAYED
+        is_hakem = self.hakem == self.agent_id
+        obs[self.discarded & is_hakem[:, None]] = CARD_STATE.PLAYED / CARD_STATE.PLAYED
+        obs[self.hands[:, self.agent_id]] = CARD_STATE.MY_HAND / CARD_STATE.PLAYED
+        for offset in range(NUM_PLAYERS):
+            seat = (self.agent_id + 1 + offset) % NUM_PLAYERS
+            cards = self.trick[:, seat]
+            on_table = cards != NO_CARD
+            if seat == self.agent_id:
+                value = CARD_STATE.MY_HAND / CARD_STATE.PLAYED
+            else:
+                value = CARD_STATE(offset + 1) / CARD_STATE.PLAYED
+            obs[self.rows[on_table], cards[on_table]] = value
+        return obs
+
+    def _start_rounds(self, rows: np.ndarray):
+        n = len(rows)
+        permutations = np.argsort(self.rng.random((n, DECK_SIZE)), axis=1)
+        first_hand = self.first_hand[rows]
+        self.hands[rows] = False
+        dealt = DEAL_DECK >= 0
+        seats = (DEAL_DECK[None, dealt] - first_hand[:, None]) % NUM_PLAYERS
+        self.hands[rows[:, None], seats, permutations[:, dealt]] = True
+
+        # every player bets SAFE_BET, only the first bidder stays in the auction
+        hakem = first_hand
+        self.hakem[rows] = hakem
+        self.bet[rows] = SAFE_BET
+        self.hands[rows[:, None], hakem[:, None], permutations[:, ~dealt]] = True
+        hakem_hand = self.hands[rows, hakem]
+        self.hokm_suit[rows] = CARD_SUIT[np.argmax(hakem_hand, axis=1)]
+        keys = np.where(hakem_hand, self.rng.random((n, DECK_SIZE)), np.inf)
+        discard = np.argsort(keys, axis=1)[:, :4]
+        self.discarded[rows] = False
+        self.discarded[rows[:, None], discard] = True
+        self.hands[rows[:, None], hakem[:, None], discard] = False
+
+        self.played[rows] = False
+        self.trick[rows] = NO_CARD
+        self.trick_size[rows] = 0
+        self.lead_suit[rows] = SUITS.NOSUIT
+        self.tricks_played[rows] = 0
+        self.saved_count[rows] = 0
+        self.saved_count[rows, hakem] = 4
+        self.current_player[rows] = hakem
+        self.winner[rows] = hakem
+
+    def _play(self, rows: np.ndarray, cards: np.ndarray):
+        seats = self.current_player[rows]
+        self.hands[rows, seats, cards] = False
+        self.trick[rows, seats] = cards
+        leading = self.trick_size[rows] == 0
+        self.lead_suit[rows] = np.where(leading, CARD_SUIT[cards], self.lead_suit[rows])
+        strength = STRENGTH[self.game_modes[rows], self.hokm_suit[rows], self.lead_suit[rows]]
+        winner_cards = self.trick[rows, self.winner[rows]]
+        better = strength[np.arange(len(rows)), cards] > strength[np.arange(len(rows)), winner_cards]
+        self.winner[rows] = np.where(leading | better, seats, self.winner[rows])
+        self.trick_size[rows] += 1
+        self.current_player[rows] = (seats + 1) % NUM_PLAYERS
+
+        complete = rows[self.trick_size[rows] == NUM_PLAYERS]
+        if len(complete):
+            self._end_tricks(complete)
+
+    def _end_tricks(self, rows: np.ndarray):
+        winners = self.winner[rows]
+        self.saved_count[rows, winners] += NUM_PLAYERS
+        self.played[rows[:, None], self.trick[rows]] = True
+        self.trick[rows] = NO_CARD
+        self.trick_size[rows] = 0
+        self.lead_suit[rows] = SUITS.NOSUIT
+        self.current_player[rows] = winners
+        self.tricks_played[rows] += 1
+        finished = rows[self.tricks_played[rows] == PLAYER_INITIAL_CARDS]
+        if len(finished):
+            self._end_rounds(finished)
+
+    def _end_rounds(self, rows: np.ndarray):
+        team_1_points = (self.saved_count[rows, 0] + self.saved_count[rows, 2]) // 4 * 5
+        team_2_points = (self.saved_count[rows, 1] + self.saved_count[rows, 3]) // 4 * 5
+        s1, s2 = get_round_payoffs(self.hakem[rows], self.bet[rows], team_1_points, team_2_points)
+        self.team_1_score[rows] += s1
+        self.team_2_score[rows] += s2
+        reward = np.clip((s1 - s2) / (2 * MAX_SCORE), -1, 1)
+        self.rewards[rows] = reward if self.agent_id % 2 == 0 else -reward
+        self.round_finished[rows] = True
+        self.round_counter += len(rows)
+        self.first_hand[rows] = (self.first_hand[rows] + 1) % NUM_PLAYERS
+        self._start_rounds(rows)
+
+    def _advance(self):
+        """
+        other seats play random legal cards until the agent is to play on every table
+        """
+        while True:
+            rows = self.rows[self.current_player != self.agent_id]
+            if len(rows) == 0:
+                return
+            legal = self._legal(rows, self.current_player[rows])
+            keys = np.where(legal, self.rng.random(legal.shape), -1.0)
+            self._play(rows, np.argmax(keys, axis=1))
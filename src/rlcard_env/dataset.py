@@ -0,0 +1,197 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, cpu_count
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from dealer.DealCorpus import HAND_SLICES, MIDDLE_SLICE
+from dealer.GameRecord import GameRecordReader, MAX_BIDS, records_of_results
+from dealer.Simulator import simulate_round
+from dealer.Utils import spawn_seeds, table_rngs
+from players.Enum import NUM_PLAYERS, DECK_SIZE, PLAYER_INITIAL_CARDS, MAX_SCORE, SUITS
+from players.Policy import Policy, RuleBasedPolicy
+from rlcard_env.batched_game import STRENGTH, SUIT_MATRIX, CARD_SUIT, get_round_payoffs
+from rlcard_env.game_state import CARD_STATE, CARD_STATE_VALUES
+
+SAMPLES_PER_ROUND = PLAYER_INITIAL_CARDS * NUM_PLAYERS
+# a shard is one .npy file per field, so that the dataset can memory map them
+SHARD_FIELDS = ("states", "legal", "actions", "returns")
+
+
+def default_policies() -> List[Policy]:
+    return [RuleBasedPolicy() for _ in range(NUM_PLAYERS)]
+
+
+def encode_record(record) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    replays a recorded round and encodes every card play the way the GameState2 of the player sees it just before
+    playing, the states are the CARD_STATE of each card (0 when unknown), CARD_STATE_VALUES turns them into the
+    GameState2 floats
+    :return: states [48, 52] uint8, legal masks [48, 52] bool, actions [48] and seats [48]
+    """
+    deal = record["deal"]
+    first_hand = int(record["first_hand"])
+    hakem = int(record["hakem"])
+    strength = STRENGTH[record["game_mode"], record["hokm_suit"]]
+    plays = record["plays"]
+
+    hands = np.zeros((NUM_PLAYERS, DECK_SIZE), dtype=bool)
+    for deck, hand_slice in enumerate(HAND_SLICES):
+        hands[(deck - first_hand) % NUM_PLAYERS, deal[hand_slice]] = True
+    hands[hakem, deal[MIDDLE_SLICE]] = True
+    hands[hakem, record["discard"]] = False
+    codes = np.where(hands, np.uint8(CARD_STATE.MY_HAND), np.uint8(0))
+    codes[hakem, record["discard"]] = CARD_STATE.PLAYED
+
+    states = np.empty((SAMPLES_PER_ROUND, DECK_SIZE), dtype=np.uint8)
+    legal = np.empty((SAMPLES_PER_ROUND, DECK_SIZE), dtype=bool)
+    seats = np.empty(SAMPLES_PER_ROUND, dtype=np.uint8)
+    leader = hakem
+    # the first leader is handed the hokm suit
+    current_suit = int(record["hokm_suit"])
+    for trick in range(PLAYER_INITIAL_CARDS):
+        cards = plays[trick * NUM_PLAYERS:(trick + 1) * NUM_PLAYERS]
+        for k, card in enumerate(cards):
+            i = trick * NUM_PLAYERS + k
+            seat = (leader + k) % NUM_PLAYERS
+            states[i] = codes[seat]
+            suit_cards = hands[seat] & SUIT_MATRIX[current_suit]
+            legal[i] = suit_cards if suit_cards.any() else hands[seat]
+            seats[i] = seat
+            hands[seat, card] = False
+            if k == 0:
+                current_suit = CARD_SUIT[card]
+            for other in range(NUM_PLAYERS):
+                if other != seat:
+                    codes[other, card] = CARD_STATE.PLAYER0 + (seat - other - 1) % NUM_PLAYERS
+        leader = (leader + int(np.argmax(strength[CARD_SUIT[cards[0]]][cards]))) % NUM_PLAYERS
+        codes[:, cards] = CARD_STATE.PLAYED
+        current_suit = SUITS.NOSUIT
+    return states, legal, plays.copy(), seats
+
+
+def round_returns(records: np.ndarray) -> np.ndarray:
+    """
+    :return: [n, 2] the round reward of PPOPlayer.end_round for team 1 and team 2
+    """
+    last_bid = np.minimum(records["num_bids"], MAX_BIDS).astype(np.int64) - 1
+    bets = records["bid_values"][np.arange(len(records)), last_bid].astype(np.int64)
+    points = records["team_points"].astype(np.int64)
+    final1, final2 = get_round_payoffs(records["hakem"].astype(np.int64), bets, points[:, 0], points[:, 1])
+    team1 = np.clip((final1 - final2) / (2 * MAX_SCORE), -1, 1).astype(np.float32)
+    return np.stack([team1, -team1], axis=1)
+
+
+def encode_records(records: np.ndarray, seats: Sequence[int] = None) -> Tuple[np.ndarray, ...]:
+    """
+    :param seats: keep only the decisions of these seats, e.g. the seats of the player to clone
+    :return: the states, legal, actions and returns arrays of all the decisions of the records
+    """
+    returns = round_returns(records)
+    encoded = [encode_record(record) for record in records]
+    states = np.concatenate([e[0] for e in encoded])
+    legal = np.concatenate([e[1] for e in encoded])
+    actions = np.concatenate([e[2] for e in encoded])
+    acting = np.concatenate([e[3] for e in encoded])
+    sample_returns = returns[np.repeat(np.arange(len(records)), SAMPLES_PER_ROUND), acting % 2]
+    if seats is not None:
+        keep = np.isin(acting, seats)
+        return states[keep], legal[keep], actions[keep], sample_returns[keep]
+    return states, legal, actions, sample_returns
+
+
+def write_shard(path_prefix: str, arrays: Sequence[np.ndarray]):
+    for field, array in zip(SHARD_FIELDS, arrays):
+        np.save("{}.{}.npy".format(path_prefix, field), array)
+
+
+def simulate_shard(directory: str, index: int, num_rounds: int, seed,
+                   policies_factory: Callable[[], List[Policy]] = default_policies, seats: Sequence[int] = None) -> int:
+    """
+    plays num_rounds rounds with the simulator and writes their decisions as shard number index
+    :return: the number of samples
+    """
+    policies = policies_factory()
+    rngs = table_rngs(seed)
+    results = [simulate_round(policies, first_hand=i % NUM_PLAYERS, rngs=rngs) for i in range(num_rounds)]
+    arrays = encode_records(records_of_results(results), seats)
+    write_shard(os.path.join(directory, "shard_{:05d}".format(index)), arrays)
+    return len(arrays[0])
+
+
+def generate_shards(directory: str, num_rounds: int, rounds_per_shard: int = 10000, num_workers: int = None,
+                    seed: int = 0, policies_factory: Callable[[], List[Policy]] = default_policies,
+                    seats: Sequence[int] = None) -> int:
+    """
+    simulates num_rounds rounds of policies_factory (rule based by default) in a pool of processes
+    :return: the number of samples written
+    """
+    os.makedirs(directory, exist_ok=True)
+    sizes = [min(rounds_per_shard, num_rounds - start) for start in range(0, num_rounds, rounds_per_shard)]
+    seeds = spawn_seeds(seed, len(sizes))
+    args = [(directory, index, size, shard_seed, policies_factory, seats)
+            for index, (size, shard_seed) in enumerate(zip(sizes, seeds))]
+    num_workers = num_workers or max(1, cpu_count() - 1)
+    if num_workers == 1:
+        return sum(simulate_shard(*a) for a in args)
+    with ProcessPoolExecutor(num_workers, mp_context=get_context("spawn")) as executor:
+        return sum(executor.map(simulate_shard, *zip(*args)))
+
+
+def shards_from_records(record_path: str, directory: str, rounds_per_shard: int = 10000,
+                        seats: Sequence[int] = None) -> int:
+    """
+    encodes the rounds of a GameRecord file into shards
+    :return: the number of samples written
+    """
+    os.makedirs(directory, exist_ok=True)
+    samples = 0
+    for index, batch in enumerate(GameRecordReader(record_path).batches(rounds_per_shard)):
+        arrays = encode_records(batch, seats)
+        write_shard(os.path.join(directory, "shard_{:05d}".format(index)), arrays)
+        samples += len(arrays[0])
+    return samples
+
+
+class BehaviorCloningDataset(IterableDataset):
+    """
+    Streams (observation, legal mask, action, return) samples from the shards of a directory. Shards are memory
+    mapped and read chunk by chunk, so memory stays bounded by chunk_size whatever the size of the dataset. With
+    several DataLoader workers every worker reads its own shards
+    """
+
+    def __init__(self, directory: str, shuffle: bool = True, chunk_size: int = 16384, seed: int = 0):
+        self.prefixes = sorted(path[:-len(".states.npy")] for path in glob.glob(os.path.join(directory, "*.states.npy")))
+        if not self.prefixes:
+            raise ValueError("no shard found in {}".format(directory))
+        self.shuffle = shuffle
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self):
+        return sum(len(np.load(prefix + ".actions.npy", mmap_mode="r")) for prefix in self.prefixes)
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor, int, float]]:
+        worker = get_worker_info()
+        prefixes = self.prefixes if worker is None else self.prefixes[worker.id::worker.num_workers]
+        rng = np.random.default_rng([self.seed, self.epoch, 0 if worker is None else worker.id])
+        self.epoch += 1
+        if self.shuffle:
+            prefixes = [prefixes[i] for i in rng.permutation(len(prefixes))]
+        for prefix in prefixes:
+            arrays = [np.load("{}.{}.npy".format(prefix, field), mmap_mode="r") for field in SHARD_FIELDS]
+            starts = np.arange(0, len(arrays[0]), self.chunk_size)
+            if self.shuffle:
+                rng.shuffle(starts)
+            for start in starts:
+                states, legal, actions, returns = (np.array(a[start:start + self.chunk_size]) for a in arrays)
+                order = rng.permutation(len(actions)) if self.shuffle else np.arange(len(actions))
+                observations = torch.from_numpy(CARD_STATE_VALUES[states])
+                legal = torch.from_numpy(legal)
+                for i in order:
+                    yield observations[i], legal[i], int(actions[i]), float(returns[i])
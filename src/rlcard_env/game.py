@@ -3,9 +3,13 @@ from collections import deque
 from typing import List
 
 from dealer.Card import Card
+from dealer.DealCorpus import DealCorpus
+from dealer.GameRecord import GameRecordWriter
 from dealer.Deck import Deck
-from dealer.Logging import Logging
-from dealer.Utils import ThreeConsecutivePassesException, InvalidActionError, get_round_payoff
+from dealer.Logging import Logging, LEVEL
+from dealer.Utils import ThreeConsecutivePassesException, InvalidActionError, close_pools, get_round_payoff, \
+    table_rngs
+from dealer.Zobrist import ZobristHash
 from players.Enum import ACTION_SIZE, NUM_PLAYERS, GAMESTATE, SUITS, GAMEMODE, colors, MAX_SCORE, DECK_SIZE
 from players.IntelligentPlayer import IntelligentPlayer, AgentPlayer
 from players.Player import Player
@@ -18,9 +22,12 @@ class ShelemGame:
 
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, game_end: int = 1165, verbose: int = 0):
+    def __init__(self, game_end: int = 1165, verbose: int = 0, seed=None, deals: DealCorpus = None,
+                 recorder: GameRecordWriter = None):
         # The game is always going to be the observation
         self.french_deck = Deck()
+        self.deals = deals
+        self.recorder = recorder
         self.players = None
         self.player_id_receiving_first_hand = 0
         self.team_1_score = 0.0
@@ -29,6 +36,8 @@ class ShelemGame:
         self.team_2_round_score = 0.0
         self.game_end_score = game_end
         self.verbose = verbose
+        self.rng, self.player_rngs = table_rngs(seed)
+        self.zobrist = ZobristHash()
         self.round_bets = []
         self.betting_players = None
         self.initially_passed_count = 0
@@ -61,7 +70,6 @@ class ShelemGame:
         self.set_players(p2)
 
     def reset(self):
-        print()
         self.round_finished = False
         # self.round_counter = 1
         # self.team_1_score = 0.0
@@ -94,6 +102,14 @@ class ShelemGame:
 
     def set_players(self, players: List[Player]):
         self.players = players
+        for player, rng in zip(self.players, self.player_rngs):
+            player.set_rng(rng)
+
+    def close(self):
+        """
+        shuts down the worker processes of the search players of the table
+        """
+        close_pools(self.players or [])
 
     def get_current_player(self):
         if self.game_state == GAMESTATE.BIDDING:
@@ -152,7 +168,7 @@ class ShelemGame:
             if len(self.round_hands_played) < 12:
                 state, current_player = self.play_card(action)
             else:
-                print(self.round_hands_played)
+                Logging.error(self.round_hands_played)
                 raise RuntimeError("There should not be more than 12 hands!")
             if len(self.round_hands_played) == 12:
                 self.end_round()
@@ -164,7 +180,10 @@ class ShelemGame:
 
     def start_round(self):
         del self.round_bets[:]
-        d1, d2, d3, self.round_middle_deck, d4 = self.french_deck.deal()
+        deal = self.deals.next_deal() if self.deals is not None else None
+        d1, d2, d3, self.round_middle_deck, d4 = self.french_deck.deal(self.rng, deal)
+        if self.recorder is not None:
+            self.recorder.begin_round((d1, d2, d3, self.round_middle_deck, d4), self.player_id_receiving_first_hand)
         decks = deque([d1, d2, d3, d4])
 
         # rotate players
@@ -172,6 +191,8 @@ class ShelemGame:
             decks.append(decks.popleft())
         for i in range(NUM_PLAYERS):
             self.players[i].begin_round(decks[i])
+        self.zobrist.deal([deck.mask for deck in decks], self.round_middle_deck.mask,
+                          self.player_id_receiving_first_hand)
 
     def get_next_bid(self, action):
         if self.initially_passed_count == NUM_PLAYERS-1:
@@ -183,6 +204,7 @@ class ShelemGame:
         if len(self.round_bets) == 0 or (len(self.round_bets) > 0 and player_bet.bet > self.round_bets[-1].bet):
             self.round_bets.append(player_bet)
             self.betting_players.append(bp)
+            self.zobrist.bid(bp.player_id, player_bet.bet)
         elif player_bet.bet == 0 and 3 > self.betting_rounds == self.initially_passed_count:  # he has passed
             self.initially_passed_count += 1
             self.betting_rounds += 1
@@ -193,11 +215,17 @@ class ShelemGame:
         if not self.hakem.game_has_begun:
             raise ValueError("Game has not started yet")
         self.game_mode = self.hakem.decide_game_mode(self.round_middle_deck)
+        self.zobrist.take_widow(self.hakem.player_id, self.round_middle_deck.mask)
 
     def decide_trump(self, action):
         self.current_suit = self.hokm_suit = self.hakem.decide_trump()
+        self.zobrist.discard_cards(self.hakem.player_id, self.hakem.saved_deck.mask)
+        self.zobrist.set_trump(self.game_mode, self.hokm_suit, self.hakem.player_id)
         for i in range(NUM_PLAYERS):
             self.players[i].set_hokm_and_game_mode(self.game_mode, self.hokm_suit, self.hakem.player_id)
+        if self.recorder is not None:
+            self.recorder.set_bids(self.round_bets, self.hakem.player_id)
+            self.recorder.set_hokm(self.game_mode, self.hokm_suit, self.hakem.saved_deck.mask)
 
     def player_widow_card(self, action):
         saving_index = self.hakem.decide_widow_card()
@@ -211,27 +239,31 @@ class ShelemGame:
 
     def play_card(self, action):
         if self.players[self.current_player].agent:
-            Logging.debug("{}{}{}".format(colors.PURPLE, self.players[self.current_player].deck, colors.ENDC))
-            self.players[self.current_player].observation.log()
+            if Logging.enabled(LEVEL.DEBUG):
+                Logging.debug("{}{}{}".format(colors.PURPLE, self.players[self.current_player].deck, colors.ENDC))
+                self.players[self.current_player].observation.log()
             try:
                 played_card = self.players[self.current_player].pop_card_from_deck(action, self.current_suit)
             except InvalidActionError:
-                print("Invalid action: {}".format(action))
+                Logging.error("Invalid action: {}".format(action))
                 raise RuntimeError("invalid action")
         else:
             played_card = self.players[self.current_player].play_a_card(self.round_current_hand, self.current_suit)
 
         self.round_current_hand[self.current_player] = played_card
+        self.zobrist.play_card(self.current_player, played_card.id)
+        if self.recorder is not None:
+            self.recorder.play(played_card.id)
         if self.current_suit == SUITS.NOSUIT:
             self.current_suit = played_card.suit
-        if played_card.suit == self.hokm_suit:
-            color = colors.RED
-        elif played_card.suit == self.current_suit:
-            color = colors.GREEN
-        else:
-            color = colors.BROWN
         if self.verbose >= 2:
-            print("{}{}-{}{}".format(color, self.current_player, played_card, colors.ENDC))
+            if played_card.suit == self.hokm_suit:
+                color = colors.RED
+            elif played_card.suit == self.current_suit:
+                color = colors.GREEN
+            else:
+                color = colors.BROWN
+            Logging.write("{}{}-{}{}".format(color, self.current_player, played_card, colors.ENDC))
         for p in self.players:
             p.card_has_been_played(self.round_current_hand, self.current_suit)
 
@@ -251,11 +283,11 @@ class ShelemGame:
 
     def end_trick(self):
         if self.verbose >= 2:
-            separator = "*" * 40
-            print(separator)
+            Logging.write("*" * 40)
         self.round_hands_played.append(self.round_current_hand)
         for p in self.players:
             p.end_trick(self.round_current_hand, self.hand_winner)
+        self.zobrist.end_trick([card.id for card in self.round_current_hand], self.hand_first_player, self.hand_winner)
 
         self.hand_first_player = self.hand_winner
         self.round_current_hand = [None] * 4
@@ -270,6 +302,8 @@ class ShelemGame:
         s1, s2, r = get_round_payoff(
             self.hakem.player_id, final_bet.bet, self.team_1_round_score, self.team_2_round_score)
         self.rewards[0] = sorted((-1, (s1 - s2) / (2 * MAX_SCORE), 1))[1]
+        if self.recorder is not None:
+            self.recorder.end_round(self.team_1_round_score, self.team_2_round_score)
         # self.rewards[2] = self.rewards[0]
         # self.rewards[3] = self.rewards[1] = -self.rewards[0]
         self.french_deck = self.players[0].saved_deck + self.players[2].saved_deck + \
@@ -277,11 +311,11 @@ class ShelemGame:
 
         self.team_1_score += s1
         self.team_2_score += s2
-        print("{}Round {}: Team 1 score = {} ({}) and Team 2 score = {} ({}){}".format(
+        Logging.round_summary(lambda: "{}Round {}: Team 1 score = {} ({}) and Team 2 score = {} ({}){}".format(
             colors.BLUE, self.round_counter, s1, self.team_1_score, s2, self.team_2_score, colors.ENDC))
         self.round_counter += 1
         if self.check_game_finished():
-            print("{}Final Scores = Team 1 score = {} and Team 2 score = {}{}".format(
+            Logging.important("{}Final Scores = Team 1 score = {} and Team 2 score = {}{}".format(
                 colors.CYAN, self.team_1_score, self.team_2_score, colors.ENDC))
         self.round_hands_played.clear()
         self.round_finished = True
@@ -304,6 +338,22 @@ class ShelemGame:
         """
         return self.players[player_id].observation.state
 
+    def get_state_hash(self, player_id=None):
+        """ Return the Zobrist hash of the current state
+        Args:
+            player_id (int): the player whose information the hash covers, None for the public state
+        Returns:
+            (int): The hash of the public state, or of what player_id knows of it
+        """
+        if player_id is None:
+            return self.zobrist.public
+        return self.zobrist.observation(player_id)
+
+    def get_perfect_information_hash(self):
+        """ Return the Zobrist hash of the full state, every hand, the widow and the discard included
+        """
+        return self.zobrist.full
+
     def get_payoffs(self):
         """ Return the payoffs of the game
         Returns:
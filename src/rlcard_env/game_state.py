@@ -1,7 +1,10 @@
 from enum import IntEnum, auto
+from typing import Iterable
 
-from dealer.Deck import Deck
-from dealer.Logging import Logging
+import numpy as np
+
+from dealer.Card import CARDS
+from dealer.Logging import Logging, LEVEL
 from players.Enum import DECK_SIZE, NUM_SUITS, NUM_PLAYERS
 
 NOT_SET = 0.0
@@ -42,7 +45,7 @@ class GameState:
 
     def __init__(self):
         self.played_card_cutoff = 36
-        self.reset_state()
+        self._state = np.zeros(GAMESTATE1_PARAMS, dtype=np.float32)
         self._state_index = {}
         cumulative_index = 0
         for d in Dimension:
@@ -55,7 +58,16 @@ class GameState:
         return self._state
 
     def reset_state(self):
-        self._state = [NOT_SET] * GAMESTATE1_PARAMS
+        self._state.fill(NOT_SET)
+
+    def clear(self, sub_state: STATE):
+        """
+        resets a whole sub-state in one slice assignment
+        """
+        if not Active[sub_state]:
+            return
+        idx = self._state_index[sub_state]
+        self._state[idx:idx + Dimension[sub_state]] = NOT_SET
 
     def set_state(self, sub_state: STATE, index: int, value: float):
         if not Active[sub_state]:
@@ -68,8 +80,8 @@ class GameState:
         self._state[self._state_index[sub_state] + index] = value
 
     def log(self):
-        DummyDeck = Deck()
-        DummyDeck.deal()
+        if not Logging.enabled(LEVEL.DEBUG):
+            return
         for d in Dimension:
             if Active[d]:
                 idx1 = self._state_index[d]
@@ -78,14 +90,14 @@ class GameState:
                     my_hand = []
                     for i in range(idx1, idx2):
                         if self._state[i] == 1:
-                            my_hand.append(DummyDeck.get_by_value(i-idx1))
+                            my_hand.append(CARDS[i - idx1])
                     Logging.debug("{} -> {}".format(d.name, my_hand))
                 elif d == STATE.CRR_TRICK:
                     current_trick = []
                     for i in range(idx1, idx2):
                         card_idx = (i - idx1) % DECK_SIZE
                         if self._state[i] == 1:
-                            current_trick.append(DummyDeck.get_by_value(card_idx))
+                            current_trick.append(CARDS[card_idx])
                     Logging.debug("{} -> {}".format(d.name, current_trick))
                 else:
                     Logging.debug("{} -> {}".format(d.name, self._state[idx1:idx2]))
@@ -99,23 +111,55 @@ class CARD_STATE(IntEnum):
 
 
 GAMESTATE2_PARAMS = DECK_SIZE
+CARD_STATE_VALUES = np.array([NOT_SET] + [s / CARD_STATE.PLAYED for s in CARD_STATE], dtype=np.float32)
+
+
 class GameState2:
 
-    def __init__(self):
-        self.reset_state()
+    def __init__(self, buffer: np.ndarray = None):
+        """
+        :param buffer: float32 vector of GAMESTATE2_PARAMS to encode into, e.g. a row of a GameStateBatch
+        """
+        if buffer is None:
+            buffer = np.zeros(GAMESTATE2_PARAMS, dtype=np.float32)
+        elif buffer.shape != (GAMESTATE2_PARAMS,) or buffer.dtype != np.float32:
+            raise ValueError("invalid observation buffer {} {}".format(buffer.shape, buffer.dtype))
+        self._state = buffer
 
     @property
     def state(self):
+        """
+        the encoding buffer itself (no copy), it keeps changing as the round goes on
+        """
         return self._state
 
     def reset_state(self):
-        self._state = [NOT_SET] * GAMESTATE2_PARAMS
+        self._state.fill(NOT_SET)
 
     def set_state(self, card: int, new_state: CARD_STATE):
-        self._state[card] = new_state/CARD_STATE.PLAYED
+        self._state[card] = CARD_STATE_VALUES[new_state]
+
+    def set_states(self, cards: Iterable[int], new_state: CARD_STATE):
+        self._state[list(cards)] = CARD_STATE_VALUES[new_state]
 
     def log(self):
         pass
 
+
+class GameStateBatch:
+    """
+    GameState2 encoders of many players/tables writing into the rows of one [N, GAMESTATE2_PARAMS] matrix
+    """
+
+    def __init__(self, num_rows: int):
+        self.matrix = np.zeros((num_rows, GAMESTATE2_PARAMS), dtype=np.float32)
+
+    def encoder(self, row: int) -> GameState2:
+        return GameState2(self.matrix[row])
+
+    def __len__(self):
+        return len(self.matrix)
+
+
 NUMBER_OF_PARAMS = GAMESTATE2_PARAMS
-print(f"number of parameters: {NUMBER_OF_PARAMS}")
\ No newline at end of file
+Logging.info("number of parameters: {}".format(NUMBER_OF_PARAMS))
\ No newline at end of file
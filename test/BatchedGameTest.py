@@ -0,0 +1,43 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from dealer.Utils import get_round_payoff, InvalidActionError
+from rlcard_env.batched_game import BatchedShelemGame, get_round_payoffs
+from rlcard_env.game_state import NUMBER_OF_PARAMS
+
+
+class BatchedGameTester(unittest.TestCase):
+    def setUp(self):
+        self.game = BatchedShelemGame(64, agent_id=1, seed=5)
+
+    def testStepping(self):
+        obs, legal = self.game.reset()
+        rng = np.random.default_rng(0)
+        finished = 0
+        for _ in range(60):
+            self.assertEqual(obs.shape, (64, NUMBER_OF_PARAMS))
+            self.assertTrue(legal.any(axis=1).all())
+            self.assertTrue((self.game.current_player == 1).all())
+            actions = np.argmax(np.where(legal, rng.random(legal.shape), -1.0), axis=1)
+            obs, legal, rewards = self.game.step(actions)
+            cards = self.game.hands.sum(axis=(1, 2)) + self.game.played.sum(axis=1) + \
+                (self.game.trick >= 0).sum(axis=1) + self.game.discarded.sum(axis=1)
+            self.assertTrue((cards == 52).all())
+            self.assertTrue((rewards[~self.game.round_finished] == 0).all())
+            finished += self.game.round_finished.sum()
+        self.assertEqual(finished, self.game.round_counter)
+        self.assertGreater(finished, 64)
+
+    def testIllegalAction(self):
+        obs, legal = self.game.reset()
+        actions = np.argmin(self.game.hands[:, 1], axis=1)
+        self.assertRaises(InvalidActionError, self.game.step, actions)
+
+    def testPayoffs(self):
+        for hakem, s1 in itertools.product(range(4), range(0, 70, 5)):
+            s2 = 65 - s1
+            expected = get_round_payoff(hakem, 40, s1, s2)[:2]
+            final1, final2 = get_round_payoffs(np.array([hakem]), np.array([40]), np.array([s1]), np.array([s2]))
+            self.assertEqual((final1[0], final2[0]), expected)
@@ -0,0 +1,21 @@
+import unittest
+
+from benchmark import run_benchmarks, find_regressions
+
+
+class BenchmarkTester(unittest.TestCase):
+    def testRun(self):
+        run = run_benchmarks(["deal", "rule_based_turns"], scale=1)
+        self.assertEqual(set(run["results"]), {"deal"} | {"rule_based_turn{}".format(i) for i in range(4)})
+        self.assertEqual(run["results"]["deal"]["operations"], 2000)
+        self.assertGreater(run["peak_rss_mb"], 0)
+        # every benchmark has the peak of its own process
+        self.assertEqual(run["peak_rss_mb"], max(result["peak_rss_mb"] for result in run["results"].values()))
+        self.assertEqual(1, len({run["results"]["rule_based_turn{}".format(i)]["peak_rss_mb"] for i in range(4)}))
+
+    def testRegressions(self):
+        baseline = {"results": {"deal": {"us_per_op": 10.0}, "game_round": {"us_per_op": 100.0}}}
+        run = {"results": {"deal": {"us_per_op": 10.5}, "game_round": {"us_per_op": 150.0}, "new": {"us_per_op": 1}}}
+        regressions = find_regressions(run, baseline, 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("game_round"))
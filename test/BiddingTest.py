@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dealer.Card import CARD_SUITS
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of, popcount
+from dealer.Game import Game
+from dealer.Simulator import RoundState, deal_round, simulate_round
+from dealer.Utils import table_rngs
+from players.Bidding import BidEstimator, BIDS, NUM_KEYS, MIN_SAMPLES, hand_key
+from players.Enum import SAFE_BET, NUM_PLAYERS, PLAYER_INITIAL_CARDS
+from players.Policy import HakemPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+
+class BiddingTester(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.estimator = BidEstimator.build(300, seed=0, chunk_size=100)
+
+    def testHandKey(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            hand = mask_of(rng.permutation(52)[:PLAYER_INITIAL_CARDS].tolist())
+            self.assertLess(hand_key(hand), NUM_KEYS)
+            # the suits renamed
+            renamed = mask_of(card - CARD_SUITS[card] + (CARD_SUITS[card] % 4 + 1) for card in ids_of(hand))
+            self.assertEqual(hand_key(hand), hand_key(renamed))
+        twos = mask_of(range(4))
+        threes = mask_of(range(4, 8))
+        self.assertEqual(hand_key(twos | mask_of(range(8, 16))), hand_key(threes | mask_of(range(8, 16))))
+        aces = mask_of(range(48, 52))
+        self.assertNotEqual(hand_key(twos | mask_of(range(8, 16))), hand_key(aces | mask_of(range(8, 16))))
+
+    def testBuild(self):
+        estimator = self.estimator
+        self.assertEqual(4 * 300, len(estimator))
+        self.assertTrue(all(bid == 0 or bid in BIDS for bid in estimator.max_bids))
+        # the rare keys take the estimate of a coarser key
+        self.assertLess(len(set(estimator.points)), NUM_KEYS)
+        self.assertEqual(estimator.histograms.tolist(),
+                         BidEstimator.build(300, seed=0, num_workers=2, chunk_size=100).histograms.tolist())
+
+    def testBackOff(self):
+        estimator = BidEstimator()
+        hand = mask_of(range(PLAYER_INITIAL_CARDS))
+        self.assertEqual([0.0], list(set(estimator.points)))
+        self.assertEqual(SAFE_BET, estimator.bid(hand, 0))
+        self.assertEqual(0, estimator.bid(hand, SAFE_BET))
+        diamonds = mask_of(range(0, 4 * PLAYER_INITIAL_CARDS, 4))
+        estimator.add_samples(np.array([[hand_key(hand), 60]] * MIN_SAMPLES + [[hand_key(diamonds), 20]] * MIN_SAMPLES))
+        self.assertEqual(60, estimator.estimate(hand))
+        self.assertEqual(20, estimator.estimate(diamonds))
+        # the same shape with a queen takes the samples of hand, another shape all of them
+        self.assertEqual(60, estimator.estimate(hand ^ (1 << 8) | (1 << 40)))
+        self.assertEqual(40, estimator.estimate(mask_of(range(0, 24, 4)) | mask_of(range(1, 25, 4))))
+        self.assertEqual(60, estimator.max_bid(hand))
+        self.assertEqual(SAFE_BET + 5, estimator.bid(hand, SAFE_BET))
+
+    def testSaveLoad(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bids.npy")
+            self.estimator.save(path)
+            loaded = BidEstimator.load(path)
+        self.assertEqual(self.estimator.points, loaded.points)
+        self.assertEqual(self.estimator.max_bids, loaded.max_bids)
+        with self.assertRaises(ValueError):
+            BidEstimator(np.zeros((3, 3)))
+
+    def testHakemPolicy(self):
+        for seed in range(10):
+            rngs = table_rngs(seed)
+            deal = list(range(52))
+            rngs[0].shuffle(deal)
+            state = RoundState(*rngs)
+            deal_round(state, deal)
+            hand = state.hands[0] | state.widow
+            state.hands[0] = hand
+            discard, hokm_suit = HakemPolicy().discard_cards(state, 0)
+            self.assertEqual(4, popcount(discard))
+            self.assertEqual(0, discard & ~hand)
+            self.assertEqual(max(popcount(hand & SUIT_MASKS[suit]) for suit in range(1, 5)),
+                             popcount(hand & SUIT_MASKS[hokm_suit]))
+
+    def testBidding(self):
+        players = [RuleBasedPlayer(seat, (seat + 2) % NUM_PLAYERS) for seat in range(NUM_PLAYERS)]
+        for player in players:
+            player.bid_estimator = self.estimator
+        game = Game(players, 1)
+        for _ in range(8):
+            game.play_a_round()
+            self.assertGreaterEqual(players[0].hakem_bid.bet, SAFE_BET)
+        results = [simulate_round([HakemPolicy(self.estimator) for _ in range(NUM_PLAYERS)], seed)
+                   for seed in range(20)]
+        for result in results:
+            self.assertEqual(SAFE_BET, result.bets[0][1])
+            self.assertEqual([SAFE_BET + 5 * i for i in range(len(result.bets))], [bet for _, bet in result.bets])
+        self.assertGreater(max(result.bet for result in results), SAFE_BET)
+
+
+if __name__ == '__main__':
+    unittest.main()
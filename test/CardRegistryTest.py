@@ -0,0 +1,29 @@
+import copy
+import pickle
+import unittest
+
+from dealer.Card import Card, CARDS, card_of
+from dealer.Deck import Deck
+from players.Enum import VALUES, SUITS
+
+
+class CardRegistryTester(unittest.TestCase):
+    def testSingletons(self):
+        self.assertEqual(len(CARDS), 52)
+        self.assertTrue(all(a is b for a, b in zip(Deck.build_cards(), CARDS)))
+        d1, d2, d3, middle, d4 = Deck().deal()
+        self.assertTrue(all(card is CARDS[card.id] for deck in (d1, d2, d3, middle, d4) for card in deck.cards))
+        self.assertIs(pickle.loads(pickle.dumps(CARDS[7])), CARDS[7])
+        self.assertIs(copy.deepcopy(CARDS[7]), CARDS[7])
+
+    def testFields(self):
+        ace = card_of(51)
+        self.assertEqual((ace.value, ace.suit, ace.rank), (VALUES.Ace, SUITS.SPADES, 12))
+        self.assertEqual(repr(ace), "(51-{})".format(ace.name))
+        self.assertRaises(AttributeError, setattr, ace, "id", 3)
+
+    def testEqualityById(self):
+        self.assertEqual(Card(51, VALUES.Ace, SUITS.SPADES), CARDS[51])
+        self.assertEqual(hash(CARDS[12]), 12)
+        self.assertNotEqual(CARDS[12], CARDS[13])
+        self.assertEqual(len({CARDS[3], card_of(3)}), 1)
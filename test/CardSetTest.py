@@ -0,0 +1,39 @@
+import unittest
+
+from dealer.CardSet import CardSet, SUIT_MASKS, FULL_MASK, popcount, ids_of
+from dealer.Deck import Deck
+from players.Enum import SUITS
+
+
+class CardSetTester(unittest.TestCase):
+    def testSuitMasks(self):
+        self.assertEqual(popcount(FULL_MASK), 52)
+        union = 0
+        for suit in [SUITS.DIAMONDS, SUITS.CLUBS, SUITS.HEARTS, SUITS.SPADES]:
+            self.assertEqual(popcount(SUIT_MASKS[suit]), 13)
+            self.assertEqual(union & SUIT_MASKS[suit], 0)
+            union |= SUIT_MASKS[suit]
+        self.assertEqual(union, FULL_MASK)
+        self.assertEqual(SUIT_MASKS[SUITS.NOSUIT], 0)
+
+    def testLegalMask(self):
+        card_set = CardSet.from_ids([0, 4, 9, 51])
+        self.assertEqual(ids_of(card_set.legal_mask(SUITS.DIAMONDS)), [0, 4])
+        self.assertEqual(ids_of(card_set.legal_mask(SUITS.HEARTS)), [0, 4, 9, 51])
+        self.assertEqual(ids_of(card_set.legal_mask(SUITS.NOSUIT)), [0, 4, 9, 51])
+        card_set.remove(4)
+        self.assertNotIn(4, card_set)
+        self.assertEqual(len(card_set), 3)
+
+    def testDeckStorage(self):
+        d1, d2, d3, middle_deck, d4 = Deck().deal()
+        hand = d1 + middle_deck
+        self.assertEqual(len(hand), 16)
+        self.assertEqual([c.id for c in hand.cards], sorted(c.id for c in hand.cards))
+        for card in list(hand.cards):
+            self.assertIn(card, hand)
+            self.assertEqual(hand.has_suit(card.suit), True)
+            hand.pop_card_from_deck(card)
+            self.assertNotIn(card, hand)
+        self.assertEqual(len(hand), 0)
+        self.assertRaises(ValueError, hand.get_by_value, 0)
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from torch.utils.data import DataLoader
+
+from dealer.Game import Game
+from dealer.GameRecord import GameRecordWriter, GameRecordReader
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.dataset import encode_record, encode_records, generate_shards, shards_from_records, \
+    BehaviorCloningDataset
+from rlcard_env.game_state import CARD_STATE_VALUES
+
+
+class CapturingPlayer(RuleBasedPlayer):
+    def __init__(self, player_id, team_mate_player_id, decisions):
+        super().__init__(player_id, team_mate_player_id)
+        self.decisions = decisions
+
+    def play_a_card(self, current_hand, current_suit):
+        state = self.observation.state.copy()
+        legal = self.get_valid_actions(current_suit)
+        card = super().play_a_card(current_hand, current_suit)
+        self.decisions.append((self.player_id, state, legal, card.id))
+        return card
+
+
+class DatasetTester(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "rounds.rec")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testSameEncodingAsPlayers(self):
+        decisions = []
+        with GameRecordWriter(self.path) as recorder:
+            game = Game([CapturingPlayer(i, (i + 2) % 4, decisions) for i in range(4)], 3, recorder=recorder)
+            for _ in range(5):
+                game.play_a_round()
+        records = GameRecordReader(self.path).records
+        encoded = [encode_record(record) for record in records]
+        states = np.concatenate([e[0] for e in encoded])
+        legal = np.concatenate([e[1] for e in encoded])
+        actions = np.concatenate([e[2] for e in encoded])
+        seats = np.concatenate([e[3] for e in encoded])
+        self.assertEqual(len(decisions), 5 * 48)
+        for i, (seat, state, valid, action) in enumerate(decisions):
+            self.assertEqual(seats[i], seat)
+            self.assertEqual(actions[i], action)
+            self.assertTrue((CARD_STATE_VALUES[states[i]] == state).all())
+            self.assertTrue((legal[i] == valid).all())
+        returns = encode_records(records, seats=[1])[3]
+        self.assertEqual(len(returns), 5 * 12)
+
+    def testShardsAndDataset(self):
+        shards = os.path.join(self.directory.name, "shards")
+        samples = generate_shards(shards, 30, rounds_per_shard=12, num_workers=1, seed=2)
+        self.assertEqual(samples, 30 * 48)
+        with GameRecordWriter(self.path) as recorder:
+            game = Game([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)], 3, recorder=recorder)
+            game.play_a_round()
+        self.assertEqual(shards_from_records(self.path, shards + "2", seats=[0, 2]), 24)
+
+        dataset = BehaviorCloningDataset(shards, chunk_size=100)
+        self.assertEqual(len(dataset), samples)
+        count = 0
+        for observations, legal, actions, returns in DataLoader(dataset, batch_size=64):
+            self.assertEqual(observations.shape[1], 52)
+            self.assertTrue(legal[np.arange(len(actions)), actions].all())
+            count += len(actions)
+        self.assertEqual(count, samples)
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dealer.DealCorpus import DealCorpus, generate_deals
+from dealer.Game import Game
+from dealer.Simulator import simulate_round
+from dealer.Utils import table_rngs
+from players.Policy import RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+
+class DealCorpusTester(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "deals.npy")
+        generate_deals(self.path, 100, seed=1, chunk_size=32)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testGenerate(self):
+        corpus = DealCorpus(self.path)
+        self.assertEqual(len(corpus), 100)
+        self.assertIsInstance(corpus.deals, np.memmap)
+        self.assertTrue((np.sort(corpus.deals, axis=1) == np.arange(52)).all())
+        generate_deals(self.path + "2.npy", 100, seed=1, chunk_size=32)
+        self.assertTrue((DealCorpus(self.path + "2.npy").deals == corpus.deals).all())
+        masks = corpus.hand_masks(0)
+        self.assertEqual(sum(masks), (1 << 52) - 1)
+
+    def testGameDeals(self):
+        corpus = DealCorpus(self.path)
+        game = Game([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)], 0, DealCorpus(self.path))
+        rngs = table_rngs(0)
+        for i in range(4):
+            scores = game.play_a_round()
+            tricks = [tuple(c.id for c in trick) for trick in game.round_hands_played]
+            result = simulate_round([RuleBasedPolicy() for _ in range(4)], first_hand=i, rngs=rngs,
+                                    deal=corpus.next_deal())
+            self.assertEqual(tuple(scores), tuple(result.scores))
+            self.assertEqual(tricks, result.tricks)
+        self.assertEqual(game.deals.position, 4)
+
+    def testSplit(self):
+        corpus = DealCorpus(self.path)
+        parts = [corpus.split(3, i) for i in range(3)]
+        self.assertEqual(sum(len(p) for p in parts), 100)
+        self.assertTrue((parts[1][0] == corpus[len(parts[0])]).all())
+        self.assertRaises(ValueError, DealCorpus, np.zeros((2, 52)))
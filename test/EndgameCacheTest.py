@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dealer.Card import CARD_SUITS
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of
+from dealer.EndgameCache import EndgameCache, canonical_position
+from dealer.Simulator import RoundState, deal_round, run_bidding, run_widowing, play_tricks
+from dealer.Solver import DoubleDummySolver, solve_state
+from dealer.Utils import table_rngs
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS
+from players.Policy import RuleBasedPolicy
+
+
+def random_position(rng, cards_per_hand):
+    cards = rng.permutation(52)[:NUM_PLAYERS * cards_per_hand]
+    hands = [mask_of(int(card) for card in cards[seat::NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+    return hands, GAMEMODE(int(rng.integers(1, 5))), SUITS(int(rng.integers(1, 5))), int(rng.integers(NUM_PLAYERS))
+
+
+def rename_suits(mask, suits):
+    """
+    moves the cards of suit s to suit suits[s] with the same rank
+    """
+    return mask_of(card - CARD_SUITS[card] + suits[CARD_SUITS[card]] for card in ids_of(mask))
+
+
+class EndgameCacheTester(unittest.TestCase):
+    def testMatchesSolver(self):
+        rng = np.random.default_rng(0)
+        cache = EndgameCache()
+        for _ in range(60):
+            hands, game_mode, hokm_suit, leader = random_position(rng, int(rng.integers(1, 5)))
+            solver = DoubleDummySolver(game_mode, hokm_suit)
+            trick = []
+            for k in range(int(rng.integers(NUM_PLAYERS))):
+                seat = (leader + k) % NUM_PLAYERS
+                card = ids_of(hands[seat] & SUIT_MASKS[CARD_SUITS[trick[0]] if trick else SUITS.NOSUIT] or
+                              hands[seat])[0]
+                hands[seat] ^= 1 << card
+                trick.append(card)
+            if not hands[(leader + len(trick)) % NUM_PLAYERS]:
+                continue
+            self.assertEqual(solver.solve(hands, leader, trick), cache.solve(game_mode, hokm_suit, hands, leader, trick))
+            self.assertEqual(solver.card_values(hands, leader, trick),
+                             cache.solver(game_mode, hokm_suit).card_values(hands, leader, trick))
+
+    def testIsomorphicPositions(self):
+        rng = np.random.default_rng(1)
+        cache = EndgameCache()
+        hands, _, _, _ = random_position(rng, 4)
+        key = canonical_position(GAMEMODE.NORMAL, SUITS.HEARTS, hands, 1)[0]
+        # the other suits renamed and the partner of the leader leading
+        suits = {SUITS.DIAMONDS: SUITS.SPADES, SUITS.CLUBS: SUITS.DIAMONDS, SUITS.SPADES: SUITS.CLUBS,
+                 SUITS.HEARTS: SUITS.HEARTS}
+        renamed = [rename_suits(hands[(seat + 2) % NUM_PLAYERS], suits) for seat in range(NUM_PLAYERS)]
+        self.assertEqual(key, canonical_position(GAMEMODE.NORMAL, SUITS.HEARTS, renamed, 3)[0])
+        # the hokm is renamed along with its cards only
+        suits = {SUITS.DIAMONDS: SUITS.DIAMONDS, SUITS.CLUBS: SUITS.CLUBS, SUITS.SPADES: SUITS.HEARTS,
+                 SUITS.HEARTS: SUITS.SPADES}
+        renamed = [rename_suits(hand, suits) for hand in hands]
+        self.assertEqual(key, canonical_position(GAMEMODE.NORMAL, SUITS.SPADES, renamed, 1)[0])
+        self.assertNotEqual(key, canonical_position(GAMEMODE.NORMAL, SUITS.HEARTS, renamed, 1)[0])
+        self.assertEqual(canonical_position(GAMEMODE.SARAS, SUITS.HEARTS, hands, 1)[0],
+                         canonical_position(GAMEMODE.SARAS, SUITS.HEARTS, renamed, 1)[0])
+
+        points = cache.solve(GAMEMODE.NORMAL, SUITS.HEARTS, hands, 1)
+        rotated = hands[1:] + hands[:1]
+        self.assertEqual(20 - points, cache.solve(GAMEMODE.NORMAL, SUITS.HEARTS, rotated, 0))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def testLeastRecentlyUsed(self):
+        rng = np.random.default_rng(2)
+        cache = EndgameCache(capacity=2)
+        positions = [random_position(rng, 2) for _ in range(3)]
+        for hands, game_mode, hokm_suit, leader in positions + positions[2:] + positions[:1]:
+            cache.solve(game_mode, hokm_suit, hands, leader)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(4, cache.misses)
+
+    def testDiskLayer(self):
+        rng = np.random.default_rng(3)
+        positions = [random_position(rng, 3) for _ in range(10)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "endgames.sqlite")
+            with EndgameCache(path=path) as cache:
+                expected = [cache.solve(game_mode, hokm_suit, hands, leader)
+                            for hands, game_mode, hokm_suit, leader in positions]
+            with EndgameCache(path=path) as cache:
+                self.assertEqual(expected, [cache.solve(game_mode, hokm_suit, hands, leader)
+                                            for hands, game_mode, hokm_suit, leader in positions])
+                self.assertEqual(0, cache.misses)
+                self.assertEqual(10, cache.disk_hits + cache.hits)
+
+    def testRollout(self):
+        cache = EndgameCache(max_tricks=4)
+        policies = [RuleBasedPolicy() for _ in range(NUM_PLAYERS)]
+        for seed in range(5):
+            rngs = table_rngs(seed)
+            deal = list(range(52))
+            rngs[0].shuffle(deal)
+            state = RoundState(*rngs)
+            deal_round(state, deal)
+            run_bidding(state, policies)
+            run_widowing(state, policies)
+            expected = state.copy()
+            play_tricks(expected, policies, 8)
+            self.assertEqual(solve_state(expected), cache.rollout(state, policies))
+            self.assertEqual(8, state.trick_number)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dealer.Game import Game
+from dealer.GameRecord import GameRecordWriter, GameRecordReader, RECORD_DTYPE
+from dealer.Simulator import simulate_round
+from dealer.Utils import table_rngs
+from players.Policy import RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game import ShelemGame
+
+
+class GameRecordTester(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "rounds.rec")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testGameRounds(self):
+        with GameRecordWriter(self.path, buffer_size=3) as recorder:
+            game = Game([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)], 5, recorder=recorder)
+            for _ in range(7):
+                game.play_a_round()
+            tricks = game.round_hands_played
+        reader = GameRecordReader(self.path)
+        self.assertEqual(RECORD_DTYPE.itemsize, 123)
+        self.assertEqual(len(reader), 7)
+        self.assertEqual(sum(len(batch) for batch in reader.batches(4)), 7)
+        last = reader[6]
+        self.assertEqual(sorted(last["deal"]), list(range(52)))
+        self.assertEqual(last["first_hand"], 6 % 4)
+        self.assertEqual(last["bid_values"][last["num_bids"] - 1], 40)
+        self.assertEqual(sum(reader.records["team_points"][6]), 65)
+        plays = last["plays"].tolist()
+        self.assertEqual([sorted(plays[4 * i:4 * i + 4]) for i in range(12)],
+                         [sorted(card.id for card in trick) for trick in tricks])
+
+    def testMatchesSimulator(self):
+        with GameRecordWriter(self.path) as recorder:
+            Game([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)], 9, recorder=recorder).play_a_round()
+        record = GameRecordReader(self.path)[0]
+        result = simulate_round([RuleBasedPolicy() for _ in range(4)], rngs=table_rngs(9), deal=record["deal"])
+        self.assertEqual(tuple(result.team_points), tuple(record["team_points"]))
+        self.assertEqual(result.hakem, record["hakem"])
+        plays = record["plays"].tolist()
+        self.assertEqual([sorted(plays[4 * i:4 * i + 4]) for i in range(12)], [sorted(t) for t in result.tricks])
+
+    def testShelemGameAppends(self):
+        with GameRecordWriter(self.path) as recorder:
+            game = ShelemGame(game_end=0, seed=1, recorder=recorder)
+            game.reset()
+            while not game.is_over():
+                legal = game.get_legal_actions()
+                game.step(legal[0])
+        with GameRecordWriter(self.path) as recorder:
+            pass
+        reader = GameRecordReader(self.path)
+        self.assertEqual(len(reader), 1)
+        self.assertEqual(len(set(reader[0]["plays"].tolist())), 48)
+        self.assertTrue(np.isin(reader[0]["discard"], reader[0]["plays"], invert=True).all())
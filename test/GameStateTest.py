@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+
+from rlcard_env.game_state import GameState, GameState2, GameStateBatch, STATE, CARD_STATE, NUMBER_OF_PARAMS
+
+
+class GameStateTester(unittest.TestCase):
+    def testIncrementalEncoding(self):
+        observation = GameState2()
+        buffer = observation.state
+        observation.set_states([0, 5, 9], CARD_STATE.MY_HAND)
+        observation.set_state(5, CARD_STATE.PLAYED)
+        self.assertIs(observation.state, buffer)
+        self.assertEqual(buffer.dtype, np.float32)
+        self.assertAlmostEqual(buffer[0], 0.8)
+        self.assertEqual(buffer[5], 1.0)
+        observation.reset_state()
+        self.assertIs(observation.state, buffer)
+        self.assertEqual(buffer.sum(), 0)
+
+    def testBatchRows(self):
+        batch = GameStateBatch(3)
+        encoders = [batch.encoder(i) for i in range(3)]
+        encoders[1].set_state(7, CARD_STATE.PLAYER1)
+        self.assertEqual(batch.matrix.shape, (3, NUMBER_OF_PARAMS))
+        self.assertAlmostEqual(batch.matrix[1, 7], 0.4)
+        self.assertEqual(batch.matrix[[0, 2]].sum(), 0)
+        self.assertRaises(ValueError, GameState2, np.zeros(NUMBER_OF_PARAMS))
+
+    def testClearSubState(self):
+        observation = GameState()
+        observation.set_state(STATE.CRR_TRICK, 100, 1)
+        observation.set_state(STATE.MY_HAND, 3, 1)
+        observation.clear(STATE.CRR_TRICK)
+        self.assertEqual(observation.state.sum(), 1)
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from dealer.CardSet import mask_of
+from dealer.Game import Game
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS
+from players.ISMCTSPlayer import ISMCTSPlayer, SearchTree
+from players.PIMCPlayer import Position
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+
+def first_lead(seed: int) -> Position:
+    """
+    the hakem at seat 0 about to lead the first trick
+    """
+    cards = np.random.default_rng(seed).permutation(52).tolist()
+    position = Position(0, mask_of(cards[:12]), GAMEMODE.NORMAL, SUITS.HEARTS, 0)
+    position.unseen = mask_of(cards[12:48])
+    position.sizes = [0, 12, 12, 12, 0]
+    position.saved[0] = mask_of(cards[48:])
+    position.current_suit = SUITS.HEARTS
+    return position
+
+
+class ReusingISMCTSPlayer(ISMCTSPlayer):
+    """
+    counts the visits the root already had when a search begins
+    """
+
+    def __init__(self, player_id, team_mate_player_id, **kwargs):
+        super().__init__(player_id, team_mate_player_id, **kwargs)
+        self.reused = []
+
+    def search(self, position, candidates):
+        self.reused.append(sum(self.tree.root_visits().values()))
+        return super().search(position, candidates)
+
+
+class ISMCTSPlayerTester(unittest.TestCase):
+    def testNodePool(self):
+        tree = SearchTree(max_nodes=200)
+        tree.search(first_lead(0), np.random.default_rng(0), 300)
+        self.assertEqual(200, len(tree))
+        self.assertEqual(300, sum(tree.root_visits().values()))
+        card, visits = max(tree.root_visits().items(), key=lambda item: item[1])
+        tree.advance(card)
+        self.assertLess(len(tree), 200)
+        self.assertEqual(visits, tree.visits[tree.root])
+        self.assertEqual(sorted(set(tree.free)), sorted(tree.free))
+        tree.advance(-1)
+        self.assertEqual(1, len(tree))
+
+    def testAdvanceThroughTrick(self):
+        tree = SearchTree()
+        tree.search(first_lead(0), np.random.default_rng(0), 2000)
+        # the card of the hakem, the replies of the three other seats, then the lead of the next trick
+        for _ in range(NUM_PLAYERS + 1):
+            card, visits = max(tree.root_visits().items(), key=lambda item: item[1])
+            self.assertGreater(visits, 0)
+            tree.advance(card)
+            self.assertEqual(visits, tree.visits[tree.root])
+
+    def testReusesTree(self):
+        # the replies to a card have to be expanded for the next search to start from visits
+        player = ReusingISMCTSPlayer(0, 2, iterations=200)
+        game = Game([player] + [RuleBasedPlayer(seat, (seat + 2) % NUM_PLAYERS) for seat in range(1, NUM_PLAYERS)], 3)
+        game.play_a_round()
+        self.assertEqual(player.decisions, len(player.reused))
+        self.assertTrue(any(player.reused[1:]))
+        self.assertGreater(player.nodes_per_sec, 0)
+        self.assertGreater(player.decision_time, 0)
+
+    def testRootParallelism(self):
+        player = ISMCTSPlayer(1, 3, iterations=20, num_workers=2)
+        game = Game([RuleBasedPlayer(0, 2), player, RuleBasedPlayer(2, 0), RuleBasedPlayer(3, 1)], 5)
+        try:
+            game.play_a_round()
+        finally:
+            player.close()
+        self.assertGreater(player.decisions, 0)
+        # the visits of the three trees at least
+        self.assertGreaterEqual(player.nodes, 3 * 20 * player.decisions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from dealer.Game import Game
+from dealer.Logging import Logging
+from players.Enum import ACTION_DIM
+from players.InferenceServer import InferenceServer
+from players.IntelligentPlayer import PPOPlayer
+from players.PPO import MaskableActorCritic
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game_state import NUMBER_OF_PARAMS
+
+
+def client_process(client, seed, results):
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        mask = rng.random(ACTION_DIM) < 0.3
+        mask[rng.integers(ACTION_DIM)] = True
+        action, logprob = client.act(rng.random(NUMBER_OF_PARAMS, dtype=np.float32), mask)
+        results.put((bool(mask[action]), logprob <= 0))
+
+
+class InferenceServerTester(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.policy = MaskableActorCritic(NUMBER_OF_PARAMS, ACTION_DIM, 32)
+
+    def testBatchedMasking(self):
+        masks = torch.zeros(64, ACTION_DIM, dtype=torch.bool)
+        masks[torch.arange(64), torch.arange(64) % ACTION_DIM] = True
+        masks[::2, 7] = True
+        actions, logprobs = self.policy.act_batch(torch.rand(64, NUMBER_OF_PARAMS), masks)
+        self.assertTrue(masks[torch.arange(64), actions].all())
+        self.assertTrue(torch.allclose(logprobs[1::2], torch.zeros(32), atol=1e-6))
+
+    def testThreadedTables(self):
+        self.addCleanup(setattr, Logging, "verbose", Logging.verbose)
+        Logging.verbose = 0
+        num_tables = 6
+        with InferenceServer(self.policy, num_tables, max_wait=0.005) as server:
+            games = []
+            for table in range(num_tables):
+                player = PPOPlayer(0, 2)
+                player.train_inline = False
+                player.set_inference_client(server.client(table))
+                games.append(Game([player, RuleBasedPlayer(1, 3), RuleBasedPlayer(2, 0), RuleBasedPlayer(3, 1)], table))
+            threads = [threading.Thread(target=game.play_a_round) for game in games]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        stats = server.stats()
+        self.assertEqual(stats["requests"], num_tables * 12)
+        self.assertGreater(stats["mean_batch_size"], 1)
+        self.assertTrue(all(len(game.players[0].memory) == 12 for game in games))
+
+    def testClientProcesses(self):
+        context = mp.get_context("spawn")
+        results = context.Queue()
+        with InferenceServer(self.policy, 3, context=context) as server:
+            processes = [context.Process(target=client_process, args=(server.client(i), i, results)) for i in range(3)]
+            for process in processes:
+                process.start()
+            answers = [results.get(timeout=60) for _ in range(60)]
+            for process in processes:
+                process.join()
+        self.assertTrue(all(legal and probability for legal, probability in answers))
+        self.assertEqual(server.stats()["requests"], 60)
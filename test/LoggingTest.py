@@ -0,0 +1,53 @@
+import io
+import unittest
+
+from dealer.Game import Game
+from dealer.Logging import Logging, LEVEL, BufferedSink
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+
+class LoggingTester(unittest.TestCase):
+    def setUp(self):
+        self.verbose = Logging.verbose
+
+    def tearDown(self):
+        Logging.verbose = self.verbose
+        Logging.set_sink()
+
+    def testLazyMessages(self):
+        calls = []
+        sink = BufferedSink(None, capacity=None)
+        Logging.set_sink(sink)
+        Logging.verbose = LEVEL.INFO
+        Logging.debug(lambda: calls.append("debug") or "debug")
+        Logging.info(lambda: calls.append("info") or "info")
+        Logging.disable()
+        Logging.error(lambda: calls.append("error") or "error")
+        self.assertEqual(calls, ["info"])
+        self.assertEqual(sink.lines, ["info"])
+        self.assertFalse(Logging.enabled(LEVEL.ERROR))
+
+    def testBufferedSink(self):
+        stream = io.StringIO()
+        sink = BufferedSink(stream, capacity=2)
+        sink.write("a")
+        self.assertEqual(stream.getvalue(), "")
+        sink.write("b")
+        sink.write("c")
+        self.assertEqual(stream.getvalue(), "a\nb\n")
+        sink.flush()
+        self.assertEqual(stream.getvalue(), "a\nb\nc\n")
+        # an in-memory sink would never be flushed
+        with self.assertRaises(ValueError):
+            BufferedSink(None, capacity=2)
+
+    def testRoundSummaries(self):
+        summaries = BufferedSink(None, capacity=None)
+        Logging.set_sink(BufferedSink(None, capacity=None), summaries)
+        Logging.disable()
+        game = Game([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)], 0)
+        game.limit_game_number = 3
+        game.benchmark_rounds = 0
+        game.begin_game()
+        self.assertEqual(len(summaries.lines), 3)
+        self.assertEqual(Logging.sink.lines, [])
@@ -0,0 +1,111 @@
+import unittest
+
+import numpy as np
+
+from dealer.Card import CARD_SUITS, RANK_TABLE
+from dealer.CardSet import FULL_MASK, ids_of, mask_of
+from dealer.Game import Game
+from dealer.Simulator import RoundState, play_tricks, simulate_round
+from dealer.Trick import HIGHER_CARDS, TRICK_STRENGTH
+from players.Enum import GAMEMODE, SUITS, DECK_SIZE, NUM_PLAYERS
+from players.ModeSelection import ModeSelector, hand_signature
+from players.Policy import HakemPolicy, Policy, RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.batched_game import HOKM_KEEP, play_rounds
+
+
+def renamed(hand: int) -> int:
+    return mask_of(card - CARD_SUITS[card] + (CARD_SUITS[card] % 4 + 1) for card in ids_of(hand))
+
+
+class GreedyPolicy(Policy):
+    """
+    the rule of play_rounds one card at a time, the tricks are taken by whom dealer.Simulator.play_card says
+    """
+
+    def play_card(self, state: RoundState, seat: int) -> int:
+        game_mode, hokm_suit = state.game_mode, state.hokm_suit
+        ranks = RANK_TABLE[game_mode]
+        legal = ids_of(state.legal_mask(seat))
+        keeps = [ranks[c] + HOKM_KEEP * (game_mode == GAMEMODE.NORMAL and CARD_SUITS[c] == hokm_suit) for c in legal]
+        lowest = min(zip(keeps, legal))[1]
+        if state.trick_size == 0:
+            highest = max(legal, key=lambda c: (ranks[c], -c))
+            others = FULL_MASK & ~state.played & ~state.hands[seat]
+            return lowest if HIGHER_CARDS[game_mode][highest] & others else highest
+        strength = TRICK_STRENGTH[game_mode][hokm_suit][CARD_SUITS[state.trick[state.trick_leader]]]
+        beats = [c for c in legal if strength[c] > strength[state.trick[state.winner]]]
+        if beats and state.winner != (seat + 2) % NUM_PLAYERS:
+            return min(beats, key=lambda c: (strength[c], c))
+        return lowest
+
+
+class ModeSelectionTester(unittest.TestCase):
+    def testPlayRounds(self):
+        n = 200
+        rng = np.random.default_rng(0)
+        hands = np.zeros((n, NUM_PLAYERS, DECK_SIZE), dtype=bool)
+        deals = rng.permuted(np.tile(np.arange(DECK_SIZE), (n, 1)), axis=1)[:, :48].reshape(n, NUM_PLAYERS, -1)
+        for seat in range(NUM_PLAYERS):
+            hands[np.arange(n)[:, None], seat, deals[:, seat]] = True
+        game_modes = rng.integers(1, 5, n)
+        hokm_suits = rng.integers(1, 5, n)
+        leaders = rng.integers(0, NUM_PLAYERS, n)
+        won = play_rounds(hands, game_modes, hokm_suits, leaders)
+        self.assertTrue((won.sum(axis=1) == 12).all())
+        self.assertFalse(hands.any())
+        # every trick of the same play replayed one card at a time, a wrong winner leads the next trick
+        for i in range(n):
+            state = RoundState()
+            state.hands = [mask_of(deals[i, seat].tolist()) for seat in range(NUM_PLAYERS)]
+            state.game_mode = GAMEMODE(int(game_modes[i]))
+            state.hokm_suit = state.current_suit = SUITS(int(hokm_suits[i]))
+            state.trick_leader = state.current_player = state.winner = int(leaders[i])
+            play_tricks(state, [GreedyPolicy()] * NUM_PLAYERS)
+            self.assertEqual([state.trick_winners.count(seat) for seat in range(NUM_PLAYERS)], won[i].tolist())
+
+    def testLowestCardsLeading(self):
+        hands = np.zeros((2, NUM_PLAYERS, DECK_SIZE), dtype=bool)
+        cards = np.arange(48).reshape(NUM_PLAYERS, 12)
+        for seat in range(NUM_PLAYERS):
+            hands[:, seat, cards[seat]] = True
+        won = play_rounds(hands, np.array([GAMEMODE.NARAS, GAMEMODE.NORMAL]), np.array([SUITS.DIAMONDS] * 2),
+                          np.zeros(2, dtype=np.int64))
+        self.assertEqual([12, 0, 0, 0], won[0].tolist())
+        self.assertEqual(0, won[1, 0])
+
+    def testSelect(self):
+        selector = ModeSelector(num_samples=64)
+        self.assertEqual(GAMEMODE.NARAS, selector.select(mask_of(range(16)), 0))
+        # nine spades from the ace, the rest low
+        hand = mask_of(range(51, 15, -4)) | mask_of([0, 4, 1, 5, 2, 6, 10])
+        self.assertEqual(GAMEMODE.NORMAL, selector.select(hand, 0))
+        self.assertEqual((0, 2), (selector.hits, selector.misses))
+        self.assertEqual(hand_signature(hand), hand_signature(renamed(hand)))
+        points = selector.evaluate(renamed(hand), 1)
+        self.assertEqual((1, 2), (selector.hits, selector.misses))
+        self.assertEqual(len(GAMEMODE), len(points))
+        self.assertGreater(selector.sims_per_sec, 0)
+        selector = ModeSelector(num_samples=4, capacity=1)
+        selector.evaluate(hand, 0)
+        selector.evaluate(mask_of(range(16)), 0)
+        selector.evaluate(hand, 0)
+        self.assertEqual((0, 3, 1), (selector.hits, selector.misses, len(selector)))
+
+    def testHooks(self):
+        selector = ModeSelector(num_samples=16)
+        players = [RuleBasedPlayer(seat, (seat + 2) % NUM_PLAYERS) for seat in range(NUM_PLAYERS)]
+        for player in players:
+            player.mode_selector = selector
+        game = Game(players, 3)
+        for _ in range(2):
+            game.play_a_round()
+        self.assertEqual(2, selector.hits + selector.misses)
+        for policy in (HakemPolicy(mode_selector=selector), RuleBasedPolicy(mode_selector=selector)):
+            result = simulate_round([policy] * NUM_PLAYERS, 3)
+            self.assertEqual(65, sum(result.team_points))
+        self.assertEqual(4, selector.hits + selector.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+from dealer.CardSet import SUIT_MASKS, mask_of, popcount
+from dealer.Game import Game
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS
+from players.IntelligentPlayer import AgentPlayer
+from players.PIMCPlayer import PIMCPlayer, Position, DISCARD, sample_layout
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game import ShelemGame
+
+
+class CheckedPIMCPlayer(PIMCPlayer):
+    """
+    checks that the hands of the table are one of the layouts the player samples from
+    """
+
+    def __init__(self, player_id, team_mate_player_id, **kwargs):
+        super().__init__(player_id, team_mate_player_id, **kwargs)
+        self.table = []
+        self.checked = 0
+
+    def position(self, current_suit):
+        position = super().position(current_suit)
+        others = 0
+        for seat, player in enumerate(self.table):
+            if seat == self.player_id:
+                continue
+            hand = player.deck.mask
+            assert position.sizes[seat] == popcount(hand)
+            assert position.voids[seat] & hand == 0
+            others |= hand
+        assert others & ~position.unseen == 0
+        assert popcount(position.unseen & ~others) == position.sizes[DISCARD]
+        self.checked += 1
+        return position
+
+
+def rule_based_table(player: PIMCPlayer):
+    players = [RuleBasedPlayer(seat, (seat + 2) % NUM_PLAYERS) for seat in range(NUM_PLAYERS)]
+    players[player.player_id] = player
+    return players
+
+
+class PIMCPlayerTester(unittest.TestCase):
+    def testSampleLayoutKeepsVoids(self):
+        rng = np.random.default_rng(0)
+        cards = rng.permutation(52).tolist()
+        position = Position(0, mask_of(cards[:10]), GAMEMODE.NORMAL, SUITS.HEARTS, 1)
+        position.unseen = mask_of(cards[10:44])
+        position.sizes = [0, 14, 8, 8, 4]
+        position.voids[2] = SUIT_MASKS[SUITS.SPADES] | SUIT_MASKS[SUITS.CLUBS]
+        position.voids[3] = SUIT_MASKS[SUITS.SPADES]
+        for _ in range(50):
+            layout = sample_layout(position, rng)
+            self.assertEqual(position.hand, layout[0])
+            self.assertEqual([popcount(pile) for pile in layout[1:]], position.sizes[1:])
+            self.assertEqual(position.unseen, layout[1] | layout[2] | layout[3] | layout[4])
+            self.assertEqual(0, layout[2] & position.voids[2])
+            self.assertEqual(0, layout[3] & position.voids[3])
+
+    def testGameRounds(self):
+        player = CheckedPIMCPlayer(1, 3, num_samples=8)
+        players = rule_based_table(player)
+        player.table = players
+        game = Game(players, 4)
+        for _ in range(2):
+            game.play_a_round()
+        self.assertGreater(player.checked, 0)
+        self.assertGreaterEqual(player.checked, player.decisions)
+        self.assertGreater(player.sims_per_sec, 0)
+
+    def testShelemGameRound(self):
+        player = CheckedPIMCPlayer(2, 0, num_samples=8)
+        game = ShelemGame(game_end=0, seed=3)
+        players = [AgentPlayer(0, 2), RuleBasedPlayer(1, 3), player, RuleBasedPlayer(3, 1)]
+        game.set_players(players)
+        player.table = players
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.reset()
+            while not game.is_over():
+                game.step(game.get_legal_actions()[0])
+        self.assertGreater(player.checked, 0)
+
+    def testDeterministicAcrossWorkers(self):
+        points = []
+        for num_workers in (0, 2):
+            player = PIMCPlayer(0, 2, num_samples=8, batch_size=2, num_workers=num_workers)
+            game = Game(rule_based_table(player), 11)
+            points.append([game.play_a_round() for _ in range(2)])
+            player.close()
+        self.assertEqual(points[0], points[1])
+
+    def testClosesPool(self):
+        player = PIMCPlayer(0, 2, num_samples=4, batch_size=2, num_workers=2)
+        game = Game(rule_based_table(player), 11)
+        game.limit_game_number = 1
+        game.benchmark_rounds = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.begin_game()
+        self.assertGreater(player.decisions, 0)
+        self.assertIsNone(player.executor)
+        with PIMCPlayer(1, 3, num_samples=4, batch_size=2, num_workers=2) as player:
+            Game([RuleBasedPlayer(0, 2), player, RuleBasedPlayer(2, 0), RuleBasedPlayer(3, 1)], 12).play_a_round()
+            self.assertIsNotNone(player.executor)
+        self.assertIsNone(player.executor)
+        shelem_game = ShelemGame()
+        shelem_game.set_players([AgentPlayer(0, 2), player, RuleBasedPlayer(2, 0), RuleBasedPlayer(3, 1)])
+        player.pool()
+        shelem_game.close()
+        self.assertIsNone(player.executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import contextlib
+import io
+import unittest
+
+import numpy as np
+import torch
+
+from dealer.Game import Game
+from players.Enum import ACTION_DIM
+from players.IntelligentPlayer import PPOPlayer
+from players.PPO import PPO, MaskableActorCritic, Memory, RolloutBuffer, discounted_returns, generalized_advantages
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game_state import NUMBER_OF_PARAMS
+
+
+def reference_advantages(rewards, values, is_terminals, gamma, lam):
+    advantages = []
+    advantage = 0
+    for t in reversed(range(len(rewards))):
+        next_value = 0 if is_terminals[t] or t == len(rewards) - 1 else values[t + 1]
+        if is_terminals[t]:
+            advantage = 0
+        advantage = rewards[t] + gamma * next_value - values[t] + gamma * lam * advantage
+        advantages.insert(0, advantage)
+    return advantages
+
+
+class PPOTester(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.rewards = rng.normal(size=100).tolist()
+        self.values = rng.normal(size=100).tolist()
+        self.is_terminals = (rng.random(100) < 0.1).tolist()
+        self.is_terminals[40:45] = [True] * 5
+
+    def testDiscountedReturns(self):
+        expected = reference_advantages(self.rewards, [0] * 100, self.is_terminals, 0.99, 1.0)
+        returns = discounted_returns(torch.tensor(self.rewards), torch.tensor(self.is_terminals), 0.99)
+        self.assertTrue(np.allclose(returns.numpy(), expected, atol=1e-5))
+
+    def testGeneralizedAdvantages(self):
+        expected = reference_advantages(self.rewards, self.values, self.is_terminals, 0.9, 0.8)
+        advantages = generalized_advantages(torch.tensor(self.rewards), torch.tensor(self.values),
+                                            torch.tensor(self.is_terminals), 0.9, 0.8)
+        self.assertTrue(np.allclose(advantages.numpy(), expected, atol=1e-5))
+
+    def testBufferMatchesMemory(self):
+        rng = np.random.default_rng(1)
+        memory = Memory()
+        buffer = RolloutBuffer(NUMBER_OF_PARAMS, ACTION_DIM, capacity=4)
+        for i in range(10):
+            state = rng.random(NUMBER_OF_PARAMS, dtype=np.float32)
+            mask = rng.random(ACTION_DIM) < 0.5
+            for m in (memory, buffer):
+                m.add_action(state, i % ACTION_DIM, -0.5 * i, mask)
+                m.add_reward(float(i), i % 3 == 2)
+        self.assertEqual(16, buffer.capacity)
+        for expected, actual in zip(memory.tensors(), buffer.tensors()):
+            self.assertTrue(torch.equal(expected, actual))
+        buffer.clear_memory()
+        self.assertEqual(0, len(buffer))
+        self.assertEqual(16, buffer.capacity)
+
+    def testMaskedEvaluate(self):
+        torch.manual_seed(0)
+        policy = MaskableActorCritic(NUMBER_OF_PARAMS, ACTION_DIM, 32)
+        states = torch.rand(64, NUMBER_OF_PARAMS)
+        masks = torch.rand(64, ACTION_DIM) < 0.2
+        masks[torch.arange(64), torch.arange(64) % ACTION_DIM] = True
+        actions, logprobs = policy.act_batch(states, masks)
+        masked_logprobs, _, masked_entropy = policy.evaluate(states, actions, masks)
+        self.assertTrue(torch.allclose(logprobs, masked_logprobs, atol=1e-5))
+        unmasked_logprobs, _, entropy = policy.evaluate(states, actions)
+        self.assertTrue((unmasked_logprobs < masked_logprobs).all())
+        self.assertTrue((masked_entropy < entropy).all())
+        # a single legal card is played for sure
+        single = torch.zeros(1, ACTION_DIM, dtype=torch.bool)
+        single[0, 5] = True
+        with torch.no_grad():
+            logprob, _, entropy = policy.evaluate(states[:1], torch.tensor([5]), single)
+        self.assertAlmostEqual(0.0, float(logprob), places=6)
+        self.assertAlmostEqual(0.0, float(entropy), places=6)
+
+    def testMinibatchUpdate(self):
+        torch.manual_seed(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ppo = PPO(NUMBER_OF_PARAMS, ACTION_DIM, 32, 0.002, (0.9, 0.999), 0.99, 2, 0.2, minibatch_size=16)
+        buffer = RolloutBuffer(NUMBER_OF_PARAMS, ACTION_DIM)
+        rng = np.random.default_rng(2)
+        for i in range(48):
+            ppo.policy_old.act(rng.random(NUMBER_OF_PARAMS, dtype=np.float32), buffer, np.ones(ACTION_DIM, bool))
+            buffer.add_reward(1.0, i % 12 == 11)
+        before = [p.clone() for p in ppo.policy.parameters()]
+        ppo.update(buffer)
+        self.assertTrue(any(not torch.equal(b, p) for b, p in zip(before, ppo.policy.parameters())))
+        for old, new in zip(ppo.policy_old.parameters(), ppo.policy.parameters()):
+            self.assertTrue(torch.equal(old, new))
+
+        buffer.add_reward(0.0, True)
+        with self.assertRaises(ValueError):
+            ppo.update(buffer)
+
+    def testPlayerRounds(self):
+        torch.manual_seed(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            player = PPOPlayer(0, 2)
+        game = Game([player, RuleBasedPlayer(1, 3), RuleBasedPlayer(2, 0), RuleBasedPlayer(3, 1)], 3)
+        for _ in range(2):
+            game.play_a_round()
+        self.assertEqual(0, len(player.memory))
+
+
+if __name__ == '__main__':
+    unittest.main()
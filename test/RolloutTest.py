@@ -0,0 +1,34 @@
+import contextlib
+import io
+import unittest
+
+import torch
+
+from players.Enum import ACTION_DIM
+from players.PPO import PPO
+from players.Rollout import RolloutLearner
+from rlcard_env.game_state import NUMBER_OF_PARAMS
+
+
+class RolloutTester(unittest.TestCase):
+    def testTrain(self):
+        torch.manual_seed(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ppo = PPO(NUMBER_OF_PARAMS, ACTION_DIM, 32, 0.002, (0.9, 0.999), 0.99, 2, 0.2)
+        with RolloutLearner(ppo, num_workers=2, rounds_per_trajectory=1, trajectories_per_update=2) as learner:
+            workers = list(learner.workers)
+            self.assertEqual(2, len(workers))
+            learner.train(2)
+            self.assertEqual(2, learner.updates)
+            self.assertEqual(2, learner.version.value)
+            # the PPO seat plays the 12 cards of every round, one round a trajectory
+            self.assertEqual(12 * 2 * 2, learner.steps)
+            self.assertLessEqual(learner.stale_trajectories, 4)
+        self.assertEqual([], learner.workers)
+        for worker in workers:
+            self.assertFalse(worker.is_alive())
+            self.assertIsNotNone(worker.exitcode)
+
+
+if __name__ == '__main__':
+    unittest.main()
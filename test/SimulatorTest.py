@@ -0,0 +1,51 @@
+import unittest
+
+from dealer.Game import Game
+from dealer.Simulator import simulate_round
+from dealer.Utils import table_rngs
+from players.Player import Player
+from players.Policy import RandomPolicy, RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+
+class SimulatorTester(unittest.TestCase):
+    def assertSameRound(self, players, policies, seed):
+        game = Game(players, seed)
+        game.player_id_receiving_first_hand = seed % 4
+        scores = game.play_a_round()
+        result = simulate_round(policies, seed, seed % 4)
+        self.assertEqual(tuple(scores), tuple(result.scores))
+        self.assertEqual([tuple(c.id for c in trick) for trick in game.round_hands_played], result.tricks)
+
+    def testRandomPlayers(self):
+        for seed in range(20):
+            self.assertSameRound([Player(i, (i + 2) % 4) for i in range(4)], [RandomPolicy() for _ in range(4)], seed)
+
+    def testRuleBasedPlayers(self):
+        for seed in range(20):
+            self.assertSameRound([RuleBasedPlayer(i, (i + 2) % 4) for i in range(4)],
+                                 [RuleBasedPolicy() for _ in range(4)], seed)
+
+    def testMixedPlayers(self):
+        for seed in range(20):
+            self.assertSameRound([RuleBasedPlayer(0, 2), Player(1, 3), RuleBasedPlayer(2, 0), Player(3, 1)],
+                                 [RuleBasedPolicy(), RandomPolicy(), RuleBasedPolicy(), RandomPolicy()], seed)
+
+    def testSeveralRounds(self):
+        game = Game([RuleBasedPlayer(0, 2), Player(1, 3), RuleBasedPlayer(2, 0), Player(3, 1)], 11)
+        policies = [RuleBasedPolicy(), RandomPolicy(), RuleBasedPolicy(), RandomPolicy()]
+        rngs = table_rngs(11)
+        for first_hand in range(8):
+            scores = game.play_a_round()
+            result = simulate_round(policies, first_hand=first_hand % 4, rngs=rngs)
+            self.assertEqual(tuple(scores), tuple(result.scores))
+
+    def testReproducible(self):
+        policies = [RandomPolicy() for _ in range(4)]
+        self.assertEqual(simulate_round(policies, 3).tricks, simulate_round(policies, 3).tricks)
+        self.assertNotEqual(simulate_round(policies, 3).tricks, simulate_round(policies, 4).tricks)
+
+    def testPointsAddUp(self):
+        result = simulate_round([RuleBasedPolicy() for _ in range(4)], 1)
+        self.assertEqual(sum(result.team_points), 65)
+        self.assertEqual(len(result.tricks), 12)
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+from dealer.Card import CARD_SUITS, RANK_TABLE
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of
+from dealer.GameRecord import records_of_results, starting_hands
+from dealer.Simulator import simulate_round
+from dealer.Solver import DoubleDummySolver, TRICK_POINTS, ordered_ids
+from dealer.Trick import TRICK_STRENGTH
+from dealer.Utils import table_rngs
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS
+from players.Policy import RuleBasedPolicy
+
+
+def minimax(hands, leader, trick, game_mode, hokm_suit, lead_suit):
+    """
+    plain minimax over every legal card, the points of seats 0 and 2
+    """
+    if len(trick) == NUM_PLAYERS:
+        strength = TRICK_STRENGTH[game_mode][hokm_suit][CARD_SUITS[trick[0]]]
+        winner = (leader + max(range(NUM_PLAYERS), key=lambda k: strength[trick[k]])) % NUM_PLAYERS
+        points = TRICK_POINTS if winner % 2 == 0 else 0
+        return points + minimax(hands, winner, [], game_mode, hokm_suit, SUITS.NOSUIT)
+    seat = (leader + len(trick)) % NUM_PLAYERS
+    if hands[seat] == 0:
+        return 0
+    suit = CARD_SUITS[trick[0]] if trick else lead_suit
+    values = []
+    for card in ids_of(hands[seat] & SUIT_MASKS[suit] or hands[seat]):
+        played = list(hands)
+        played[seat] ^= 1 << card
+        values.append(minimax(played, leader, trick + [card], game_mode, hokm_suit, lead_suit))
+    return max(values) if seat % 2 == 0 else min(values)
+
+
+def random_position(rng, cards_per_hand):
+    cards = rng.permutation(52)[:NUM_PLAYERS * cards_per_hand]
+    hands = [mask_of(int(card) for card in cards[seat::NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+    return hands, GAMEMODE(int(rng.integers(1, 5))), SUITS(int(rng.integers(1, 5))), int(rng.integers(NUM_PLAYERS))
+
+
+class SolverTester(unittest.TestCase):
+    def testOrderedIds(self):
+        for game_mode in GAMEMODE:
+            for suit in (SUITS.DIAMONDS, SUITS.CLUBS, SUITS.HEARTS, SUITS.SPADES):
+                ranks = [RANK_TABLE[game_mode][card] for card in ordered_ids(SUIT_MASKS[suit], game_mode)]
+                self.assertEqual(sorted(ranks, reverse=True), ranks)
+
+    def testMatchesMinimax(self):
+        rng = np.random.default_rng(0)
+        for _ in range(60):
+            hands, game_mode, hokm_suit, leader = random_position(rng, int(rng.integers(1, 4)))
+            lead_suit = hokm_suit if rng.random() < 0.3 else SUITS.NOSUIT
+            solver = DoubleDummySolver(game_mode, hokm_suit)
+            self.assertEqual(minimax(hands, leader, [], game_mode, hokm_suit, lead_suit),
+                             solver.solve(hands, leader, lead_suit=lead_suit))
+
+    def testCardValuesInTrick(self):
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            hands, game_mode, hokm_suit, leader = random_position(rng, 3)
+            solver = DoubleDummySolver(game_mode, hokm_suit)
+            # the leader and the next seat have played their first card
+            trick = []
+            for k in range(2):
+                seat = (leader + k) % NUM_PLAYERS
+                suit = CARD_SUITS[trick[0]] if trick else SUITS.NOSUIT
+                card = ids_of(hands[seat] & SUIT_MASKS[suit] or hands[seat])[0]
+                hands[seat] ^= 1 << card
+                trick.append(card)
+            values = solver.card_values(hands, leader, trick)
+            seat = (leader + 2) % NUM_PLAYERS
+            for card, value in values.items():
+                played = list(hands)
+                played[seat] ^= 1 << card
+                self.assertEqual(minimax(played, leader, trick + [card], game_mode, hokm_suit, SUITS.NOSUIT), value)
+            self.assertEqual(max(values.values()) if seat % 2 == 0 else min(values.values()),
+                             values[solver.best_card(hands, leader, trick)])
+
+    def testRecordedEndgame(self):
+        rngs = table_rngs(4)
+        result = simulate_round([RuleBasedPolicy() for _ in range(NUM_PLAYERS)], rngs=rngs)
+        record = records_of_results([result])[0]
+        # the last four tricks of the round from the same leader
+        plays = [int(card) for card in record["plays"]]
+        played = mask_of(plays[:32])
+        hands = [hand & ~played for hand in starting_hands(record)]
+        leader = result.trick_winners[7]
+        game_mode, hokm_suit = GAMEMODE(int(record["game_mode"])), SUITS(int(record["hokm_suit"]))
+        solver = DoubleDummySolver(game_mode, hokm_suit)
+        self.assertEqual(minimax(hands, leader, [], game_mode, hokm_suit, SUITS.NOSUIT), solver.solve(hands, leader))
+
+    def testStartingHands(self):
+        record = records_of_results([simulate_round([RuleBasedPolicy() for _ in range(NUM_PLAYERS)],
+                                                    rngs=table_rngs(2))])[0]
+        hands = starting_hands(record)
+        self.assertEqual([12] * NUM_PLAYERS, [len(ids_of(hand)) for hand in hands])
+        self.assertEqual(mask_of(int(card) for card in record["plays"]), hands[0] | hands[1] | hands[2] | hands[3])
+        self.assertEqual(0, hands[0] & hands[1] & hands[2] & hands[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from dealer.Tournament import Tournament, play_duplicate
+from players.Player import Player
+from players.RuleBasedPlayer import RuleBasedPlayer
+
+
+class TournamentTester(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.deals = np.array([rng.permutation(52) for _ in range(40)], dtype=np.uint8)
+
+    def testMirrorMatchCancels(self):
+        differences = play_duplicate(RuleBasedPlayer, RuleBasedPlayer, self.deals, 0, 20, 7)
+        self.assertEqual(differences.shape, (20,))
+        self.assertTrue((differences == 0).all())
+
+    def testRoundRobin(self):
+        tournament = Tournament({"random": Player, "rule_based": RuleBasedPlayer}, self.deals, num_workers=1,
+                                block_size=16)
+        results = tournament.run()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].deals, 40)
+        self.assertLess(results[0].mean, 0)
+        self.assertGreater(results[0].confidence_interval, 0)
+
+    def testWorkers(self):
+        entrants = {"random": Player, "rule_based": RuleBasedPlayer}
+        serial = Tournament(entrants, self.deals, num_workers=1, block_size=16).run()
+        parallel = Tournament(entrants, self.deals, num_workers=2, block_size=16).run()
+        self.assertEqual([(r.name_a, r.name_b) for r in serial], [(r.name_a, r.name_b) for r in parallel])
+        self.assertEqual(serial[0].differences.tolist(), parallel[0].differences.tolist())
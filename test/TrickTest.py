@@ -0,0 +1,47 @@
+import itertools
+import random
+import unittest
+
+from dealer.Card import Card, RANK_TABLE
+from dealer.Deck import Deck
+from dealer.Trick import trick_winner, HIGHER_CARDS
+from players.Enum import GAMEMODE, SUITS
+
+
+class TrickTester(unittest.TestCase):
+    def setUp(self):
+        self.cards = Deck.build_cards()
+        self.suits = [SUITS.DIAMONDS, SUITS.CLUBS, SUITS.HEARTS, SUITS.SPADES]
+
+    def testRankTable(self):
+        for game_mode in GAMEMODE:
+            for card in self.cards:
+                self.assertEqual(RANK_TABLE[game_mode][card.id], card.value.value.get_value(game_mode))
+
+    def testCompareCodes(self):
+        ace_spades, two_spades, king_hearts = self.cards[51], self.cards[3], self.cards[46]
+        self.assertEqual(Card.compare(ace_spades, two_spades, GAMEMODE.SARAS, SUITS.NOSUIT, SUITS.SPADES), 12)
+        self.assertEqual(Card.compare(ace_spades, two_spades, GAMEMODE.NARAS, SUITS.NOSUIT, SUITS.SPADES), -12)
+        self.assertEqual(Card.compare(two_spades, king_hearts, GAMEMODE.NORMAL, SUITS.SPADES, SUITS.HEARTS), 15)
+        self.assertEqual(Card.compare(two_spades, king_hearts, GAMEMODE.SARAS, SUITS.SPADES, SUITS.HEARTS), -14)
+        self.assertEqual(Card.compare(two_spades, king_hearts, GAMEMODE.SARAS, SUITS.SPADES, SUITS.CLUBS), 0)
+        self.assertRaises(ValueError, Card.compare, two_spades, king_hearts, GAMEMODE.NORMAL, SUITS.NOSUIT, SUITS.CLUBS)
+        self.assertRaises(ValueError, Card.compare, two_spades, None, GAMEMODE.SARAS, SUITS.SPADES, SUITS.CLUBS)
+
+    def testTrickWinnerMatchesCompare(self):
+        rnd = random.Random(7)
+        for game_mode, hokm_suit in itertools.product(GAMEMODE, self.suits):
+            for _ in range(200):
+                trick = rnd.sample(self.cards, 4)
+                winner = 0
+                for ind in range(1, 4):
+                    if Card.compare(trick[winner], trick[ind], game_mode, hokm_suit, trick[0].suit) < 0:
+                        winner = ind
+                self.assertEqual(trick_winner([c.id for c in trick], game_mode, hokm_suit), winner)
+
+    def testHigherCards(self):
+        ace_spades, two_spades = self.cards[51], self.cards[3]
+        self.assertEqual(HIGHER_CARDS[GAMEMODE.SARAS][ace_spades.id], 0)
+        self.assertEqual(HIGHER_CARDS[GAMEMODE.NARAS][two_spades.id], 0)
+        self.assertEqual(HIGHER_CARDS[GAMEMODE.ACE_NARAS][ace_spades.id], 0)
+        self.assertEqual(bin(HIGHER_CARDS[GAMEMODE.SARAS][two_spades.id]).count("1"), 12)
@@ -0,0 +1,86 @@
+import unittest
+
+import numpy as np
+
+from dealer.Card import RANK_TABLE, CARD_SUITS
+from dealer.CardSet import SUIT_MASKS, ids_of, mask_of, popcount
+from dealer.Game import Game
+from dealer.Simulator import simulate_round
+from players.Enum import GAMEMODE, SUITS, NUM_PLAYERS
+from players.Policy import HakemPolicy, RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+from players.Widowing import DiscardOptimizer, candidate_discards
+
+
+def random_hand(seed: int) -> int:
+    return mask_of(np.random.default_rng(seed).permutation(52)[:16].tolist())
+
+
+class WidowingTester(unittest.TestCase):
+    def testCandidateDiscards(self):
+        for seed in range(20):
+            hand = random_hand(seed)
+            for game_mode in GAMEMODE:
+                discards = candidate_discards(hand, game_mode)
+                self.assertLessEqual(len(discards), 35)
+                self.assertEqual(len(discards), len(set(discards)))
+                ranks = RANK_TABLE[game_mode]
+                for discard in discards:
+                    self.assertEqual(4, popcount(discard))
+                    self.assertEqual(0, discard & ~hand)
+                    # no kept card of a suit is lower than a discarded one
+                    for card in ids_of(discard):
+                        kept = ids_of(hand & ~discard & SUIT_MASKS[CARD_SUITS[card]])
+                        self.assertTrue(all(ranks[c] > ranks[card] for c in kept))
+        # the aces are the lowest in NARAS
+        aces = mask_of(range(48, 52))
+        self.assertIn(aces, candidate_discards(aces | mask_of(range(24, 36)), GAMEMODE.NARAS))
+        self.assertNotIn(aces, candidate_discards(aces | mask_of(range(24, 36)), GAMEMODE.NORMAL))
+
+    def testOptimize(self):
+        # nine spades from the ace, the rest low
+        spades = mask_of(range(51, 15, -4))
+        hand = spades | mask_of([0, 4, 1, 5, 2, 6, 10])
+        optimizer = DiscardOptimizer(max_samples=16)
+        discard, hokm_suit = optimizer.optimize(hand, GAMEMODE.NORMAL, 0)
+        self.assertEqual(SUITS.SPADES, hokm_suit)
+        self.assertEqual(0, discard & spades)
+        self.assertEqual(1, optimizer.decisions)
+        self.assertGreater(optimizer.sims_per_sec, 0)
+
+    def testDeterministicAcrossWorkers(self):
+        hand = random_hand(1)
+        choices = []
+        for num_workers in (0, 2):
+            optimizer = DiscardOptimizer(num_samples=4, max_samples=16, batch_size=2, num_workers=num_workers)
+            try:
+                choices.append(optimizer.optimize(hand, GAMEMODE.SARAS, 7))
+            finally:
+                optimizer.close()
+            choices.append(optimizer.simulations)
+        self.assertEqual(choices[:2], choices[2:])
+
+    def testTimeBudget(self):
+        optimizer = DiscardOptimizer(num_samples=4, time_budget=0.0)
+        hand = random_hand(2)
+        optimizer.optimize(hand, GAMEMODE.NORMAL, 0)
+        self.assertEqual(4 * 4 * len(candidate_discards(hand, GAMEMODE.NORMAL)), optimizer.simulations)
+
+    def testHooks(self):
+        optimizer = DiscardOptimizer(num_samples=2, max_samples=4)
+        players = [RuleBasedPlayer(seat, (seat + 2) % NUM_PLAYERS) for seat in range(NUM_PLAYERS)]
+        for player in players:
+            player.discard_optimizer = optimizer
+        game = Game(players, 3)
+        for _ in range(2):
+            game.play_a_round()
+        self.assertEqual(2, optimizer.decisions)
+        result = simulate_round([HakemPolicy(discard_optimizer=optimizer)] * NUM_PLAYERS, 3)
+        self.assertEqual(65, sum(result.team_points))
+        result = simulate_round([RuleBasedPolicy(discard_optimizer=optimizer)] * NUM_PLAYERS, 3)
+        self.assertEqual(65, sum(result.team_points))
+        self.assertEqual(4, optimizer.decisions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import contextlib
+import io
+import unittest
+
+from dealer.Simulator import RoundState, deal_round, run_bidding, run_widowing, play_card
+from dealer.Utils import table_rngs
+from dealer.Zobrist import ZobristHash, round_state_hash
+from players.Enum import NUM_PLAYERS, PLAYER_INITIAL_CARDS
+from players.IntelligentPlayer import AgentPlayer
+from players.Policy import RuleBasedPolicy
+from players.RuleBasedPlayer import RuleBasedPlayer
+from rlcard_env.game import ShelemGame
+
+
+def widowed_state(seed: int, first_hand: int = 0) -> RoundState:
+    policies = [RuleBasedPolicy() for _ in range(NUM_PLAYERS)]
+    rngs = table_rngs(seed)
+    deal = list(range(52))
+    rngs[0].shuffle(deal)
+    state = RoundState(*rngs)
+    state.zobrist = ZobristHash()
+    deal_round(state, deal, first_hand)
+    run_bidding(state, policies)
+    run_widowing(state, policies)
+    return state
+
+
+def assert_hashes_equal(test, expected: ZobristHash, actual: ZobristHash):
+    test.assertEqual(expected.public, actual.public)
+    test.assertEqual(expected.full, actual.full)
+    for seat in range(NUM_PLAYERS):
+        test.assertEqual(expected.observation(seat), actual.observation(seat))
+
+
+class ZobristTester(unittest.TestCase):
+    def testIncrementalHash(self):
+        policy = RuleBasedPolicy()
+        for seed in range(5):
+            state = widowed_state(seed, seed % NUM_PLAYERS)
+            assert_hashes_equal(self, round_state_hash(state), state.zobrist)
+            hashes = {state.zobrist.full}
+            while len(state.tricks) < PLAYER_INITIAL_CARDS:
+                play_card(state, policy.play_card(state, state.current_player))
+                assert_hashes_equal(self, round_state_hash(state), state.zobrist)
+                hashes.add(state.zobrist.full)
+            self.assertEqual(4 * PLAYER_INITIAL_CARDS + 1, len(hashes))
+
+    def testCopy(self):
+        state = widowed_state(0)
+        copy = state.copy()
+        play_card(copy, RuleBasedPolicy().play_card(copy, copy.current_player))
+        self.assertEqual(round_state_hash(state).full, state.zobrist.full)
+        self.assertNotEqual(state.zobrist.full, copy.zobrist.full)
+
+    def testPublicHash(self):
+        state = widowed_state(1)
+        other = state.copy()
+        # the seats after the hakem swap a card they hold, nothing public changes
+        seat, partner = (state.hakem + 1) % NUM_PLAYERS, (state.hakem + 3) % NUM_PLAYERS
+        card, partner_card = state.hands[seat] & -state.hands[seat], state.hands[partner] & -state.hands[partner]
+        other.hands[seat] ^= card | partner_card
+        other.hands[partner] ^= card | partner_card
+        swapped = round_state_hash(other)
+        self.assertEqual(state.zobrist.public, swapped.public)
+        self.assertEqual(state.zobrist.observation(state.hakem), swapped.observation(state.hakem))
+        self.assertNotEqual(state.zobrist.full, swapped.full)
+        self.assertNotEqual(state.zobrist.observation(seat), swapped.observation(seat))
+
+    def testShelemGameHashes(self):
+        hashes = []
+        for _ in range(2):
+            game = ShelemGame(game_end=0, seed=4)
+            game.set_players([AgentPlayer(0, 2)] + [RuleBasedPlayer(seat, (seat + 2) % NUM_PLAYERS)
+                                                    for seat in range(1, NUM_PLAYERS)])
+            played = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                game.reset()
+                while not game.is_over():
+                    game.step(game.get_legal_actions()[0])
+                    played.append((game.get_state_hash(), game.get_state_hash(0), game.get_perfect_information_hash()))
+            hashes.append(played)
+        self.assertEqual(hashes[0], hashes[1])
+        self.assertEqual(len(hashes[0]), len(set(full for _, _, full in hashes[0])))
+
+
+if __name__ == '__main__':
+    unittest.main()